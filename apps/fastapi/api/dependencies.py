@@ -0,0 +1,51 @@
+from typing import Optional
+
+from fastapi import HTTPException, Query, status
+
+from crud.spatial import (
+    DEFAULT_PRECISION,
+    MAX_ZOOM,
+    GeometryOptions,
+    SpatialFilter,
+    build_geometry_options,
+    build_spatial_filter,
+)
+
+
+def spatial_filter(
+    bbox: Optional[str] = Query(
+        None, description="Viewport filter as minx,miny,maxx,maxy in EPSG:4326"
+    ),
+    intersects: Optional[str] = Query(
+        None, description="GeoJSON geometry (EPSG:4326) that results must intersect"
+    ),
+) -> Optional[SpatialFilter]:
+    """Dependency parsing the shared ``bbox`` / ``intersects`` query parameters."""
+    try:
+        return build_spatial_filter(bbox, intersects)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def geometry_options(
+    zoom: Optional[int] = Query(
+        None,
+        ge=0,
+        le=MAX_ZOOM,
+        description="Map zoom level; geometries are simplified to about one pixel",
+    ),
+    tolerance: Optional[float] = Query(
+        None, gt=0, description="Simplification tolerance in degrees (instead of zoom)"
+    ),
+    precision: Optional[int] = Query(
+        None,
+        ge=0,
+        le=DEFAULT_PRECISION,
+        description="Coordinate decimals in the output; follows zoom/tolerance by default",
+    ),
+) -> GeometryOptions:
+    """Dependency parsing the shared ``zoom`` / ``tolerance`` / ``precision`` parameters."""
+    try:
+        return build_geometry_options(zoom, tolerance, precision)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1,72 +1,369 @@
 # api/endpoints/data/gis.py
-from fastapi import APIRouter, UploadFile, File, Depends
-from crud.gis_import import handle_gis_file
-from models.file import FileUploadResponse  # or models, depending on your setup
-from config.database import get_db
+from fastapi import APIRouter, Depends, Query, Request, Response
+from starlette.requests import ClientDisconnect
+from fastapi.concurrency import run_in_threadpool
+import time
+from crud.gis_import import (
+    CHUNK_BYTES,
+    MAX_UPLOAD_BYTES,
+    UploadTooLargeError,
+    import_queue,
+    queue_gis_import,
+    spool_multipart_upload,
+)
+from core.job_queue import QUEUED, QueueFullError
+from core.multipart import MultipartError
+from crud import upload_sessions
+from crud.upload_sessions import (
+    ChecksumMismatchError,
+    ChunkWriter,
+    IncompleteUploadError,
+    OffsetMismatchError,
+    SessionBusyError,
+    UploadSessionNotFound,
+)
+from models.file import (  # or models, depending on your setup
+    FileUploadResponse,
+    ImportJobStatus,
+    UploadSessionCreate,
+    UploadSessionStatus,
+)
+from config.database import get_async_db, get_db, get_ogr_pg_dsn
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from fastapi import HTTPException
-from sqlalchemy import text
 from fastapi.responses import StreamingResponse
-from io import StringIO
+from typing import Optional
+from typing import Literal
+from api.dependencies import spatial_filter
+from crud.layer_export import (
+    EXPORT_MEDIA_TYPES,
+    csv_query,
+    describe_layer,
+    flatgeobuf_query,
+    ndjson_query,
+    stream_copy_csv,
+    stream_flatgeobuf,
+    stream_ndjson,
+)
+from crud.layer_catalog import catalog_listing
+from crud.layers import list_layer_tables, normalize_layer_name
+from crud.spatial import SpatialFilter
 
 router = APIRouter()
 
 
-@router.post("/file_upload", response_model=FileUploadResponse)
-async def upload_gis_file(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-):
-    try:
-        # Get the raw database URL string from the session
-        db_url = db.get_bind().engine.url.render_as_string(hide_password=False)
+def _upload_response(job) -> FileUploadResponse:
+    deduplicated = job.result.get("deduplicated", False)
+    return FileUploadResponse(
+        message=(
+            "Identical GIS file was already imported; reusing its layer."
+            if deduplicated
+            else "GIS file uploaded and queued for import."
+        ),
+        table_name=job.result["table_name"],
+        job_id=job.job_id,
+        deduplicated=deduplicated,
+    )
+
+
+def _queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many imports in progress, retry later",
+        headers={"Retry-After": "30"},
+    )
+
+
+# The body is read from the request stream, so describe the form by hand
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["file"],
+                "properties": {"file": {"type": "string", "format": "binary"}},
+            }
+        }
+    },
+}
+
 
-        # Pass the DB URL instead of the session
-        table_name = handle_gis_file(file, db_url)
+@router.post(
+    "/file_upload",
+    response_model=FileUploadResponse,
+    openapi_extra={"requestBody": UPLOAD_REQUEST_BODY},
+)
+async def upload_gis_file(request: Request):
+    """
+    Upload a GIS file as the ``file`` field of a multipart form and queue its
+    import. The file is written to disk as it arrives and the upload is cut
+    off with 413 once it passes GIS_UPLOAD_MAX_BYTES.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413, detail=f"Upload exceeds the {MAX_UPLOAD_BYTES} byte limit"
+        )
+    # Refuse before receiving anything when the import could not be queued anyway
+    if not import_queue.has_capacity():
+        raise _queue_full()
+
+    try:
+        # ogr2ogr connects on its own with a GDAL-style connection string,
+        # so the request needs no database session
+        dsn = get_ogr_pg_dsn()
 
-        return FileUploadResponse(
-            message="GIS file uploaded and processing started.",
-            table_name=table_name,
+        filename, filepath, size, checksum = await spool_multipart_upload(
+            request.stream(), request.headers.get("content-type", "")
         )
+        # The checksum lookup queries the catalog, so keep it off the event loop
+        job = await run_in_threadpool(queue_gis_import, filepath, filename, dsn, size, checksum)
+
+        return _upload_response(job)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except MultipartError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError:
+        raise _queue_full()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/file_upload/table_list/{table_name}")
-async def get_layer_data(table_name: str, db: Session = Depends(get_db)):
-    if table_name.startswith("public."):
-        table_name = table_name.replace("public.", "")
+def _session_status(session, offset: int) -> UploadSessionStatus:
+    return UploadSessionStatus(
+        upload_id=session.upload_id,
+        filename=session.filename,
+        size=session.size,
+        offset=offset,
+        expires_at=session.expires_at,
+    )
 
-    if not table_name.startswith("layer_"):
-        raise HTTPException(status_code=400, detail="Invalid table name")
 
-    def generate_data():
-        try:
-            query = text(f'SELECT * FROM public."{table_name}"')
-            result = db.execute(query)
-            columns = result.keys()
-            yield ",".join(columns) + "\n"  # Headers as the first line
-            for row in result.fetchall():
-                yield ",".join(map(str, row)) + "\n"  # Rows as CSV format
-        except Exception as e:
+def _load_session(upload_id: str):
+    try:
+        return upload_sessions.load_session(upload_id)
+    except UploadSessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _parse_content_range(value: str) -> int:
+    # "bytes <start>-<end>/<total>"; only the start is needed to append
+    try:
+        unit, _, byte_range = value.partition(" ")
+        start = int(byte_range.split("-", 1)[0])
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid Content-Range '{value}'")
+    if unit != "bytes" or start < 0:
+        raise HTTPException(status_code=400, detail=f"Invalid Content-Range '{value}'")
+    return start
+
+
+@router.post("/file_upload/sessions", response_model=UploadSessionStatus, status_code=201)
+async def create_upload_session(body: UploadSessionCreate):
+    """
+    Start a resumable upload. Send the file with PUT requests of consecutive
+    byte ranges, then POST to ``/finalize`` to import it.
+    """
+    try:
+        session = await run_in_threadpool(
+            upload_sessions.create_session, body.filename, body.size, body.checksum
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return _session_status(session, 0)
+
+
+@router.get("/file_upload/sessions/{upload_id}", response_model=UploadSessionStatus)
+async def get_upload_session(upload_id: str, response: Response):
+    """Report how many bytes were received, i.e. where to resume after a dropped connection."""
+    session = _load_session(upload_id)
+    offset = upload_sessions.current_offset(session)
+    response.headers["Upload-Offset"] = str(offset)
+    return _session_status(session, offset)
+
+
+@router.put("/file_upload/sessions/{upload_id}", response_model=UploadSessionStatus)
+async def upload_session_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    offset: Optional[int] = Query(
+        None, ge=0, description="Byte offset of this chunk; alternatively send Content-Range"
+    ),
+):
+    """
+    Append the raw request body at ``offset``, which must equal the current
+    offset of the upload. A mismatch is answered with 409 and the offset to
+    resume from in the ``Upload-Offset`` header. Bytes received before a
+    dropped connection are kept.
+    """
+    session = _load_session(upload_id)
+    if offset is None:
+        content_range = request.headers.get("content-range")
+        if content_range is None:
             raise HTTPException(
-                status_code=500, detail=f"Error reading table '{table_name}': {e}"
+                status_code=400, detail="Send the chunk offset as ?offset= or Content-Range"
             )
+        offset = _parse_content_range(content_range)
+
+    try:
+        writer = await run_in_threadpool(ChunkWriter, session, offset)
+    except OffsetMismatchError as e:
+        raise HTTPException(
+            status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)}
+        )
+    except SessionBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    try:
+        buffer = bytearray()
+        async for chunk in request.stream():
+            buffer += chunk
+            if len(buffer) >= CHUNK_BYTES:
+                await run_in_threadpool(writer.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(writer.write, bytes(buffer))
+    except ClientDisconnect:
+        # Everything written so far stays; the client resumes from the new offset
+        pass
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    finally:
+        await run_in_threadpool(writer.close)
+
+    response.headers["Upload-Offset"] = str(writer.offset)
+    return _session_status(session, writer.offset)
+
+
+@router.post("/file_upload/sessions/{upload_id}/finalize", response_model=FileUploadResponse)
+async def finalize_upload_session(upload_id: str):
+    """Check the assembled file and queue its import like a regular upload."""
+    try:
+        dsn = get_ogr_pg_dsn()
+        # Hashing the staged file reads it in full, so keep it off the event loop
+        job = await run_in_threadpool(upload_sessions.finalize_session, upload_id, dsn)
+    except UploadSessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (IncompleteUploadError, SessionBusyError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ChecksumMismatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except QueueFullError:
+        raise _queue_full()
+    return _upload_response(job)
+
+
+@router.delete("/file_upload/sessions/{upload_id}", status_code=204)
+async def delete_upload_session(upload_id: str):
+    _load_session(upload_id)
+    await run_in_threadpool(upload_sessions.delete_session, upload_id)
+    return Response(status_code=204)
+
+
+@router.get("/file_upload/jobs/{job_id}", response_model=ImportJobStatus)
+async def get_import_job(job_id: str):
+    job = import_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Import job '{job_id}' not found")
+
+    queue_wait = job.queue_wait_seconds
+    if job.state == QUEUED:
+        queue_wait = time.time() - job.created_at
+    return ImportJobStatus(
+        job_id=job.job_id,
+        state=job.state,
+        table_name=job.result["table_name"],
+        filename=job.result.get("filename"),
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        queue_wait_seconds=queue_wait,
+        run_seconds=job.run_seconds,
+        feature_count=job.result.get("feature_count"),
+        checksum=job.result.get("checksum"),
+        size_bytes=job.result.get("size_bytes"),
+        deduplicated=job.result.get("deduplicated", False),
+        error=job.error,
+        stderr=job.result.get("stderr"),
+    )
+
+
+@router.get("/file_upload/table_list/{table_name}")
+async def get_layer_data(
+    table_name: str,
+    output_format: Literal["csv", "ndjson", "fgb"] = Query(
+        "csv",
+        alias="format",
+        description="csv, ndjson (one GeoJSON Feature per line) or fgb (FlatGeobuf)",
+    ),
+    geometry: Literal["wkt", "lonlat"] = Query(
+        "wkt", description="CSV geometry encoding: a wkt column or lon/lat columns"
+    ),
+    spatial: Optional[SpatialFilter] = Depends(spatial_filter),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Export an imported layer, streamed with bounded memory.
+
+    CSV is produced by ``COPY ... TO STDOUT``, NDJSON from a server-side
+    cursor; coordinates of both are EPSG:4326. FlatGeobuf keeps the layer's
+    own SRID.
+    """
+    try:
+        table_name = normalize_layer_name(table_name)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid table name")
+
+    layer = await db.run_sync(describe_layer, table_name)
+    if layer is None:
+        raise HTTPException(status_code=404, detail=f"Layer '{table_name}' not found")
+    if layer.geometry_column is None and (spatial is not None or output_format != "csv"):
+        raise HTTPException(
+            status_code=400, detail=f"Layer '{table_name}' has no geometry column"
+        )
+
+    if output_format == "ndjson":
+        chunks = stream_ndjson(db.bind, ndjson_query(layer, spatial))
+    elif output_format == "fgb":
+        chunks = stream_flatgeobuf(db.bind, flatgeobuf_query(layer, spatial))
+    else:
+        chunks = stream_copy_csv(db.bind, csv_query(layer, spatial, geometry))
+
+    # Pull the first chunk here so query errors still map to a 500
+    try:
+        first_chunk = await anext(chunks, b"")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error reading table '{table_name}': {e}"
+        )
 
-    return StreamingResponse(generate_data(), media_type="text/csv")
+    async def generate_data():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(
+        generate_data(),
+        media_type=EXPORT_MEDIA_TYPES[output_format],
+        headers={"Content-Disposition": f'attachment; filename="{table_name}.{output_format}"'},
+    )
 
 
 @router.get("/file_upload/all_tables")
 def list_gis_layers(db: Session = Depends(get_db)):
-    ##wrapping RAW SQL with text import.
-    query = text(
-        """
-        SELECT table_name
-        FROM information_schema.tables
-        WHERE table_schema = 'public'
-        AND table_name LIKE 'layer_%'
+    """Names of the imported layer tables; see /file_upload/layers for details."""
+    return list_layer_tables(db)
+
+
+@router.get("/file_upload/layers")
+def list_gis_layer_catalog(db: Session = Depends(get_db)):
     """
-    )
-    result = db.execute(query).fetchall()
-    return [row[0] for row in result]
+    Every imported layer with its catalog metadata: source filename, geometry
+    type and SRID, feature count, EPSG:4326 bbox, on-disk size, columns,
+    import duration and checksum. Served from an in-process cache.
+    """
+    return Response(content=catalog_listing(db), media_type="application/json")
@@ -1,12 +1,30 @@
 # api/endpoints/shapes.py
-from fastapi import APIRouter, Depends
+import itertools
+import json
+import time
+from typing import AsyncIterator, Iterator, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from psycopg2 import Error as PsycopgError
 from geoalchemy2.shape import from_shape
-from shapely import wkt
 from shapely.geometry import Point
 from models import models
 from config.database import get_db
-from schemas.schemas import PointCreate
+from core.responses import dumps
+from schemas.schemas import PointBulkResponse, PointCreate
+from api.dependencies import spatial_filter
+from crud.spatial import SpatialFilter
+from crud.points import (
+    InvalidPointError,
+    PointRow,
+    copy_points_batch,
+    fetch_points_page,
+    iter_point_batches,
+    parse_point,
+)
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
 from fastapi.logger import logger
@@ -14,17 +32,19 @@ from fastapi.logger import logger
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPES = {
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/geo+json-seq",
+}
+
 
 @router.post("/point")
 def create_shape(shape: PointCreate, db: Session = Depends(get_db)):
     try:
-        if not shape.location.coordinates or len(shape.location.coordinates) != 2:
-            logger.error("Location coordinates are missing")
-            raise HTTPException(
-                status_code=400,
-                detail="Coordinates must contain exactly two values (longitude and latitude).",
-            )
-        lon, lat = shape.location.coordinates
+        # The schema already requires both longitude and latitude
+        lon, lat = shape.location.coordinates.as_tuple()
         geom = Point(lon, lat)
         db_shape = models.Point(
             location_point=from_shape(geom, srid=4326), description=shape.description
@@ -44,20 +64,181 @@ def create_shape(shape: PointCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
 
+async def _iter_point_items(request: Request) -> AsyncIterator[dict]:
+    """Yield raw point objects from a FeatureCollection or an NDJSON stream."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if content_type in NDJSON_MEDIA_TYPES:
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                # RFC 8142 sequences prefix every record with an RS character
+                line = line.strip().lstrip(b"\x1e")
+                if line:
+                    yield json.loads(line)
+        pending = pending.strip().lstrip(b"\x1e")
+        if pending:
+            yield json.loads(pending)
+        return
+
+    payload = json.loads(await request.body())
+    if isinstance(payload, dict) and payload.get("type") == "FeatureCollection":
+        payload = payload.get("features") or []
+    if not isinstance(payload, list):
+        raise InvalidPointError("expected a GeoJSON FeatureCollection or a list of points")
+    for item in payload:
+        yield item
+
+
+def _insert_batch(db: Session, number: int, batch: List[PointRow]) -> tuple:
+    started = time.perf_counter()
+    ids = copy_points_batch(db, batch)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    return ids, {"batch": number, "count": len(batch), "elapsed_ms": elapsed_ms}
+
+
+@router.post("/point/bulk", response_model=PointBulkResponse)
+async def create_shapes_bulk(
+    request: Request,
+    batch_size: int = Query(
+        10000, ge=100, le=100000, description="Number of points written per COPY batch"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk insert points from a GeoJSON FeatureCollection or an NDJSON stream.
+
+    Each line (or feature) is either a GeoJSON Point Feature or the same body
+    accepted by ``POST /point``. Points are written with COPY in batches of
+    ``batch_size`` inside a single transaction, so either every point is stored
+    or none is.
+    """
+    started = time.perf_counter()
+    ids: List[int] = []
+    batches = []
+    batch: List[PointRow] = []
+    index = 0
+    try:
+        async for item in _iter_point_items(request):
+            index += 1
+            batch.append(parse_point(item))
+            if len(batch) >= batch_size:
+                batch_ids, timing = await run_in_threadpool(
+                    _insert_batch, db, len(batches) + 1, batch
+                )
+                ids.extend(batch_ids)
+                batches.append(timing)
+                batch = []
+        if batch:
+            batch_ids, timing = await run_in_threadpool(
+                _insert_batch, db, len(batches) + 1, batch
+            )
+            ids.extend(batch_ids)
+            batches.append(timing)
+        await run_in_threadpool(db.commit)
+    except (InvalidPointError, ValueError) as e:
+        await run_in_threadpool(db.rollback)
+        logger.error(f"Invalid point at position {index}: {e}")
+        raise HTTPException(
+            status_code=400, detail=f"Invalid point at position {index}: {e}"
+        )
+    except (SQLAlchemyError, PsycopgError) as e:
+        await run_in_threadpool(db.rollback)
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    logger.info(f"Bulk inserted {len(ids)} points in {len(batches)} batches")
+    return {
+        "status": "success",
+        "inserted": len(ids),
+        "ids": ids,
+        "batches": batches,
+        "elapsed_ms": elapsed_ms,
+    }
+
+
+def _point_to_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "location": {"type": "Point", "coordinates": [row.lon, row.lat]},
+        "description": row.description,
+    }
+
+
+def _point_to_feature(row) -> dict:
+    return {
+        "type": "Feature",
+        "id": row.id,
+        "geometry": {"type": "Point", "coordinates": [row.lon, row.lat]},
+        "properties": {"description": row.description},
+    }
+
+
+def _stream_points(first_batch, batches: Iterator, as_geojson: bool) -> Iterator[bytes]:
+    """Encode point batches into one chunk per batch of a JSON array or FeatureCollection."""
+    encode = _point_to_feature if as_geojson else _point_to_dict
+    yield b'{"type":"FeatureCollection","features":[' if as_geojson else b"["
+    separator = b""
+    for batch in itertools.chain([first_batch], batches):
+        chunk = b",".join(dumps(encode(row)) for row in batch)
+        yield separator + chunk
+        separator = b","
+    yield b"]}" if as_geojson else b"]"
+
+
 @router.get("/point/all")
-def get_shapes(db: Session = Depends(get_db)):
-    shapes = db.query(models.Point).all()
-    if not shapes:
-        raise HTTPException(status_code=404, detail="No shapes found")
-        logger.error("No shapes found in the database")
-    results = []
-    for shape in shapes:
-        geom = wkt.loads(db.scalar(shape.location_point.ST_AsText()))
-        results.append(
-            {
-                "id": shape.id,
-                "location": {"type": "Point", "coordinates": [geom.x, geom.y]},
-                "description": shape.description,
+def get_shapes(
+    response: Response,
+    after_id: Optional[int] = Query(
+        None, ge=0, description="Keyset cursor: only return points with a greater id"
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=10000, description="Page size. When omitted, every point is streamed"
+    ),
+    output_format: Literal["json", "geojson"] = Query(
+        "json",
+        alias="format",
+        description="Plain point list or a GeoJSON FeatureCollection",
+    ),
+    spatial: Optional[SpatialFilter] = Depends(spatial_filter),
+    db: Session = Depends(get_db),
+):
+    """
+    List points ordered by id.
+
+    With ``limit`` a single keyset page is returned and, when more rows may
+    follow, the cursor for the next page is sent in the ``X-Next-After-Id``
+    header. Without ``limit`` the whole table is streamed in chunks from a
+    server-side cursor, so memory use does not grow with the table.
+    ``bbox`` / ``intersects`` restrict the result to a viewport or geometry.
+    """
+    as_geojson = output_format == "geojson"
+
+    if limit is not None:
+        rows = fetch_points_page(db, after_id, limit, spatial)
+        if not rows and after_id is None and spatial is None:
+            logger.error("No shapes found in the database")
+            raise HTTPException(status_code=404, detail="No shapes found")
+        if len(rows) == limit:
+            response.headers["X-Next-After-Id"] = str(rows[-1].id)
+        if as_geojson:
+            return {
+                "type": "FeatureCollection",
+                "features": [_point_to_feature(row) for row in rows],
             }
-        )
-    return results
+        return [_point_to_dict(row) for row in rows]
+
+    batches = iter_point_batches(db, after_id, spatial)
+    first_batch = next(batches, None)
+    if first_batch is None:
+        if after_id is None and spatial is None:
+            logger.error("No shapes found in the database")
+            raise HTTPException(status_code=404, detail="No shapes found")
+        first_batch = []
+    return StreamingResponse(
+        _stream_points(first_batch, batches, as_geojson),
+        media_type="application/geo+json" if as_geojson else "application/json",
+    )
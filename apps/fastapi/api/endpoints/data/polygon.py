@@ -9,7 +9,6 @@ from models import models
 import logging
 
 # Initialize logger
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
@@ -1,62 +1,83 @@
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Path, status, Response
+import hashlib
+from typing import AsyncIterator, List, Literal, Optional, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from geoalchemy2.shape import to_shape
 from shapely.geometry import mapping
 import logging
 import traceback
-import json
-from sqlalchemy import text
 
-from config.database import get_db
+from api.dependencies import geometry_options, spatial_filter
+from config.database import get_async_db, get_db
+from core.compression import choose_encoding
+from core.responses import dumps
+from crud.spatial import DEFAULT_PRECISION, GeometryOptions, SpatialFilter
+from crud.feature_formats import (
+    FEATURE_MEDIA_TYPES,
+    PROPERTIES_MEDIA_TYPE,
+    binary_query,
+    flatgeobuf_query,
+    negotiate_format,
+    properties_query,
+    stream_binary,
+    stream_properties,
+)
+from crud.layer_export import stream_flatgeobuf
+from crud.project_features import (
+    PROJECT_FEATURE_COLUMNS,
+    FeatureNotFoundError,
+    VersionConflictError,
+    apply_feature_operations,
+    backfill_content_hashes,
+    bump_project_version,
+    get_project_version,
+    iter_feature_json_batches,
+    lock_project_version,
+    match_features,
+    prepare_features,
+    prepare_operations,
+    project_feature_rows,
+    project_properties_json,
+    read_feature_changes,
+    record_feature_changes,
+)
+from crud.feature_cache import (
+    MAX_ENTRY_BYTES,
+    collect_limited,
+    feature_collection_cache,
+    feature_render_flight,
+    gzip_variant,
+    invalidate_project_caches,
+    is_oversized,
+    mark_oversized,
+)
+from crud.tiles import (
+    project_tile_group,
+    project_tile_key,
+    render_project_tile,
+    tile_cache,
+    tile_in_range,
+)
 from models.project_feature import ProjectFeature
-from schemas.geojson import GeoJSONFeatureCollection, FeatureResponse, GeoJSONFeature
+from schemas.geojson import (
+    FeaturePatch,
+    FeaturePatchResponse,
+    FeatureResponse,
+    GeoJSONFeatureCollection,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger.setLevel(logging.INFO)
-
-def features_equal(db_feature: ProjectFeature, new_feature: GeoJSONFeature) -> bool:
-    """Compare a database feature with a new feature to check if they're equal."""
-    try:
-        # Convert database geometry to GeoJSON for comparison
-        db_geom = to_shape(db_feature.geometry)
-        db_geom_dict = shapely_mapping(db_geom)
-        
-        # Compare geometry type and coordinates
-        if db_geom_dict['type'] != new_feature.geometry.type:
-            return False
-            
-        # Compare coordinates (handle different precision levels)
-        if db_geom_dict['coordinates'] != new_feature.geometry.coordinates:
-            return False
-            
-        # Compare properties (excluding any internal fields)
-        db_props = {k: v for k, v in db_feature.properties.items() 
-                   if k not in ('created_at', 'updated_at')}
-        new_props = new_feature.properties.dict(exclude={"type"}, exclude_none=True)
-        
-        return db_props == new_props
-        
-    except Exception as e:
-        logger.warning(f"Error comparing features: {e}")
-        return False
-
-def find_matching_feature(feature: GeoJSONFeature, existing_features: List[ProjectFeature]) -> Optional[ProjectFeature]:
-    """Find a matching feature in the existing features list."""
-    for existing in existing_features:
-        if features_equal(existing, feature):
-            return existing
-    return None
-
 @router.put("/{project_id}/features", response_model=FeatureResponse)
 async def update_project_features(
     project_id: int = Path(..., description="The ID of the project"),
     feature_collection: GeoJSONFeatureCollection = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # Uncomment and implement when authentication is ready
     # current_user: dict = Depends(get_current_user)
 ):
@@ -68,117 +89,102 @@ async def update_project_features(
     logger.info(f"Received request to update features for project {project_id}")
     
     if not feature_collection or not feature_collection.features:
-        # If no features provided, delete all features for this project
-        deleted_count = db.query(ProjectFeature).filter(ProjectFeature.project_id == project_id).delete()
-        db.commit()
+        # If no features provided, delete all features for this project.
+        # The version row is locked first so concurrent writers serialize
+        locked_version = await lock_project_version(db, project_id)
+        deleted_ids = (await db.scalars(
+            delete(ProjectFeature)
+            .where(ProjectFeature.project_id == project_id)
+            .returning(ProjectFeature.id)
+        )).all()
+        deleted_count = len(deleted_ids)
+        if deleted_count:
+            version = await bump_project_version(db, project_id)
+            await record_feature_changes(db, project_id, version, deleted=deleted_ids)
+        else:
+            version = locked_version
+        await db.commit()
+        invalidate_project_caches(project_id)
         return {
             "status": "success", 
             "saved": 0, 
             "deleted": deleted_count, 
             "updated": 0, 
+            "version": version,
             "message": f"Deleted all {deleted_count} features for project {project_id}"
         }
     
     logger.info(f"Processing {len(feature_collection.features)} features")
     
     try:
-        # Start a transaction
-        db.begin()
-        logger.debug("Database transaction started")
-        
-        # Get existing features for this project
-        existing_features = db.query(ProjectFeature).filter(
-            ProjectFeature.project_id == project_id
-        ).all()
-        
+        # Parsing and hashing is CPU-bound, so keep it off the event loop
+        try:
+            prepared_features = await run_in_threadpool(
+                prepare_features, feature_collection.features
+            )
+        except ValueError as shape_error:
+            error_msg = str(shape_error)
+            logger.error(error_msg)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=error_msg
+            )
+
+        # Lock the version row before reading, so a concurrent PUT or PATCH
+        # cannot change the features between the diff and the write
+        locked_version = await lock_project_version(db, project_id)
+
+        # Only ids and content hashes are needed to diff; no geometry is decoded
+        existing_features = (await db.execute(
+            select(ProjectFeature.id, ProjectFeature.content_hash)
+            .where(ProjectFeature.project_id == project_id)
+        )).all()
+
         logger.info(f"Found {len(existing_features)} existing features for project {project_id}")
-        
-        new_features = []
-        processed_feature_ids = set()
-        
-        for idx, feature in enumerate(feature_collection.features, 1):
-            try:
-                logger.debug(f"Processing feature {idx}/{len(feature_collection.features)}")
-                
-                # Ensure properties exists and has a type
-                if not hasattr(feature, 'properties') or feature.properties is None:
-                    feature.properties = {}
-                
-                # Set default type if not provided
-                feature_type = getattr(feature.properties, 'type', None)
-                
-                # If type is not set, try to determine it from geometry type
-                if not feature_type and hasattr(feature.geometry, 'type'):
-                    feature_type = feature.geometry.type.lower()
-                    logger.info(f"Inferred feature type from geometry: {feature_type}")
-                
-                feature_type = feature_type or 'unknown'
-                
-                # Convert GeoJSON geometry to WKB
-                try:
-                    shapely_geom = shapely_shape(feature.geometry)
-                    wkb_geom = from_shape(shapely_geom, srid=4326)
-                except Exception as shape_error:
-                    error_msg = f"Error processing geometry for feature {idx}: {str(shape_error)}"
-                    logger.error(error_msg)
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=error_msg
-                    )
-                
-                # Create feature properties without 'type' since we store it separately
-                properties = feature.properties.dict(exclude={"type"}, exclude_none=True) if feature.properties else {}
-                
-                # Create a temporary feature for comparison
-                temp_feature = ProjectFeature(
-                    project_id=project_id,
-                    geometry=wkb_geom,
-                    type=feature_type,
-                    properties=properties
-                )
-                
-                # Check if this feature matches an existing one
-                matching_feature = find_matching_feature(feature, existing_features)
-                
-                if matching_feature:
-                    # Feature exists and is unchanged
-                    processed_feature_ids.add(matching_feature.id)
-                    logger.debug(f"Feature {idx} matches existing feature {matching_feature.id}")
-                else:
-                    # Feature is new or changed - add to new features list
-                    new_features.append(temp_feature)
-                    logger.debug(f"Feature {idx} is new or modified")
-                
-            except HTTPException:
-                db.rollback()
-                raise
-                
-            except Exception as e:
-                db.rollback()
-                error_msg = f"Error processing feature {idx}: {str(e)}"
-                logger.error(error_msg)
-                logger.error(traceback.format_exc())
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=error_msg
-                )
-        
-        # Find features to delete (those that weren't in the new collection)
-        features_to_delete = [f for f in existing_features if f.id not in processed_feature_ids]
+
+        missing_hashes = await backfill_content_hashes(
+            db, [f.id for f in existing_features if f.content_hash is None]
+        )
+        new_prepared, features_to_delete = match_features(
+            [
+                (f.id, f.content_hash or missing_hashes.get(f.id))
+                for f in existing_features
+            ],
+            prepared_features,
+        )
+        new_features = [prepared.to_model(project_id) for prepared in new_prepared]
         deleted_count = len(features_to_delete)
         
         # Perform database operations
         if features_to_delete:
-            feature_ids = [f.id for f in features_to_delete]
-            db.query(ProjectFeature).filter(ProjectFeature.id.in_(feature_ids)).delete(synchronize_session=False)
+            await db.execute(
+                delete(ProjectFeature).where(ProjectFeature.id.in_(features_to_delete))
+            )
             logger.info(f"Deleting {deleted_count} features that are no longer needed")
         
-        # Add new features
+        # Add new features (flushed now, so their ids can go to the change log)
         if new_features:
-            db.bulk_save_objects(new_features)
+            db.add_all(new_features)
+            await db.flush()
             logger.info(f"Adding {len(new_features)} new or modified features")
-        
-        db.commit()
+
+        if new_features or features_to_delete:
+            version = await bump_project_version(db, project_id)
+            # Changed features are stored as new rows, so the log has only
+            # additions and deletions for a PUT
+            await record_feature_changes(
+                db,
+                project_id,
+                version,
+                added=[f.id for f in new_features],
+                deleted=features_to_delete,
+            )
+        else:
+            version = locked_version
+
+        await db.commit()
+        if new_features or features_to_delete:
+            invalidate_project_caches(project_id)
         
         # Calculate statistics
         unchanged_count = len(existing_features) - deleted_count
@@ -189,6 +195,7 @@ async def update_project_features(
             "deleted": deleted_count,
             "unchanged": unchanged_count,
             "total": len(new_features) + unchanged_count,
+            "version": version,
             "message": (
                 f"Updated project {project_id} with {len(new_features)} features. "
                 f"Deleted {deleted_count} old features. "
@@ -197,10 +204,65 @@ async def update_project_features(
         }
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        error_msg = f"Unexpected error: {str(e)}"
+        logger.error(error_msg)
+        logger.error(traceback.format_exc())
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=error_msg
+        )
+
+
+@router.patch("/{project_id}/features", response_model=FeaturePatchResponse)
+async def patch_project_features(
+    patch: FeaturePatch,
+    project_id: int = Path(..., description="The ID of the project"),
+    db: AsyncSession = Depends(get_async_db),
+    # Uncomment and implement when authentication is ready
+    # current_user: dict = Depends(get_current_user)
+):
+    """
+    Apply a list of feature edits (add, replace, delete, update_properties)
+    in one transaction.
+
+    ``version`` is the project version the edits are based on (returned by
+    every write and in the ``X-Project-Version`` header of GET). If the project
+    has moved on since, nothing is applied and 409 carries the current version
+    in ``X-Project-Version``. Only the submitted features are validated and
+    only the rows they name are touched.
+    """
+    logger.info(f"Received {len(patch.operations)} operations for project {project_id}")
+
+    try:
+        prepared = await run_in_threadpool(prepare_operations, patch.operations)
+    except ValueError as shape_error:
+        logger.error(str(shape_error))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(shape_error))
+
+    try:
+        result = await apply_feature_operations(
+            db, project_id, patch.version, patch.operations, prepared
+        )
+        await db.commit()
+    except VersionConflictError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+            headers={"X-Project-Version": str(e.version)},
+        )
+    except FeatureNotFoundError as e:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        await db.rollback()
         error_msg = f"Unexpected error: {str(e)}"
         logger.error(error_msg)
         logger.error(traceback.format_exc())
@@ -209,6 +271,17 @@ async def update_project_features(
             detail=error_msg
         )
 
+    invalidate_project_caches(project_id)
+    return {
+        "status": "success",
+        "version": result.version,
+        "added": len(result.added_ids),
+        "replaced": result.replaced,
+        "deleted": result.deleted,
+        "updated": result.updated,
+        "added_ids": result.added_ids,
+    }
+
 
 def db_feature_to_geojson(feature: ProjectFeature) -> Optional[Dict[str, Any]]:
     """
@@ -273,66 +346,294 @@ def db_feature_to_geojson(feature: ProjectFeature) -> Optional[Dict[str, Any]]:
         return None
 
 
+async def prepend_chunk(first: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Re-attach a chunk pulled early (to surface query errors) to the rest of a stream."""
+    if first:
+        yield first
+    async for chunk in chunks:
+        yield chunk
+
+
+async def stream_feature_collection(
+    first_batch: List[str], batches: AsyncIterator[List[str]]
+) -> AsyncIterator[bytes]:
+    """Wrap pre-encoded Feature strings into a FeatureCollection, one chunk per batch."""
+    yield b'{"type":"FeatureCollection","features":['
+    separator = ""
+    if first_batch:
+        yield ",".join(first_batch).encode()
+        separator = ","
+    async for batch in batches:
+        if batch:
+            yield (separator + ",".join(batch)).encode()
+            separator = ","
+    yield b"]}"
+
+
+def round_coordinates(coordinates, precision: int):
+    """Round nested GeoJSON coordinate arrays to ``precision`` decimals."""
+    if isinstance(coordinates, (list, tuple)):
+        if coordinates and isinstance(coordinates[0], (int, float)):
+            return [round(c, precision) for c in coordinates]
+        return [round_coordinates(c, precision) for c in coordinates]
+    return coordinates
+
+
+def features_to_geojson_bytes(
+    db_features: List[ProjectFeature], precision: int = DEFAULT_PRECISION
+) -> bytes:
+    """Convert ORM rows with shapely and encode the FeatureCollection (fallback path)."""
+    features = []
+    for idx, db_feature in enumerate(db_features, 1):
+        try:
+            logger.debug(f"Processing feature {idx}/{len(db_features)}")
+            feature_json = db_feature_to_geojson(db_feature)
+            # Always rounded, also at DEFAULT_PRECISION, so the coordinates
+            # equal those ST_AsGeoJSON writes on the PostGIS path
+            if feature_json:
+                geometry_json = feature_json["geometry"]
+                if "coordinates" in geometry_json:
+                    geometry_json["coordinates"] = round_coordinates(
+                        geometry_json["coordinates"], precision
+                    )
+                else:  # GeometryCollection
+                    for member in geometry_json.get("geometries", []):
+                        member["coordinates"] = round_coordinates(
+                            member["coordinates"], precision
+                        )
+            if feature_json:
+                features.append(feature_json)
+            else:
+                logger.warning(f"Skipping feature {getattr(db_feature, 'id', 'unknown')} due to conversion error")
+        except Exception as e:
+            logger.error(f"Error processing feature {getattr(db_feature, 'id', 'unknown')}: {str(e)}")
+            logger.error(traceback.format_exc())
+            continue
+
+    result = {
+        "type": "FeatureCollection",
+        "features": features
+    }
+    return dumps(result)
+
+
+async def render_feature_collection(
+    db: AsyncSession,
+    project_id: int,
+    serializer: str,
+    spatial: Optional[SpatialFilter],
+    geometry: GeometryOptions,
+    key,
+) -> Optional[bytes]:
+    """
+    Encode a project's FeatureCollection and store it in the cache.
+
+    Returns None (and remembers the key) when the PostGIS-assembled body grows
+    beyond the cache's entry limit; the caller then streams it instead.
+    """
+    if serializer == "postgis":
+        batches = iter_feature_json_batches(db, project_id, spatial, geometry=geometry)
+        body = await collect_limited(stream_feature_collection([], batches))
+        if body is None:
+            await batches.aclose()
+            mark_oversized(key)
+            return None
+    else:
+        if geometry.tolerance:
+            # Rows carry the simplified geometry under the same attribute names
+            stmt = select(
+                ProjectFeature.id,
+                ProjectFeature.type,
+                ProjectFeature.properties,
+                geometry.simplify(ProjectFeature.geometry).label("geometry"),
+            )
+        else:
+            stmt = select(ProjectFeature)
+        stmt = stmt.where(ProjectFeature.project_id == project_id)
+        if spatial is not None:
+            stmt = stmt.where(spatial.clause(ProjectFeature.geometry))
+        result = await db.execute(stmt.order_by(ProjectFeature.id))
+        db_features = result.all() if geometry.tolerance else result.scalars().all()
+        logger.info(f"Found {len(db_features)} features for project {project_id}")
+        # shapely conversion and encoding are CPU-bound
+        body = await run_in_threadpool(features_to_geojson_bytes, db_features, geometry.precision)
+
+    if len(body) <= MAX_ENTRY_BYTES:
+        feature_collection_cache.set(key, body, group=project_id)
+    return body
+
+
+def project_etag(
+    project_id: int, version: int, request: Request, fmt: str = "geojson"
+) -> str:
+    """
+    Strong ETag for one representation of a project's features: the project
+    version plus a digest of the query string and negotiated format, since
+    filters, serializer options and the media type change the body.
+    """
+    params = sorted(f"{k}={v}" for k, v in request.query_params.multi_items())
+    if fmt != "geojson":
+        params.append(f"format={fmt}")
+    variant = hashlib.sha1("&".join(params).encode()).hexdigest()[:12]
+    return f'"{project_id}-{version}-{variant}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Weak comparison of If-None-Match against an ETag, as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+async def project_format_response(
+    request: Request,
+    db: AsyncSession,
+    project_id: int,
+    fmt: str,
+    spatial: Optional[SpatialFilter],
+    geometry: GeometryOptions,
+    headers: Dict[str, str],
+) -> StreamingResponse:
+    """Stream a project's features as FlatGeobuf, Arrow IPC or WKB frames."""
+    rows = project_feature_rows(project_id, spatial, geometry)
+    if fmt == "fgb":
+        chunks = stream_flatgeobuf(db.bind, flatgeobuf_query(rows, PROJECT_FEATURE_COLUMNS))
+    else:
+        chunks = stream_binary(
+            db.bind, fmt, binary_query(rows, PROJECT_FEATURE_COLUMNS), PROJECT_FEATURE_COLUMNS
+        )
+    if fmt == "wkb":
+        sidecar = request.url.replace(path=request.url.path + "/properties")
+        headers = {
+            **headers,
+            "Link": f'<{sidecar}>; rel="describedby"; type="{PROPERTIES_MEDIA_TYPE}"',
+        }
+    # Pull the first chunk here so query errors still map to a 500
+    first = await anext(chunks, b"")
+    return StreamingResponse(
+        prepend_chunk(first, chunks), media_type=FEATURE_MEDIA_TYPES[fmt], headers=headers
+    )
+
+
 @router.get("/{project_id}/features")
 async def get_project_features(
-    response: Response,
+    request: Request,
     project_id: int = Path(..., description="The ID of the project"),
-    db: Session = Depends(get_db),
+    serializer: Literal["postgis", "python"] = Query(
+        "postgis",
+        description=(
+            "postgis streams Feature JSON built by the database; "
+            "python converts ORM rows with shapely (fallback)"
+        ),
+    ),
+    spatial: Optional[SpatialFilter] = Depends(spatial_filter),
+    geometry: GeometryOptions = Depends(geometry_options),
+    db: AsyncSession = Depends(get_async_db),
     # Uncomment and implement when authentication is ready
     # current_user: dict = Depends(get_current_user)
 ):
     """
     Get all features for a specific project in GeoJSON format.
     
-    Returns a GeoJSON FeatureCollection containing all features for the project.
+    Returns a GeoJSON FeatureCollection containing all features for the project,
+    optionally restricted to those intersecting ``bbox`` and/or ``intersects``.
+    ``zoom`` (or ``tolerance``) simplifies geometries in PostGIS with
+    ST_SimplifyPreserveTopology and ``precision`` limits coordinate decimals;
+    each zoom level is cached as its own representation.
+
+    The ``Accept`` header selects the encoding: GeoJSON by default, or
+    ``application/flatgeobuf``, ``application/vnd.apache.arrow.stream``
+    (GeoArrow WKB geometry column) or ``application/vnd.outbreakx.wkb-stream``
+    (length-prefixed WKB, with the properties in the sidecar named by the
+    ``Link`` header). Binary formats are streamed, not cached, and always
+    carry full-precision coordinates.
+    By default the Feature JSON is produced by PostgreSQL and streamed in
+    chunks; ``serializer=python`` keeps the original ORM/shapely conversion.
+    Both produce the same members in the same order, sorted by feature id.
+
+    The response carries an ETag derived from the project version; a matching
+    ``If-None-Match`` is answered with 304 after a single primary-key lookup,
+    without reading ``project_features``. Encoded bodies (and their gzip
+    encoding) are cached per project and version until the next write, and
+    concurrent misses for the same representation share one query.
     """
+    fmt = negotiate_format(request.headers.get("accept"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Supported media types: {', '.join(FEATURE_MEDIA_TYPES.values())}"
+        )
+
     try:
         logger.info(f"Fetching features for project {project_id}")
         
-        # First, verify the database connection
+        # The version lookup doubles as the database connection check
         try:
-            db.execute(text("SELECT 1"))
-            logger.debug("Database connection successful")
+            version = await get_project_version(db, project_id)
         except Exception as db_error:
             logger.error(f"Database connection error: {str(db_error)}")
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Could not connect to the database"
             )
-        
+
+        etag = project_etag(project_id, version, request, fmt)
+        cache_headers = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept",
+            # The base version for PATCH /{project_id}/features
+            "X-Project-Version": str(version),
+        }
+        if etag_matches(etag, request.headers.get("if-none-match")):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
         # Query all features for the project
         try:
-            db_features = db.query(ProjectFeature).filter(
-                ProjectFeature.project_id == project_id
-            ).all()
-            
-            logger.info(f"Found {len(db_features)} features for project {project_id}")
-            
-            # Convert database features to GeoJSON features
-            features = []
-            for idx, db_feature in enumerate(db_features, 1):
-                try:
-                    logger.debug(f"Processing feature {idx}/{len(db_features)}")
-                    feature_json = db_feature_to_geojson(db_feature)
-                    if feature_json:
-                        features.append(feature_json)
-                    else:
-                        logger.warning(f"Skipping feature {getattr(db_feature, 'id', 'unknown')} due to conversion error")
-                except Exception as e:
-                    logger.error(f"Error processing feature {getattr(db_feature, 'id', 'unknown')}: {str(e)}")
-                    logger.error(traceback.format_exc())
-                    continue
-            
-            # Create and return GeoJSON FeatureCollection
-            result = {
-                "type": "FeatureCollection",
-                "features": features
-            }
-            
-            # Set response headers
-            response.headers["Content-Type"] = "application/geo+json"
-            return result
-            
+            if fmt != "geojson":
+                return await project_format_response(
+                    request, db, project_id, fmt, spatial, geometry, cache_headers
+                )
+
+            key = (project_id, version, etag)
+            body = None
+            cache_status = "BYPASS"
+            if not is_oversized(key):
+                body = feature_collection_cache.get(key)
+                cache_status = "HIT"
+                if body is None:
+                    cache_status = "MISS"
+                    body = await feature_render_flight.run(
+                        key,
+                        lambda: render_feature_collection(
+                            db, project_id, serializer, spatial, geometry, key
+                        ),
+                    )
+
+            if body is None:
+                # Too large to buffer: stream straight from the database
+                batches = iter_feature_json_batches(
+                    db, project_id, spatial, geometry=geometry
+                )
+                # Pull the first batch here so query errors still map to a 500
+                first_batch = await anext(batches, [])
+                return StreamingResponse(
+                    stream_feature_collection(first_batch, batches),
+                    media_type="application/geo+json",
+                    headers={**cache_headers, "X-Cache": "BYPASS"},
+                )
+
+            headers = {**cache_headers, "X-Cache": cache_status, "Vary": "Accept, Accept-Encoding"}
+            # Negotiated like CompressionMiddleware, which compresses the
+            # body itself when another coding (or identity) is preferred
+            if choose_encoding(request.headers.get("accept-encoding", "")) == "gzip":
+                compressed = await run_in_threadpool(gzip_variant, key, body, project_id)
+                if compressed is not None:
+                    headers["Content-Encoding"] = "gzip"
+                    body = compressed
+            return Response(content=body, media_type="application/geo+json", headers=headers)
+
         except Exception as query_error:
             logger.error(f"Database query error: {str(query_error)}")
             logger.error(traceback.format_exc())
@@ -351,3 +652,127 @@ async def get_project_features(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=error_msg
         )
+
+
+@router.get("/{project_id}/features/properties")
+async def get_project_feature_properties(
+    request: Request,
+    project_id: int = Path(..., description="The ID of the project"),
+    spatial: Optional[SpatialFilter] = Depends(spatial_filter),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Properties sidecar of the WKB feature stream: one ``{"id", "properties"}``
+    JSON object per line, in the same order and with the same filters. The
+    ETag starts with the same project version as the geometry response, so
+    clients can check that both halves match.
+    """
+    try:
+        version = await get_project_version(db, project_id)
+        etag = project_etag(project_id, version, request, "properties")
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(etag, request.headers.get("if-none-match")):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        rows = project_feature_rows(project_id, spatial).subquery("q")
+        chunks = stream_properties(db.bind, properties_query(rows, project_properties_json(rows)))
+        first = await anext(chunks, b"")
+        return StreamingResponse(
+            prepend_chunk(first, chunks), media_type=PROPERTIES_MEDIA_TYPE, headers=headers
+        )
+    except Exception as e:
+        logger.error(f"Error reading feature properties for project {project_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error querying features from database"
+        )
+
+
+@router.get("/{project_id}/features/changes")
+async def get_project_feature_changes(
+    project_id: int = Path(..., description="The ID of the project"),
+    since: int = Query(..., ge=0, description="Project version the client's copy is at"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Features added, modified or deleted since version ``since``, read from
+    the append-only change log that PUT and PATCH write:
+
+    ``{"project_id", "since", "version", "resync", "added": [Feature],
+    "modified": [Feature], "deleted": [id]}``
+
+    Features carry their current state. ``version`` is the version to pass as
+    ``since`` next time; applying a response twice is harmless. When the log
+    has been compacted past ``since``, ``resync`` is true and the client must
+    fetch the full collection from GET /{project_id}/features.
+    """
+    try:
+        changes, features = await read_feature_changes(db, project_id, since)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reading feature changes for project {project_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error querying features from database"
+        )
+
+    # Features are JSON already encoded by PostgreSQL; splice them in
+    def encoded(feature_ids: List[int]) -> bytes:
+        return ",".join(features[i] for i in feature_ids if i in features).encode()
+
+    head = dumps({
+        "project_id": project_id,
+        "since": since,
+        "version": changes.version,
+        "resync": changes.resync,
+    })
+    body = b"".join([
+        head[:-1],
+        b',"added":[', encoded(changes.added),
+        b'],"modified":[', encoded(changes.modified),
+        b'],"deleted":', dumps(changes.deleted),
+        b"}",
+    ])
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"X-Project-Version": str(changes.version), "Cache-Control": "no-cache"},
+    )
+
+
+@router.get("/{project_id}/tiles/{z}/{x}/{y}.pbf")
+def get_project_tile(
+    project_id: int = Path(..., description="The ID of the project"),
+    z: int = Path(..., description="Zoom level"),
+    x: int = Path(..., description="Tile column"),
+    y: int = Path(..., description="Tile row"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a Mapbox Vector Tile of the project's features.
+
+    Tiles are built in PostGIS and cached per project version.
+    Empty tiles are answered with 204 No Content.
+    """
+    if not tile_in_range(z, x, y):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tile {z}/{x}/{y} is out of range"
+        )
+
+    key = project_tile_key(db, project_id, z, x, y)
+    tile = tile_cache.get(key)
+    cache_status = "HIT"
+    if tile is None:
+        cache_status = "MISS"
+        tile = render_project_tile(db, project_id, z, x, y)
+        tile_cache.set(key, tile, group=project_tile_group(project_id))
+
+    if not tile:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers={"X-Cache": cache_status})
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"X-Cache": cache_status},
+    )
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Response, status
+
+from config.database import created_engines
+from core.db_monitor import db_monitor, pool_stats
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def liveness():
+    """The process is up and serving requests; never touches the database."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness(response: Response):
+    """
+    Ready when the background monitor's latest probe succeeded recently.
+    Answered from cached state, so a slow database cannot stall this check.
+    """
+    if not db_monitor.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ready" if db_monitor.ready else "unavailable",
+        **db_monitor.status(),
+    }
+
+
+@router.get("/pool")
+async def pool_health():
+    """
+    Connection pool counters of the engines created so far (null for an
+    engine not used yet, which this check never creates) and the latest
+    probe latency.
+    """
+    engines = created_engines()
+    return {
+        "sync_pool": pool_stats(engines["sync"]) if "sync" in engines else None,
+        "async_pool": pool_stats(engines["async"]) if "async" in engines else None,
+        "monitor": db_monitor.status(),
+    }
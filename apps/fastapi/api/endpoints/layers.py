@@ -0,0 +1,234 @@
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from api.dependencies import geometry_options, spatial_filter
+from config.database import get_async_db, get_db
+from crud.layer_catalog import get_catalog_entry
+from crud.feature_formats import (
+    FEATURE_MEDIA_TYPES,
+    PROPERTIES_MEDIA_TYPE,
+    binary_query,
+    encode_rows,
+    flatgeobuf_query,
+    negotiate_format,
+    properties_query,
+)
+from crud.layer_export import LayerDescription, describe_layer
+from crud.layer_query import (
+    features_page_query,
+    features_page_rows,
+    parse_attribute_filters,
+    parse_projection,
+    properties_json,
+)
+from crud.layers import get_layer_columns, get_layer_geometry, normalize_layer_name
+from crud.spatial import GeometryOptions, SpatialFilter
+from crud.tiles import render_layer_tile, tile_cache, tile_in_range
+
+router = APIRouter()
+
+
+def _layer_table(table_name: str) -> str:
+    try:
+        return normalize_layer_name(table_name)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/{table_name}")
+def get_layer_metadata(
+    table_name: str = Path(..., description="Imported layer table, e.g. layer_1a2b3c4d"),
+    db: Session = Depends(get_db),
+):
+    """Catalog metadata of one imported layer (extent, feature count, columns, ...)."""
+    table_name = _layer_table(table_name)
+    entry = get_catalog_entry(db, table_name)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Layer '{table_name}' not found",
+        )
+    return entry
+
+
+async def _layer_page(
+    request: Request, db: AsyncSession, table_name: str, properties: Optional[str]
+) -> Tuple[LayerDescription, List[str], list]:
+    """Validate a paged layer query: the layer, its selected columns and attribute filters."""
+    layer = await db.run_sync(describe_layer, table_name)
+    if layer is None or layer.geometry_column is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Layer '{table_name}' not found or has no geometry",
+        )
+    if layer.primary_key is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Layer '{table_name}' has no single-column primary key to page on",
+        )
+
+    try:
+        conditions = parse_attribute_filters(request.query_params.multi_items(), layer)
+        columns = parse_projection(properties, layer)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return layer, columns, conditions
+
+
+@router.get("/{table_name}/features")
+async def get_layer_features(
+    request: Request,
+    table_name: str = Path(..., description="Imported layer table, e.g. layer_1a2b3c4d"),
+    limit: int = Query(1000, ge=1, le=10000, description="Page size"),
+    after: Optional[int] = Query(
+        None, description="Return features whose id is greater than this (keyset cursor)"
+    ),
+    properties: Optional[str] = Query(
+        None, description="Comma-separated columns to return; all columns by default"
+    ),
+    spatial: Optional[SpatialFilter] = Depends(spatial_filter),
+    geometry: GeometryOptions = Depends(geometry_options),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Query an imported layer as a GeoJSON FeatureCollection, one keyset page at a time.
+
+    ``zoom`` (or ``tolerance``) simplifies geometries and ``precision`` limits
+    coordinate decimals, as for project features. Every other query parameter
+    besides ``limit``, ``after``, ``properties``, ``bbox`` and ``intersects``
+    filters on an attribute column:
+    ``<column>=<value>`` for equality or ``<column>__<op>=<value>`` with op
+    one of ``ne``, ``gt``, ``gte``, ``lt``, ``lte`` and ``in`` (comma-separated
+    values). Columns and values are validated against the layer's schema.
+    When more features follow, the cursor for the next page is sent in the
+    ``X-Next-After-Id`` header.
+
+    As for project features, the ``Accept`` header can ask for FlatGeobuf,
+    Arrow IPC or WKB frames (properties via ``/features/properties``)
+    instead of GeoJSON.
+    """
+    fmt = negotiate_format(request.headers.get("accept"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Supported media types: {', '.join(FEATURE_MEDIA_TYPES.values())}",
+        )
+    table_name = _layer_table(table_name)
+    layer, columns, conditions = await _layer_page(request, db, table_name, properties)
+    headers = {"Vary": "Accept"}
+
+    if fmt == "geojson":
+        query = features_page_query(
+            layer, columns, conditions, spatial, after, limit, geometry
+        )
+        rows = (await db.execute(query)).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-After-Id"] = str(rows[-1][0])
+        body = '{"type":"FeatureCollection","features":[' + ",".join(row[1] for row in rows) + "]}"
+        return Response(content=body, media_type=FEATURE_MEDIA_TYPES[fmt], headers=headers)
+
+    page_rows = features_page_rows(layer, columns, conditions, spatial, after, limit, geometry)
+    attributes = [(name, layer.column_types[name]) for name in columns]
+    if fmt == "fgb":
+        data, last_pk, count = (
+            await db.execute(flatgeobuf_query(page_rows, attributes, limit))
+        ).one()
+        body = data or b""
+        if count > limit:
+            headers["X-Next-After-Id"] = str(last_pk)
+    else:
+        rows = (await db.execute(binary_query(page_rows, attributes))).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-After-Id"] = str(rows[-1][0])
+        body = encode_rows(fmt, attributes, rows)
+        if fmt == "wkb":
+            sidecar = request.url.replace(path=request.url.path + "/properties")
+            headers["Link"] = f'<{sidecar}>; rel="describedby"; type="{PROPERTIES_MEDIA_TYPE}"'
+    return Response(content=body, media_type=FEATURE_MEDIA_TYPES[fmt], headers=headers)
+
+
+@router.get("/{table_name}/features/properties")
+async def get_layer_feature_properties(
+    request: Request,
+    table_name: str = Path(..., description="Imported layer table, e.g. layer_1a2b3c4d"),
+    limit: int = Query(1000, ge=1, le=10000, description="Page size"),
+    after: Optional[int] = Query(
+        None, description="Return features whose id is greater than this (keyset cursor)"
+    ),
+    properties: Optional[str] = Query(
+        None, description="Comma-separated columns to return; all columns by default"
+    ),
+    spatial: Optional[SpatialFilter] = Depends(spatial_filter),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Properties sidecar of a WKB page: one ``{"id", "properties"}`` JSON object
+    per line, for the same parameters and in the same order as
+    ``/features``.
+    """
+    table_name = _layer_table(table_name)
+    layer, columns, conditions = await _layer_page(request, db, table_name, properties)
+    page_rows = features_page_rows(
+        layer, columns, conditions, spatial, after, limit
+    ).subquery("q")
+    rows = (await db.execute(properties_query(page_rows, properties_json(page_rows, columns)))).all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-After-Id"] = str(rows[-1][0])
+    body = "".join(row[1] + "\n" for row in rows)
+    return Response(content=body, media_type=PROPERTIES_MEDIA_TYPE, headers=headers)
+
+
+@router.get("/{table_name}/tiles/{z}/{x}/{y}.pbf")
+def get_layer_tile(
+    table_name: str = Path(..., description="Imported layer table, e.g. layer_1a2b3c4d"),
+    z: int = Path(..., description="Zoom level"),
+    x: int = Path(..., description="Tile column"),
+    y: int = Path(..., description="Tile row"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a Mapbox Vector Tile of an imported layer.
+
+    Every non-geometry column is exposed as a tile attribute. Empty tiles are
+    answered with 204 No Content.
+    """
+    table_name = _layer_table(table_name)
+    if not tile_in_range(z, x, y):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tile {z}/{x}/{y} is out of range",
+        )
+
+    key = ("layer", table_name, z, x, y)
+    tile = tile_cache.get(key)
+    cache_status = "HIT"
+    if tile is None:
+        cache_status = "MISS"
+        geometry = get_layer_geometry(db, table_name)
+        if geometry is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Layer '{table_name}' not found or has no geometry",
+            )
+        geometry_column, srid = geometry
+        columns = [
+            name for name, _ in get_layer_columns(db, table_name) if name != geometry_column
+        ]
+        tile = render_layer_tile(db, table_name, geometry_column, srid, columns, z, x, y)
+        tile_cache.set(key, tile, group=("layer", table_name))
+
+    if not tile:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers={"X-Cache": cache_status})
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"X-Cache": cache_status},
+    )
@@ -6,6 +6,8 @@ from api.endpoints.data import polygon
 from api.endpoints.data import p2p_routes
 from api.endpoints.data import circle
 from api.endpoints import features
+from api.endpoints import layers
+from api.endpoints import health
 
 
 router = APIRouter()
@@ -19,5 +21,11 @@ router.include_router(circle.router, tags=["CIRCLE"])
 # project features endpoints
 router.include_router(features.router, prefix="/projects", tags=["PROJECT FEATURES"])
 
+# imported layer endpoints
+router.include_router(layers.router, prefix="/layers", tags=["LAYERS"])
+
 # file upload endpoints
 router.include_router(file_upload.router, tags=["FILE UPLOAD ENPOINTS"])
+
+# health endpoints
+router.include_router(health.router, prefix="/health", tags=["HEALTH"])
@@ -0,0 +1,75 @@
+"""
+Size and encode time of GET /api/v1/projects/{project_id}/features per Accept format.
+
+Requires DATABASE_URL to point at a PostGIS database with the application
+schema. A synthetic project is seeded, measured and removed again:
+
+    python -m benchmarks.bench_feature_formats --features 100000 --runs 5
+"""
+import argparse
+import gzip
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+
+from benchmarks.bench_project_features import cleanup, seed
+from crud.feature_cache import feature_collection_cache
+from crud.feature_formats import FEATURE_MEDIA_TYPES
+from main import app
+
+
+def measure(client: TestClient, url: str, media_type: str, runs: int):
+    """Return (latencies in ms, body of the last run)."""
+    latencies, body = [], b""
+    for _ in range(runs):
+        # Time the encoding, not the GeoJSON response cache
+        feature_collection_cache.clear()
+        started = time.perf_counter()
+        response = client.get(url, headers={"Accept": media_type, "Accept-Encoding": "identity"})
+        response.raise_for_status()
+        body = response.content
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--features", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--project-id", type=int, default=990_018)
+    parser.add_argument("--zoom", type=int, default=None, help="Also simplify for this zoom")
+    args = parser.parse_args()
+
+    print(f"Seeding project {args.project_id} with {args.features} features...")
+    seed(args.project_id, args.features)
+    try:
+        client = TestClient(app)
+        url = f"/api/v1/projects/{args.project_id}/features"
+        if args.zoom is not None:
+            url += f"?zoom={args.zoom}"
+        baseline = None
+        for fmt, media_type in FEATURE_MEDIA_TYPES.items():
+            latencies, body = measure(client, url, media_type, args.runs)
+            size = len(body)
+            baseline = baseline or size
+            print(
+                f"{fmt:>8}: median {statistics.median(latencies):9.1f} ms  "
+                f"min {min(latencies):9.1f} ms  body {size / 2**20:8.2f} MiB "
+                f"({size / baseline:6.1%} of GeoJSON)  "
+                f"gzip {len(gzip.compress(body, 6)) / 2**20:8.2f} MiB"
+            )
+
+        # WKB frames carry geometry only; the properties travel in the sidecar
+        sidecar = client.get(f"/api/v1/projects/{args.project_id}/features/properties")
+        sidecar.raise_for_status()
+        print(
+            f"wkb properties sidecar: body {len(sidecar.content) / 2**20:8.2f} MiB  "
+            f"gzip {len(gzip.compress(sidecar.content, 6)) / 2**20:8.2f} MiB"
+        )
+    finally:
+        cleanup(args.project_id)
+
+
+if __name__ == "__main__":
+    main()
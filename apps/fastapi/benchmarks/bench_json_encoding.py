@@ -0,0 +1,85 @@
+"""
+Encode time and bytes on the wire of a FeatureCollection as built by
+GET /api/v1/projects/{project_id}/features?serializer=python.
+
+Runs without a database: synthetic features are converted with shapely as
+the endpoint does, then encoded with the stdlib (before), FastAPI's
+jsonable_encoder + stdlib (plain dict return values) and orjson (now), and
+compressed as the compression middleware would:
+
+    python -m benchmarks.bench_json_encoding --features 20000 --vertices 64
+"""
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+from shapely.geometry import Point, mapping
+
+from core.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from core.responses import dumps
+
+
+def feature_collection(features: int, vertices: int) -> dict:
+    rng = random.Random(42)
+    result = []
+    for i in range(features):
+        # buffer(quad_segs=n) yields 4n + 1 vertices per ring
+        center = Point(rng.uniform(-170, 170), rng.uniform(-80, 80))
+        geometry = center if i % 2 == 0 else center.buffer(0.5, max(1, vertices // 4))
+        result.append(
+            {
+                "type": "Feature",
+                "geometry": mapping(geometry),
+                "properties": {"name": f"case {i}", "count": i, "type": "outbreak"},
+                "id": i,
+            }
+        )
+    return {"type": "FeatureCollection", "features": result}
+
+
+def timed(encode, runs: int):
+    seconds, body = [], b""
+    for _ in range(runs):
+        started = time.perf_counter()
+        body = encode()
+        seconds.append(time.perf_counter() - started)
+    return statistics.median(seconds) * 1000, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--features", type=int, default=20_000)
+    parser.add_argument("--vertices", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    document = feature_collection(args.features, args.vertices)
+    encoders = {
+        "stdlib json": lambda: json.dumps(
+            document, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode(),
+        "jsonable_encoder + json": lambda: json.dumps(jsonable_encoder(document)).encode(),
+        "orjson": lambda: dumps(document),
+    }
+    body = b""
+    for name, encode in encoders.items():
+        ms, body = timed(encode, args.runs)
+        print(f"{name:>24}: median {ms:8.1f} ms  body {len(body) / 2**20:7.2f} MiB")
+
+    codings = {"gzip": lambda data: gzip.compress(data, GZIP_LEVEL)}
+    if brotli is not None:
+        codings["br"] = lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+    for name, compress in codings.items():
+        ms, compressed = timed(lambda: compress(body), args.runs)
+        print(
+            f"{name:>24}: median {ms:8.1f} ms  on the wire {len(compressed) / 2**20:7.2f} MiB "
+            f"({len(compressed) / len(body):.1%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
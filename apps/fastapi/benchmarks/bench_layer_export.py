@@ -0,0 +1,110 @@
+"""
+Throughput of GET /api/v1/file_upload/table_list/{table_name} per export format.
+
+Requires DATABASE_URL to point at a PostGIS database. A synthetic layer
+table shaped like an ogr2ogr import is created, exported and dropped again:
+
+    python -m benchmarks.bench_layer_export --rows 1000000 --runs 3
+"""
+import argparse
+import resource
+import statistics
+import time
+import tracemalloc
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from config.database import get_engine
+from main import app
+
+TABLE = "layer_bench_export"
+
+SEED_SQL = [
+    f"DROP TABLE IF EXISTS public.{TABLE}",
+    f"""
+    CREATE TABLE public.{TABLE} (
+        ogc_fid serial PRIMARY KEY,
+        name varchar,
+        category varchar,
+        cases integer,
+        reported date,
+        wkb_geometry geometry(Point, 4326)
+    )
+    """,
+    f"""
+    INSERT INTO public.{TABLE} (name, category, cases, reported, wkb_geometry)
+    SELECT 'site "' || g || '", district ' || (g % 97),
+           (ARRAY['clinic', 'school', 'market', 'water point'])[1 + g % 4],
+           g % 500,
+           date '2024-01-01' + (g % 365),
+           ST_SetSRID(ST_MakePoint(random() * 360 - 180, random() * 170 - 85), 4326)
+    FROM generate_series(1, :rows) AS g
+    """,
+    f"CREATE INDEX ON public.{TABLE} USING GIST (wkb_geometry)",
+    f"ANALYZE public.{TABLE}",
+]
+
+
+def seed(rows: int) -> None:
+    with get_engine().begin() as conn:
+        for statement in SEED_SQL:
+            conn.execute(text(statement), {"rows": rows})
+
+
+def cleanup() -> None:
+    with get_engine().begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS public.{TABLE}"))
+
+
+def measure(client: TestClient, url: str, runs: int):
+    """Return (seconds per run, peak traced memory in MiB, response size in bytes)."""
+    seconds, peaks, size = [], [], 0
+    for _ in range(runs):
+        tracemalloc.start()
+        started = time.perf_counter()
+        size = 0
+        with client.stream("GET", url) as response:
+            response.raise_for_status()
+            # Chunks are discarded so only server-side allocations are traced
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+        seconds.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 2**20)
+        tracemalloc.stop()
+    return seconds, max(peaks), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Seeding {TABLE} with {args.rows} rows...")
+    seed(args.rows)
+    try:
+        client = TestClient(app)
+        url = f"/api/v1/file_upload/table_list/{TABLE}"
+        variants = {
+            "csv/wkt": f"{url}?format=csv&geometry=wkt",
+            "csv/lonlat": f"{url}?format=csv&geometry=lonlat",
+            "ndjson": f"{url}?format=ndjson",
+            "fgb": f"{url}?format=fgb",
+        }
+        for name, variant_url in variants.items():
+            seconds, peak_mib, size = measure(client, variant_url, args.runs)
+            median = statistics.median(seconds)
+            print(
+                f"{name:>10}: median {median:7.2f} s  {args.rows / median:10.0f} rows/s  "
+                f"{size / 2**20 / median:7.1f} MiB/s  body {size / 2**20:8.1f} MiB  "
+                f"peak Python memory {peak_mib:6.1f} MiB"
+            )
+        max_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"process max RSS {max_rss_mib:.1f} MiB")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Per-request overhead of the metrics middleware.
+
+Drives a minimal ASGI app directly (no sockets, no routing) with and
+without MetricsMiddleware and reports the difference per request, plus the
+cost of rendering /metrics once the histograms hold many routes:
+
+    python -m benchmarks.bench_metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from core.metrics import MetricsMiddleware, registry
+
+
+class _Route:
+    def __init__(self, path: str):
+        self.path = path
+
+
+FEATURES_ROUTE = _Route("/api/v1/projects/{project_id}/features")
+
+
+async def endpoint(scope, receive, send):
+    # What the router does for a matched request, minus the matching
+    scope["route"] = FEATURES_ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/x"}, receive, send)
+    return time.perf_counter() - started
+
+
+def per_request_us(app, requests: int, runs: int) -> float:
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(drive(app, requests // 10))  # warm up
+        return statistics.median(
+            loop.run_until_complete(drive(app, requests)) / requests * 1e6 for _ in range(runs)
+        )
+    finally:
+        loop.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--routes", type=int, default=50, help="label sets when timing /metrics")
+    args = parser.parse_args()
+
+    bare = per_request_us(endpoint, args.requests, args.runs)
+    wrapped = per_request_us(MetricsMiddleware(endpoint), args.requests, args.runs)
+    print(f"{'bare app':>20}: {bare:6.2f} us/request")
+    print(f"{'with metrics':>20}: {wrapped:6.2f} us/request")
+    print(f"{'overhead':>20}: {wrapped - bare:6.2f} us/request")
+
+    for i in range(args.routes):
+        for status in (200, 404, 500):
+            app = MetricsMiddleware(_routed(f"/api/v1/route_{i}/{{id}}", status))
+            asyncio.run(app({"type": "http", "method": "GET", "path": "/x"}, receive, send))
+    started = time.perf_counter()
+    body = registry.render()
+    print(
+        f"{'render /metrics':>20}: {(time.perf_counter() - started) * 1000:6.2f} ms "
+        f"for {body.count(chr(10))} lines ({len(body) / 1024:.0f} KiB)"
+    )
+
+
+def _routed(path: str, status: int):
+    route = _Route(path)
+
+    async def app(scope, receive, send):
+        scope["route"] = route
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    return app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compare the PostGIS-assembled and the Python (shapely) GeoJSON paths of
+GET /api/v1/projects/{project_id}/features.
+
+Requires DATABASE_URL to point at a PostGIS database with the application
+schema. A synthetic project is seeded, measured and removed again:
+
+    python -m benchmarks.bench_project_features --features 100000 --runs 5
+"""
+import argparse
+import json
+import math
+import statistics
+import time
+import tracemalloc
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from config.database import get_engine
+from main import app
+
+SEED_SQL = text(
+    """
+    INSERT INTO project_features (project_id, geometry, type, properties)
+    SELECT :project_id,
+           CASE WHEN g % 2 = 0
+                THEN ST_SetSRID(ST_MakePoint(random() * 360 - 180, random() * 170 - 85), 4326)
+                ELSE ST_SetSRID(ST_Buffer(ST_MakePoint(random() * 300 - 150, random() * 140 - 70), 0.5, 8), 4326)
+           END,
+           CASE WHEN g % 2 = 0 THEN 'point' ELSE 'polygon' END,
+           jsonb_build_object('name', 'case ' || g, 'count', g, 'active', g % 3 = 0)
+    FROM generate_series(1, :features) AS g
+    """
+)
+
+
+def seed(project_id: int, features: int) -> None:
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM project_features WHERE project_id = :p"), {"p": project_id})
+        conn.execute(SEED_SQL, {"project_id": project_id, "features": features})
+
+
+def cleanup(project_id: int) -> None:
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM project_features WHERE project_id = :p"), {"p": project_id})
+
+
+def measure(client: TestClient, url: str, runs: int):
+    """Return (latencies in ms, peak traced memory in MiB, response size in bytes)."""
+    latencies, peaks, size = [], [], 0
+    for _ in range(runs):
+        tracemalloc.start()
+        started = time.perf_counter()
+        size = 0
+        with client.stream("GET", url) as response:
+            response.raise_for_status()
+            # Chunks are discarded so only server-side allocations are traced
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+        latencies.append((time.perf_counter() - started) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 2**20)
+        tracemalloc.stop()
+    return latencies, max(peaks), size
+
+
+def _same_value(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=0, abs_tol=1e-12)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same_value(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same_value(a[k], b[k]) for k in a)
+    return a == b
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--features", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--project-id", type=int, default=990_006)
+    args = parser.parse_args()
+
+    print(f"Seeding project {args.project_id} with {args.features} features...")
+    seed(args.project_id, args.features)
+    try:
+        client = TestClient(app)
+        url = f"/api/v1/projects/{args.project_id}/features"
+        for serializer in ("python", "postgis"):
+            latencies, peak_mib, size = measure(client, f"{url}?serializer={serializer}", args.runs)
+            print(
+                f"{serializer:>8}: median {statistics.median(latencies):9.1f} ms  "
+                f"min {min(latencies):9.1f} ms  peak Python memory {peak_mib:8.1f} MiB  "
+                f"body {size / 2**20:7.1f} MiB"
+            )
+
+        python_doc, postgis_doc = (
+            json.loads(client.get(f"{url}?serializer={k}").content) for k in ("python", "postgis")
+        )
+        equivalent = _same_value(python_doc, postgis_doc)
+        print(f"documents equivalent: {equivalent}")
+    finally:
+        cleanup(args.project_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Synthetic outbreak datasets for the benchmark suite.
+
+Everything is generated in PostgreSQL with generate_series and a fixed
+random seed, so a given size and shape always produces the same rows.
+"simple" features are 5-vertex rectangles; "complex" ones are 129-vertex
+outbreak zones with a 33-vertex hole.
+"""
+import json
+import random
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+SIZES: Dict[str, int] = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+SHAPES = ("simple", "complex")
+
+# Project ids and layer tables reserved for benchmark data
+PROJECT_ID_BASE = 990_000
+POINT_DESCRIPTION = "bench point"
+
+GEOMETRY_SQL = {
+    "simple": """
+        ST_MakeEnvelope(x, y, x + 0.01 + random() * 0.05, y + 0.01 + random() * 0.05, 4326)
+    """,
+    "complex": """
+        ST_SetSRID(ST_Difference(
+            ST_Buffer(ST_MakePoint(x, y), 0.05 + random() * 0.1, 32),
+            ST_Buffer(ST_MakePoint(x, y), 0.02, 8)
+        ), 4326)
+    """,
+}
+
+PROJECT_SEED_SQL = """
+INSERT INTO project_features (project_id, geometry, type, properties)
+SELECT :project_id, {geometry},
+       (ARRAY['outbreak_zone', 'quarantine', 'clinic_area'])[1 + g % 3],
+       jsonb_build_object(
+           'name', 'zone ' || g,
+           'cases', (g * 7919) % 500,
+           'reported', (date '2024-01-01' + (g % 365))::text,
+           'confirmed', g % 4 = 0
+       )
+FROM (
+    SELECT g, random() * 340 - 170 AS x, random() * 160 - 80 AS y
+    FROM generate_series(1, :features) AS g
+) AS s
+"""
+
+POINT_SEED_SQL = """
+INSERT INTO shape (location_point, description)
+SELECT ST_SetSRID(ST_MakePoint(random() * 360 - 180, random() * 170 - 85), 4326),
+       :description
+FROM generate_series(1, :points)
+"""
+
+LAYER_SEED_SQL = [
+    "DROP TABLE IF EXISTS public.{table}",
+    """
+    CREATE TABLE public.{table} (
+        ogc_fid serial PRIMARY KEY,
+        name varchar,
+        category varchar,
+        cases integer,
+        reported date,
+        wkb_geometry geometry(Geometry, 4326)
+    )
+    """,
+    """
+    INSERT INTO public.{table} (name, category, cases, reported, wkb_geometry)
+    SELECT 'zone ' || g,
+           (ARRAY['clinic', 'school', 'market', 'water point'])[1 + g % 4],
+           (g * 7919) % 500,
+           date '2024-01-01' + (g % 365),
+           {geometry}
+    FROM (
+        SELECT g, random() * 340 - 170 AS x, random() * 160 - 80 AS y
+        FROM generate_series(1, :rows) AS g
+    ) AS s
+    """,
+    "CREATE INDEX ON public.{table} USING GIST (wkb_geometry)",
+    "ANALYZE public.{table}",
+]
+
+
+def project_id(size: str, shape: str) -> int:
+    """The reserved project id of one dataset."""
+    return PROJECT_ID_BASE + list(SIZES).index(size) * 10 + SHAPES.index(shape)
+
+
+def layer_table(size: str, shape: str) -> str:
+    return f"layer_bench_{size}_{shape}"
+
+
+def _seed_random(conn: Connection, seed: float = 0.42) -> None:
+    conn.execute(text("SELECT setseed(:seed)"), {"seed": seed})
+
+
+def seed_project(conn: Connection, size: str, shape: str) -> int:
+    """Replace the dataset's project features; returns the project id."""
+    pid = project_id(size, shape)
+    drop_project(conn, pid)
+    _seed_random(conn)
+    conn.execute(
+        text(PROJECT_SEED_SQL.format(geometry=GEOMETRY_SQL[shape])),
+        {"project_id": pid, "features": SIZES[size]},
+    )
+    return pid
+
+
+def drop_project(conn: Connection, pid: int) -> None:
+    conn.execute(text("DELETE FROM project_features WHERE project_id = :p"), {"p": pid})
+    conn.execute(text("DELETE FROM project_versions WHERE project_id = :p"), {"p": pid})
+
+
+def seed_points(conn: Connection, points: int) -> None:
+    drop_points(conn)
+    _seed_random(conn)
+    conn.execute(text(POINT_SEED_SQL), {"points": points, "description": POINT_DESCRIPTION})
+
+
+def drop_points(conn: Connection) -> None:
+    conn.execute(text("DELETE FROM shape WHERE description = :d"), {"d": POINT_DESCRIPTION})
+
+
+def seed_layer(conn: Connection, size: str, shape: str) -> str:
+    """Create a layer table shaped like an ogr2ogr import; returns its name."""
+    table = layer_table(size, shape)
+    _seed_random(conn)
+    for statement in LAYER_SEED_SQL:
+        conn.execute(
+            text(statement.format(table=table, geometry=GEOMETRY_SQL[shape])),
+            {"rows": SIZES[size]},
+        )
+    return table
+
+
+def drop_layer(conn: Connection, table: str) -> None:
+    conn.execute(text(f"DROP TABLE IF EXISTS public.{table}"))
+    conn.execute(text("DELETE FROM layer_catalog WHERE table_name = :t"), {"t": table})
+
+
+def write_geojson(path: str, features: int, seed: int = 42) -> int:
+    """
+    Write a FeatureCollection of ``features`` simple polygons for upload,
+    streaming it to disk; returns the file size in bytes.
+    """
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write('{"type":"FeatureCollection","features":[')
+        for i in range(features):
+            x, y = rng.uniform(-170, 170), rng.uniform(-80, 80)
+            w, h = rng.uniform(0.01, 0.06), rng.uniform(0.01, 0.06)
+            ring = [[x, y], [x + w, y], [x + w, y + h], [x, y + h], [x, y]]
+            feature = {
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+                "properties": {"name": f"zone {i}", "cases": (i * 7919) % 500},
+            }
+            f.write(("," if i else "") + json.dumps(feature, separators=(",", ":")))
+        f.write("]}")
+        return f.tell()
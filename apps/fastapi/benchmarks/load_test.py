@@ -0,0 +1,96 @@
+"""
+Concurrent HTTP load test against a running instance of the API.
+
+Each worker issues GET requests over the given paths in round-robin order for
+the given duration; throughput and latency percentiles are reported per path.
+Compare runs before and after a change with the same arguments:
+
+    uvicorn main:app --workers 1 &
+    python -m benchmarks.load_test --concurrency 64 --duration 30 \\
+        /api/v1/projects/1/features /api/v1/ping
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    paths: "itertools.cycle[str]",
+    deadline: float,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+) -> None:
+    while time.perf_counter() < deadline:
+        path = next(paths)
+        started = time.perf_counter()
+        try:
+            async with client.stream("GET", path) as response:
+                # Drain the body so streamed responses are timed end to end
+                async for _ in response.aiter_raw():
+                    pass
+            if response.status_code >= 400:
+                errors[path] += 1
+                continue
+        except httpx.HTTPError:
+            errors[path] += 1
+            continue
+        latencies[path].append((time.perf_counter() - started) * 1000)
+
+
+async def run(base_url: str, paths: List[str], concurrency: int, duration: float) -> None:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(60.0)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        cycle = itertools.cycle(paths)
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(worker(client, cycle, deadline, latencies, errors) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{concurrency} workers, {elapsed:.1f} s, {total / elapsed:.1f} req/s overall")
+    for path in paths:
+        values = latencies[path]
+        if not values:
+            print(f"{path}: no successful requests, {errors[path]} errors")
+            continue
+        print(
+            f"{path}: {len(values) / elapsed:8.1f} req/s  "
+            f"p50 {statistics.median(values):8.1f} ms  "
+            f"p95 {percentile(values, 95):8.1f} ms  "
+            f"p99 {percentile(values, 99):8.1f} ms  "
+            f"errors {errors[path]}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.paths, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,28 @@
 import logging
-from typing import Generator
-from sqlalchemy import create_engine, exc
+import threading
+from typing import AsyncGenerator, Dict, Generator, Optional
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, scoped_session, Session
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
+from core.query_stats import instrument_engine
 import os
-import time
-from contextlib import contextmanager
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Get database URL from environment
+# Get database URL from environment; checked when the first engine is created
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
-if not SQLALCHEMY_DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
+
+
+def get_database_url() -> str:
+    if not SQLALCHEMY_DATABASE_URL:
+        raise ValueError("DATABASE_URL environment variable is not set")
+    return SQLALCHEMY_DATABASE_URL
 
 def get_ogr_pg_dsn() -> str:
     """Generate OGR PostgreSQL DSN string from environment variables."""
@@ -37,7 +41,7 @@ def get_ogr_pg_dsn() -> str:
 def create_db_engine():
     """Create a database engine with connection pooling and retry logic."""
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
+        get_database_url(),
         pool_pre_ping=True,  # Enable connection health checks
         pool_recycle=300,     # Recycle connections after 5 minutes
         pool_size=5,          # Number of connections to keep open
@@ -47,58 +51,102 @@ def create_db_engine():
     )
     return engine
 
-# Initialize engine and session factory
-engine = create_db_engine()
+def get_async_database_url() -> URL:
+    """
+    URL for the asyncpg driver: ASYNC_DATABASE_URL if set, otherwise
+    DATABASE_URL with its driver swapped. asyncpg spells libpq's sslmode as ssl.
+    """
+    url = make_url(os.getenv("ASYNC_DATABASE_URL") or get_database_url())
+    url = url.set(drivername="postgresql+asyncpg")
+    if "sslmode" in url.query:
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url
+
+def create_async_db_engine():
+    """Create the asyncpg engine used by async endpoints, pooled like the sync one."""
+    return create_async_engine(
+        get_async_database_url(),
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=int(os.getenv("ASYNC_DB_POOL_SIZE", 10)),
+        max_overflow=int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 10)),
+        pool_timeout=30,
+        echo_pool='debug' if os.getenv('ENV') == 'development' else False
+    )
+
+# Session factories; bound to their engine when it is first created
 SessionLocal = scoped_session(
     sessionmaker(
         autocommit=False,
         autoflush=False,
-        bind=engine,
         expire_on_commit=False
     )
 )
 
-Base = declarative_base()
+# Session factory for async def endpoints
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False,
+    expire_on_commit=False,
+)
 
-def init_db():
-    """Initialize database tables."""
-    from sqlalchemy import text  # Import here to avoid circular imports
-    try:
-        # Test connection first
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-            
-        # Create tables
-        Base.metadata.create_all(bind=engine)
-        logger.info("✅ Database tables created successfully")
-        return True
-    except Exception as e:
-        logger.error(f"❌ Error creating database tables: {e}")
-        raise
+# Engines are created on first use rather than on import, so importing the
+# application neither loads the database drivers nor depends on the database
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """The sync engine, created on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_db_engine()
+                # Per-request query counts, DB time and the slow-query log (core.query_stats)
+                instrument_engine(engine)
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """The asyncpg engine, created on first use."""
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                engine = create_async_db_engine()
+                instrument_engine(engine.sync_engine)
+                AsyncSessionLocal.configure(bind=engine)
+                _async_engine = engine
+    return _async_engine
+
+
+def created_engines() -> Dict[str, Engine]:
+    """The engines created so far, by name, as sync Engines; never creates one."""
+    engines = {}
+    if _engine is not None:
+        engines["sync"] = _engine
+    if _async_engine is not None:
+        engines["async"] = _async_engine.sync_engine
+    return engines
+
+
+async def dispose_engines() -> None:
+    """Close the pooled connections of whichever engines were created."""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+Base = declarative_base()
 
-def check_db_connection(retries: int = 3, delay: int = 2) -> bool:
-    """Check if database is reachable with retry logic."""
-    from sqlalchemy import text  # Import here to avoid circular imports
-    for attempt in range(retries):
-        try:
-            with engine.connect() as conn:
-                # Wrap the SQL in text() to make it executable
-                conn.execute(text("SELECT 1"))
-                logger.info("✅ Database connection successful")
-                return True
-        except exc.SQLAlchemyError as e:
-            logger.warning(
-                f"❌ Database connection attempt {attempt + 1}/{retries} failed: {str(e)}"
-            )
-            if attempt < retries - 1:
-                time.sleep(delay)
-                delay *= 2  # Exponential backoff
-            continue
-    return False
-
-@contextmanager
 def get_db() -> Generator[Session, None, None]:
-    """Dependency function that yields database sessions."""
+    """Dependency function that yields database sessions (for sync endpoints)."""
+    get_engine()
     db = SessionLocal()
     try:
         yield db
@@ -110,8 +158,14 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
-# Test connection on import
-if not check_db_connection():
-    logger.warning("⚠️ Warning: Initial database connection check failed")
-else:
-    logger.info("✅ Database connection established successfully")
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency function that yields asyncpg-backed sessions (for async endpoints)."""
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Database error: {str(e)}")
+            raise
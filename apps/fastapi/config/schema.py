@@ -0,0 +1,80 @@
+"""
+Schema management, run as an explicit step before (or apart from) serving:
+
+    python -m config.schema
+
+The API itself no longer touches the schema on startup unless
+DB_SCHEMA_ON_STARTUP=1 is set.
+"""
+import logging
+import sys
+
+from sqlalchemy import text
+
+from config.database import Base, get_engine
+from crud.layer_catalog import sync_layer_catalog
+from crud.layers import ensure_layer_spatial_index, list_layer_tables
+# Register every table on Base.metadata
+from models import layer_catalog, models, project_feature  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+# Idempotent DDL for columns added to tables after they were first created;
+# Base.metadata.create_all never alters an existing table.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE project_features ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_project_features_content_hash "
+    "ON project_features (content_hash)",
+    # Spatial indexes for viewport / intersects queries (same names GeoAlchemy2 uses)
+    "CREATE INDEX IF NOT EXISTS idx_project_features_geometry "
+    "ON project_features USING GIST (geometry)",
+    "CREATE INDEX IF NOT EXISTS idx_shape_location_point "
+    "ON shape USING GIST (location_point)",
+    # Writes before the feature change log existed were not logged: clients
+    # syncing from those versions must resync in full
+    "ALTER TABLE project_versions ADD COLUMN IF NOT EXISTS changes_floor BIGINT",
+    "UPDATE project_versions SET changes_floor = version WHERE changes_floor IS NULL",
+    "ALTER TABLE project_versions ALTER COLUMN changes_floor SET DEFAULT 0",
+]
+
+
+def init_db():
+    """Create missing tables, apply SCHEMA_UPGRADES and backfill layer indexes and catalog."""
+    engine = get_engine()
+    try:
+        # Test connection first
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            
+        # Create tables
+        Base.metadata.create_all(bind=engine)
+
+        # Bring tables created by older releases up to date
+        with engine.begin() as conn:
+            for statement in SCHEMA_UPGRADES:
+                conn.execute(text(statement))
+
+        # Layers imported by older releases may lack a spatial index
+        with engine.begin() as conn:
+            for table_name in list_layer_tables(conn):
+                if ensure_layer_spatial_index(conn, table_name):
+                    logger.info(f"Created spatial index for {table_name}")
+
+        # ...and may be missing from the layer catalog
+        with engine.begin() as conn:
+            catalogued = sync_layer_catalog(conn)
+            if catalogued:
+                logger.info(f"Catalogued {catalogued} existing layers")
+        logger.info("✅ Database tables created successfully")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Error creating database tables: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        init_db()
+    except Exception:
+        sys.exit(1)
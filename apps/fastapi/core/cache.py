@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache of ``bytes`` values bounded by total size and count,
+    with an optional time-to-live.
+
+    Every entry may belong to a group (for example a project id) so that all
+    entries derived from the same data can be dropped with one call when that
+    data changes. Hit, miss and eviction counters are kept for sizing.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (group, value, expires_at)
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[Hashable], bytes, Optional[float]]]" = OrderedDict()
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at = entry[2]
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: bytes, group: Optional[Hashable] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (group, value, expires_at)
+            self._size += len(value)
+            if group is not None:
+                self._groups.setdefault(group, set()).add(key)
+            while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_group(self, group: Hashable) -> int:
+        """Drop every entry of ``group`` and return how many were removed."""
+        with self._lock:
+            keys = self._groups.pop(group, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        # Caller must hold the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        group, value, _ = entry
+        self._size -= len(value)
+        if group is not None and group in self._groups:
+            self._groups[group].discard(key)
+            if not self._groups[group]:
+                del self._groups[group]
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls for the same key into one execution.
+
+    While a call for a key is in flight, later callers await its result instead
+    of starting their own, so a burst of cache misses triggers a single query.
+    If the running call is cancelled (its client went away), the first waiting
+    caller runs its own ``fn`` and the others wait on that one instead.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the caller's own cancellation propagates; a cancelled
+                # leader hands the call over to its followers
+                if not future.cancelled():
+                    raise
+            future = self._calls.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
@@ -0,0 +1,198 @@
+import os
+import zlib
+from typing import List, Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always offered
+    brotli = None
+
+
+# Bodies smaller than this are sent as they are
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 5))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+# Chunks at least this large are compressed in a worker thread (zlib and
+# brotli release the GIL) so big bodies do not stall the event loop
+THREAD_MIN_BYTES = 64 * 1024
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/geo+json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/flatgeobuf",
+    "application/vnd.apache.arrow.stream",
+    "application/vnd.outbreakx.wkb-stream",
+    "application/vnd.mapbox-vector-tile",
+}
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    The content coding to use for an ``Accept-Encoding`` header: the highest
+    q-value among ``br`` (when brotli is installed) and ``gzip``, preferring
+    ``br`` on ties; ``*`` stands for either. None means identity.
+    """
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    best, best_quality = None, 0.0
+    for coding in offered:
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";")[0].strip().lower()
+    return (
+        media_type in COMPRESSIBLE_TYPES
+        or media_type.startswith("text/")
+        or media_type.endswith("+json")
+    )
+
+
+class _Compressor:
+    """Incremental gzip or brotli encoder."""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+    async def aprocess(self, data: bytes) -> bytes:
+        if len(data) >= THREAD_MIN_BYTES:
+            return await anyio.to_thread.run_sync(self.process, data)
+        return self.process(data)
+
+
+class CompressionMiddleware:
+    """
+    Streaming gzip / brotli compression of responses.
+
+    The coding follows the request's ``Accept-Encoding``. Responses that are
+    already encoded, of a non-compressible type, or smaller than
+    ``minimum_size`` are passed through untouched; small streamed bodies are
+    detected by buffering at most ``minimum_size`` bytes. Streamed bodies are
+    compressed chunk by chunk, so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_length = headers.get("content-length")
+            self._start = message
+            if (
+                message["status"] < 200
+                or message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type"))
+                or (content_length is not None and int(content_length) < self.minimum_size)
+            ):
+                self._passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is None:
+            self._pending.append(body)
+            self._pending_size += len(body)
+            if more_body and self._pending_size < self.minimum_size:
+                return  # not yet known whether the body is worth compressing
+            body = b"".join(self._pending)
+            self._pending = []
+            if not more_body and self._pending_size < self.minimum_size:
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            self._compressor = _Compressor(self.encoding)
+            headers = MutableHeaders(raw=self._start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                # The whole body is here: send it with its compressed length
+                data = await self._compressor.aprocess(body) + self._compressor.finish()
+                headers["Content-Length"] = str(len(data))
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": data})
+                return
+            await self._send(self._start)
+
+        data = await self._compressor.aprocess(body)
+        if not more_body:
+            data += self._compressor.finish()
+        if data or not more_body:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config.database import get_async_engine
+
+logger = logging.getLogger(__name__)
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Connection counts of an engine's pool, as far as the pool class exposes them."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+class DatabaseMonitor:
+    """
+    Probe the database from a background task and cache the outcome.
+
+    Health endpoints read the cached state instead of touching the database,
+    so they answer immediately even while the database is slow or down. The
+    probe runs on the async engine with a timeout and never blocks the loop;
+    ``get_engine`` is called per probe so the engine is only created once
+    the monitor runs.
+    """
+
+    def __init__(
+        self,
+        get_engine: Callable[[], AsyncEngine],
+        interval_seconds: float = 10.0,
+        timeout_seconds: float = 2.0,
+    ):
+        self.get_engine = get_engine
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.healthy = False
+        self.last_checked: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.probes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def probe(self) -> bool:
+        """Run one ``SELECT 1`` round trip and record the result."""
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._select_one(), timeout=self.timeout_seconds)
+        except Exception as e:
+            error = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)
+            if self.healthy or self.last_checked is None:
+                logger.warning(f"❌ Database probe failed: {error}")
+            self.healthy = False
+            self.last_error = error
+            self.consecutive_failures += 1
+        else:
+            if not self.healthy:
+                logger.info("✅ Database connection successful")
+            self.healthy = True
+            self.last_error = None
+            self.consecutive_failures = 0
+            self.last_success = time.time()
+        self.last_latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.last_checked = time.time()
+        self.probes += 1
+        return self.healthy
+
+    async def _select_one(self) -> None:
+        async with self.get_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    @property
+    def stale(self) -> bool:
+        """True when no probe has completed recently enough to trust the state."""
+        if self.last_checked is None:
+            return True
+        max_age = 3 * self.interval_seconds + self.timeout_seconds
+        return time.time() - self.last_checked > max_age
+
+    @property
+    def ready(self) -> bool:
+        return self.healthy and not self.stale
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:  # keep the monitor alive whatever happens
+                logger.error(f"Database monitor error: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "database": "connected" if self.healthy else "disconnected",
+            "ready": self.ready,
+            "last_checked": self.last_checked,
+            "last_success": self.last_success,
+            "probe_latency_ms": self.last_latency_ms,
+            "last_error": self.last_error,
+            "consecutive_failures": self.consecutive_failures,
+            "probes": self.probes,
+            "interval_seconds": self.interval_seconds,
+        }
+
+
+def create_db_monitor() -> DatabaseMonitor:
+    return DatabaseMonitor(
+        get_async_engine,
+        interval_seconds=float(os.getenv("DB_MONITOR_INTERVAL_SECONDS", 10)),
+        timeout_seconds=float(os.getenv("DB_MONITOR_TIMEOUT_SECONDS", 2)),
+    )
+
+
+db_monitor = create_db_monitor()
@@ -0,0 +1,141 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from core.metrics import observe_job
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while every worker and queue slot is taken."""
+
+
+@dataclass
+class Job:
+    """A unit of background work and its timing; ``result`` holds job-specific output."""
+
+    job_id: str
+    run: Callable[["Job"], None]
+    state: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def queue_wait_seconds(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return self.started_at - self.created_at
+
+    @property
+    def run_seconds(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class BoundedJobQueue:
+    """
+    Fixed pool of worker threads fed from a bounded FIFO queue.
+
+    ``submit`` never blocks: once ``max_queue`` jobs are waiting it raises
+    ``QueueFullError`` so callers can shed load instead of piling up work.
+    Finished jobs stay queryable until ``history`` newer ones replace them.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int, history: int = 1000):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.history = history
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=max_queue)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.running = 0
+        self.rejected = 0
+
+    def _ensure_workers(self) -> None:
+        # Caller must hold the lock; threads start on first use, not on import
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"{self.name}-worker-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def has_capacity(self) -> bool:
+        return not self._queue.full()
+
+    def submit(self, job: Job) -> Job:
+        with self._lock:
+            self._ensure_workers()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self.rejected += 1
+                raise QueueFullError(f"{self.name} queue is full") from None
+            self._remember(job)
+        return job
+
+    def record(self, job: Job) -> Job:
+        """Make a job that was resolved without running queryable like any other."""
+        with self._lock:
+            self._remember(job)
+        return job
+
+    def _remember(self, job: Job) -> None:
+        # Caller must hold the lock
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.history:
+            oldest_id = next(iter(self._jobs))
+            if self._jobs[oldest_id].state in (QUEUED, RUNNING):
+                break
+            self._jobs.popitem(last=False)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize(),
+            "running": self.running,
+            "rejected": self.rejected,
+        }
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self.running += 1
+            job.state = RUNNING
+            job.started_at = time.time()
+            try:
+                job.run(job)
+                job.state = DONE
+            except Exception as e:
+                job.state = FAILED
+                job.error = job.error or str(e)
+                logger.error(f"Job {job.job_id} failed: {job.error}")
+            finally:
+                job.finished_at = time.time()
+                observe_job(self.name, job)
+                with self._lock:
+                    self.running -= 1
+                self._queue.task_done()
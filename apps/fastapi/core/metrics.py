@@ -0,0 +1,346 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.routes import route_template
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 1 KiB to 1 GiB in steps of 4
+SIZE_BUCKETS = tuple(float(1024 * 4**i) for i in range(11))
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def lines(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self.samples()
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Exposition lines of the metric's current values."""
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class GaugeFunction(_Metric):
+    """A gauge whose values are read from callbacks at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks: List[Callable[[], Dict[Labels, float]]] = []
+
+    def watch(self, callback: Callable[[], Dict[Labels, float]]) -> None:
+        self._callbacks.append(callback)
+
+    def samples(self) -> Iterator[str]:
+        for callback in self._callbacks:
+            # One failing source must not fail the whole scrape
+            try:
+                values = callback()
+            except Exception as e:
+                logger.warning(f"Could not read {self.name}: {e}")
+                continue
+            for labels, value in values.items():
+                yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class CounterFunction(GaugeFunction):
+    """A counter maintained elsewhere and read from callbacks at scrape time."""
+
+    type = "counter"
+
+
+def _histogram_samples(
+    name: str,
+    labelnames: Sequence[str],
+    labels: Labels,
+    buckets: Sequence[float],
+    counts: Sequence[int],
+    total: float,
+) -> Iterator[str]:
+    """Cumulative ``_bucket`` lines plus ``_sum`` and ``_count`` for one label set."""
+    names = tuple(labelnames) + ("le",)
+    cumulative = 0
+    for bound, count in zip(tuple(buckets) + (float("inf"),), counts):
+        cumulative += count
+        yield f"{name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+    plain = _format_labels(labelnames, labels)
+    yield f"{name}_sum{plain} {_format_value(total)}"
+    yield f"{name}_count{plain} {cumulative}"
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (the last one is +Inf), sum]
+        self._values: Dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in values:
+            yield from _histogram_samples(self.name, self.labelnames, labels, self.buckets, counts, total)
+
+
+class HttpMetrics:
+    """
+    Request counts by status, latency and response size histograms per
+    route, and the number of requests in flight.
+
+    Kept as one record per (method, route) so a request costs a single dict
+    lookup; only MetricsMiddleware updates it, always on the event loop, so
+    no lock is taken.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        # (method, route) -> [{status: count}, latency counts, latency sum, size counts, size sum]
+        self._routes: Dict[Tuple[str, str], list] = {}
+
+    def record(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+        entry = self._routes.get((method, route))
+        if entry is None:
+            entry = self._routes[(method, route)] = [
+                {}, [0] * (len(LATENCY_BUCKETS) + 1), 0.0, [0] * (len(SIZE_BUCKETS) + 1), 0
+            ]
+        statuses = entry[0]
+        statuses[status] = statuses.get(status, 0) + 1
+        entry[1][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        entry[2] += seconds
+        entry[3][bisect_left(SIZE_BUCKETS, size)] += 1
+        entry[4] += size
+
+    def lines(self) -> Iterator[str]:
+        routes = [(labels, dict(e[0]), list(e[1]), e[2], list(e[3]), e[4]) for labels, e in self._routes.items()]
+        labelnames = ("method", "route")
+
+        yield "# HELP http_requests_total HTTP requests by route and status."
+        yield "# TYPE http_requests_total counter"
+        for labels, statuses, *_ in routes:
+            for status, count in sorted(statuses.items()):
+                status_labels = _format_labels(labelnames + ("status",), labels + (str(status),))
+                yield f"http_requests_total{status_labels} {count}"
+
+        yield "# HELP http_request_duration_seconds Time from request start to the last body chunk sent."
+        yield "# TYPE http_request_duration_seconds histogram"
+        for labels, _, counts, total, _, _ in routes:
+            yield from _histogram_samples(
+                "http_request_duration_seconds", labelnames, labels, LATENCY_BUCKETS, counts, total
+            )
+
+        yield "# HELP http_response_size_bytes Response body bytes as sent (after compression)."
+        yield "# TYPE http_response_size_bytes histogram"
+        for labels, _, _, _, counts, total in routes:
+            yield from _histogram_samples(
+                "http_response_size_bytes", labelnames, labels, SIZE_BUCKETS, counts, total
+            )
+
+        # Not labelled by route: the route is only known once routing has run
+        yield (
+            "# HELP http_requests_in_flight HTTP requests being handled by this process, "
+            "across all routes."
+        )
+        yield "# TYPE http_requests_in_flight gauge"
+        yield f"http_requests_in_flight {self.in_flight}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        """Add anything with a ``lines()`` method yielding exposition lines."""
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All registered metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_metrics = registry.register(HttpMetrics())
+db_pool_connections = registry.register(
+    GaugeFunction("db_pool_connections", "Connection pool counters by engine.", ("engine", "state"))
+)
+job_queue_jobs = registry.register(
+    GaugeFunction("job_queue_jobs", "Background jobs by queue and state.", ("queue", "state"))
+)
+job_queue_rejected = registry.register(
+    CounterFunction("job_queue_rejected_total", "Jobs refused because the queue was full.", ("queue",))
+)
+job_wait_seconds = registry.register(
+    Histogram(
+        "job_queue_wait_seconds",
+        "Time jobs spent queued before a worker picked them up.",
+        ("queue",),
+        buckets=JOB_BUCKETS,
+    )
+)
+job_run_seconds = registry.register(
+    Histogram(
+        "job_queue_run_seconds", "Time jobs spent running, by outcome.", ("queue", "state"), buckets=JOB_BUCKETS
+    )
+)
+
+
+def watch_pools(pools: Callable[[], Dict[str, Dict[str, Any]]]) -> None:
+    """
+    Report the numeric pool counters returned by ``pools()`` (engine name ->
+    core.db_monitor.pool_stats) on every scrape.
+    """
+    db_pool_connections.watch(
+        lambda: {
+            (name, state): value
+            for name, stats in pools().items()
+            for state, value in stats.items()
+            if isinstance(value, (int, float))
+        }
+    )
+
+
+def watch_job_queue(job_queue) -> None:
+    """Report a BoundedJobQueue's depth, busy workers and rejections on every scrape."""
+    def depth() -> Dict[Labels, float]:
+        stats = job_queue.stats()
+        return {
+            (job_queue.name, "queued"): stats["queued"],
+            (job_queue.name, "running"): stats["running"],
+        }
+
+    job_queue_jobs.watch(depth)
+    job_queue_rejected.watch(lambda: {(job_queue.name,): job_queue.rejected})
+
+
+def observe_job(queue_name: str, job) -> None:
+    """Record the queue wait and run time of a finished job."""
+    if not METRICS_ENABLED:
+        return
+    if job.queue_wait_seconds is not None:
+        job_wait_seconds.observe((queue_name,), job.queue_wait_seconds)
+    if job.run_seconds is not None:
+        job_run_seconds.observe((queue_name, job.state), job.run_seconds)
+
+
+class MetricsMiddleware:
+    """
+    Count requests and record their latency and response size per route.
+
+    The route label is the matched path template (``/api/v1/projects/{project_id}/features``)
+    so label cardinality stays bounded; unmatched paths share "unmatched".
+    Latency runs until the last body chunk, so streamed responses count in full.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        response = [500, 0]  # status, body bytes
+
+        async def send_with_metrics(message: Message) -> None:
+            if message["type"] == "http.response.body":
+                response[1] += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                response[0] = message["status"]
+            await send(message)
+
+        metrics = http_metrics
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            metrics.in_flight -= 1
+            metrics.record(
+                scope["method"],
+                route_template(scope) or "unmatched",
+                response[0],
+                time.perf_counter() - started,
+                response[1],
+            )
@@ -0,0 +1,98 @@
+from typing import Dict, List, Optional
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartError(ValueError):
+    """The request body is not multipart/form-data or lacks the expected file field."""
+
+
+class MultipartFileReader:
+    """
+    Incremental multipart/form-data parser that hands back the bytes of one
+    file field as the body arrives.
+
+    Unlike ``Request.form()`` nothing is spooled: ``feed`` returns the file
+    bytes found in each body chunk and the data of other fields is dropped,
+    so memory stays bounded by the chunk size whatever the upload size.
+    """
+
+    def __init__(self, content_type: str, field_name: str):
+        media_type, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise MultipartError("Expected a multipart/form-data body")
+
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self._done = False
+        self._ended = False
+        self._in_file = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._chunks: List[bytes] = []
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_end": self._on_end,
+            },
+        )
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Parse one body chunk and return the file bytes it contained."""
+        self._chunks = []
+        try:
+            self._parser.write(chunk)
+        except Exception as e:
+            raise MultipartError(f"Malformed multipart body: {e}") from e
+        return self._chunks
+
+    def finish(self) -> None:
+        """Check that the body ended and carried the file field in full."""
+        if not self._ended:
+            raise MultipartError("Multipart body ended unexpectedly")
+        if not self._done:
+            raise MultipartError(f"Missing file field '{self.field_name}'")
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        name = options.get(b"name", b"").decode("latin-1")
+        filename = options.get(b"filename")
+        # Only the first file sent under the field name is read
+        if name == self.field_name and filename is not None and self.filename is None:
+            self.filename = filename.decode("utf-8", errors="replace")
+            self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._chunks.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self._done = True
+
+    def _on_end(self) -> None:
+        self._ended = True
@@ -0,0 +1,163 @@
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.routes import route_template
+
+logger = logging.getLogger(__name__)
+
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "1") != "0"
+# Statements slower than this are logged, with their parameters redacted
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 500))
+# A request running one SELECT shape more often than this is flagged as N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 10))
+STATEMENT_LOG_LIMIT = 2000
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@dataclass
+class QueryStats:
+    """Statements run on behalf of one request."""
+
+    count: int = 0
+    seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD):
+        """``(shape, count)`` of SELECT shapes run more than ``threshold`` times."""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count > threshold and shape.startswith(("SELECT", "WITH"))
+        ]
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries", '
+            f"app;dur={total_seconds * 1000:.1f}"
+        )
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being handled, or None outside a request."""
+    return _current_stats.get()
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """
+    A statement with literals and placeholders replaced by ``?`` and IN lists
+    collapsed, so the same query with different values has one shape.
+    """
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Keep the structure of bound parameters but only the type of each value."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        text = _SPACE.sub(" ", statement).strip()[:STATEMENT_LOG_LIMIT]
+        logger.warning(
+            f"Slow query ({seconds * 1000:.1f} ms): {text} "
+            f"parameters={redact_parameters(parameters)}"
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Count and time every statement of ``engine`` (for an AsyncEngine pass its
+    ``sync_engine``) against the current request and log slow ones.
+    """
+    if not QUERY_STATS_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """
+    Collect per-request query counts and database time.
+
+    Figures up to the start of the response are sent in a ``Server-Timing``
+    header; when the request finishes (including streamed bodies) statement
+    shapes repeated more than QUERY_REPEAT_THRESHOLD times are logged as
+    probable N+1 patterns.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            path = route_template(scope) or scope["path"]
+            for shape, count in stats.repeated():
+                logger.warning(
+                    f"Possible N+1 in {scope['method']} {path}: statement ran {count} times: "
+                    f"{shape[:STATEMENT_LOG_LIMIT]}"
+                )
@@ -0,0 +1,49 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from geoalchemy2.elements import WKBElement, WKTElement
+from geoalchemy2.shape import to_shape
+from pydantic import BaseModel
+
+# numpy coordinate arrays are written natively, without converting to lists
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Convert what orjson does not know natively; called per unknown object."""
+    geo_interface = getattr(value, "__geo_interface__", None)
+    if geo_interface is not None:
+        return geo_interface
+    if isinstance(value, (WKBElement, WKTElement)):
+        return to_shape(value).__geo_interface__
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode to compact UTF-8 JSON with orjson.
+
+    Shapely geometries and other ``__geo_interface__`` objects become GeoJSON
+    geometries, GeoAlchemy2 WKB/WKT elements are decoded, numpy arrays are
+    written as nested number arrays and non-finite floats become ``null``.
+    """
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class GeoJSONResponse(JSONResponse):
+    """
+    The application's default response class: ``JSONResponse`` rendered by
+    orjson with GeoJSON-aware conversions (see ``dumps``).
+
+    FastAPI still runs ``jsonable_encoder`` on plain return values; endpoints
+    returning large geometry payloads should return this response directly.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
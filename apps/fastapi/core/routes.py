@@ -0,0 +1,40 @@
+from typing import Dict, Optional
+
+from starlette.types import Scope
+
+try:
+    # Newer FastAPI keeps included routers nested, so a matched route's own
+    # path lacks the include prefixes; this yields each route with its full path
+    from fastapi.routing import iter_route_contexts
+except ImportError:  # older FastAPI copies included routes with their full path
+    iter_route_contexts = None
+
+# id() of a matched route (routes are not hashable and live as long as the
+# app) -> full path template, filled from the app on first use
+_templates: Dict[int, str] = {}
+
+
+def _collect_templates(app) -> None:
+    if iter_route_contexts is None:
+        return
+    for context in iter_route_contexts(app.routes):
+        if context.path is not None:
+            # Routes included twice keep the first (matching) path
+            _templates.setdefault(id(context.original_route), context.path)
+
+
+def route_template(scope: Scope) -> Optional[str]:
+    """
+    Full path template of the route that handled a request, such as
+    ``/api/v1/projects/{project_id}/features``; None when no route matched.
+    """
+    route = scope.get("route")
+    if route is None:
+        return None
+    template = _templates.get(id(route))
+    if template is None:
+        if "app" in scope:
+            _collect_templates(scope["app"])
+        # Remember routes the app does not list (e.g. mounted sub-apps) as they are
+        template = _templates.setdefault(id(route), getattr(route, "path", "unmatched"))
+    return template
@@ -0,0 +1,69 @@
+import gzip
+import os
+from collections import OrderedDict
+from typing import AsyncIterator, Hashable, Optional
+
+from core.cache import LRUCache, SingleFlight
+from crud.tiles import invalidate_project_tiles
+
+# Encoded FeatureCollection bodies keyed by (project_id, version, etag) and
+# grouped by project_id. Bodies larger than FEATURE_CACHE_MAX_ENTRY_BYTES are
+# streamed instead of cached.
+feature_collection_cache = LRUCache(
+    max_bytes=int(os.getenv("FEATURE_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+    max_entries=int(os.getenv("FEATURE_CACHE_MAX_ENTRIES", 1000)),
+    ttl_seconds=float(os.getenv("FEATURE_CACHE_TTL_SECONDS", 300)),
+)
+MAX_ENTRY_BYTES = int(os.getenv("FEATURE_CACHE_MAX_ENTRY_BYTES", 32 * 1024 * 1024))
+GZIP_ENABLED = os.getenv("FEATURE_CACHE_GZIP", "1") != "0"
+GZIP_MIN_BYTES = 1024
+
+# Coalesces concurrent misses for the same key into one database query
+feature_render_flight = SingleFlight()
+
+# Keys whose body turned out to exceed MAX_ENTRY_BYTES, so later requests go
+# straight to streaming instead of buffering again
+_oversized_keys: "OrderedDict[Hashable, None]" = OrderedDict()
+_OVERSIZED_KEYS_LIMIT = 1024
+
+
+def invalidate_project_caches(project_id: int) -> None:
+    """Drop every cached representation of a project; call after its features change."""
+    feature_collection_cache.invalidate_group(project_id)
+    invalidate_project_tiles(project_id)
+
+
+def is_oversized(key: Hashable) -> bool:
+    return key in _oversized_keys
+
+
+def mark_oversized(key: Hashable) -> None:
+    _oversized_keys[key] = None
+    while len(_oversized_keys) > _OVERSIZED_KEYS_LIMIT:
+        _oversized_keys.popitem(last=False)
+
+
+async def collect_limited(
+    chunks: AsyncIterator[bytes], limit: int = MAX_ENTRY_BYTES
+) -> Optional[bytes]:
+    """Join chunks into one body, or return None as soon as it would exceed ``limit``."""
+    parts, size = [], 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > limit:
+            await chunks.aclose()
+            return None
+        parts.append(chunk)
+    return b"".join(parts)
+
+
+def gzip_variant(key: Hashable, body: bytes, project_id: int) -> Optional[bytes]:
+    """Return the cached gzip encoding of ``body``, compressing it on first use."""
+    if not GZIP_ENABLED or len(body) < GZIP_MIN_BYTES:
+        return None
+    gzip_key = (key, "gzip")
+    compressed = feature_collection_cache.get(gzip_key)
+    if compressed is None:
+        compressed = gzip.compress(body, compresslevel=6)
+        feature_collection_cache.set(gzip_key, compressed, group=project_id)
+    return compressed
@@ -0,0 +1,231 @@
+import io
+import struct
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+from sqlalchemy import Float, Text, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Feature representations by Accept media type; GeoJSON is the default
+FEATURE_MEDIA_TYPES = {
+    "geojson": "application/geo+json",
+    "fgb": "application/flatgeobuf",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "wkb": "application/vnd.outbreakx.wkb-stream",
+}
+ACCEPT_FORMATS = {
+    **{media_type: fmt for fmt, media_type in FEATURE_MEDIA_TYPES.items()},
+    "application/json": "geojson",
+    "application/*": "geojson",
+    "*/*": "geojson",
+}
+# Properties sidecar of the WKB stream: one JSON object per line, same order
+PROPERTIES_MEDIA_TYPE = "application/x-ndjson"
+# Rows fetched per round trip when streaming a binary format
+FORMAT_BATCH_ROWS = 5000
+
+ARROW_TYPES = {
+    "smallint": pa.int16(),
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "real": pa.float32(),
+    "double precision": pa.float64(),
+    "numeric": pa.float64(),
+    "boolean": pa.bool_(),
+    "date": pa.date32(),
+    "timestamp without time zone": pa.timestamp("us"),
+    "timestamp with time zone": pa.timestamp("us", tz="UTC"),
+    "character varying": pa.string(),
+    "character": pa.string(),
+    "text": pa.string(),
+}
+# Canonical Arrow extension marking JSON text columns
+JSON_TYPES = {"json", "jsonb"}
+GEOARROW_WKB = {
+    b"ARROW:extension:name": b"geoarrow.wkb",
+    b"ARROW:extension:metadata": b'{"crs":"OGC:CRS84"}',
+}
+
+
+def negotiate_format(accept: Optional[str]) -> Optional[str]:
+    """
+    Pick the feature format for an ``Accept`` header: the acceptable media
+    type with the highest q-value, in header order on ties. No header means
+    GeoJSON; None means nothing offered is acceptable (406).
+    """
+    if not accept:
+        return "geojson"
+    ranges = []
+    for position, media_range in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        fmt = ACCEPT_FORMATS.get(media_type.lower())
+        if fmt is not None and quality > 0:
+            ranges.append((-quality, position, fmt))
+    return min(ranges)[2] if ranges else None
+
+
+def _attribute(rows, name: str, data_type: str):
+    """A rows column converted to something both FlatGeobuf and Arrow can carry."""
+    if data_type == "numeric":
+        return rows.c[name].cast(Float(53)).label(name)
+    if data_type not in ARROW_TYPES:
+        return rows.c[name].cast(Text).label(name)
+    return rows.c[name]
+
+
+def arrow_schema(columns: Sequence[Tuple[str, str]]) -> pa.Schema:
+    """Arrow schema for ``(name, data_type)`` attributes plus a GeoArrow WKB geometry."""
+    fields = [
+        pa.field(
+            name,
+            ARROW_TYPES.get(data_type, pa.string()),
+            metadata={b"ARROW:extension:name": b"arrow.json"} if data_type in JSON_TYPES else None,
+        )
+        for name, data_type in columns
+    ]
+    fields.append(pa.field("geometry", pa.binary(), metadata=GEOARROW_WKB))
+    return pa.schema(fields)
+
+
+def binary_query(rows, columns: Sequence[Tuple[str, str]]):
+    """
+    Primary key, attributes and EPSG:4326 WKB of a rows query (selecting
+    ``_pk``, ``_geometry`` and the attributes), in primary key order.
+    """
+    rows = rows.subquery("q")
+    return select(
+        rows.c._pk,
+        *(_attribute(rows, name, data_type) for name, data_type in columns),
+        func.ST_AsBinary(rows.c._geometry).label("_wkb"),
+    ).order_by(rows.c._pk)
+
+
+def flatgeobuf_query(rows, columns: Sequence[Tuple[str, str]], limit: Optional[int] = None):
+    """
+    One FlatGeobuf document (no spatial index) of a rows query.
+
+    With ``limit`` (for a rows query selecting ``limit + 1`` rows to detect a
+    next page) only the first ``limit`` rows are encoded, and the primary key
+    of the last encoded row and the number of rows selected are returned too.
+    """
+    rows = rows.cte("q") if limit is not None else rows.subquery("q")
+    page = (
+        select(
+            *(_attribute(rows, name, data_type) for name, data_type in columns),
+            rows.c._geometry,
+        )
+        .order_by(rows.c._pk)
+        .limit(limit)
+        .subquery("f")
+    )
+    document = func.ST_AsFlatGeobuf(literal_column("f"), False, "_geometry")
+    if limit is None:
+        return select(document).select_from(page)
+    return select(
+        document,
+        select(rows.c._pk).order_by(rows.c._pk).offset(limit - 1).limit(1).scalar_subquery(),
+        select(func.count()).select_from(rows).scalar_subquery(),
+    ).select_from(page)
+
+
+def properties_query(rows, properties_json):
+    """
+    The WKB stream's sidecar: ``{"id": ..., "properties": ...}`` per row of a
+    rows subquery, in the same order. ``properties_json`` is built from the
+    subquery's columns.
+    """
+    return select(
+        rows.c._pk,
+        func.jsonb_build_object(
+            literal_column("'id'"), rows.c._pk, literal_column("'properties'"), properties_json
+        ).cast(Text),
+    ).order_by(rows.c._pk)
+
+
+def wkb_frames(geometries: Sequence[Optional[bytes]]) -> bytes:
+    """Frame WKB values as ``<uint32 little-endian length><WKB>``; length 0 is a null geometry."""
+    out = bytearray()
+    for wkb in geometries:
+        wkb = wkb or b""
+        out += struct.pack("<I", len(wkb))
+        out += wkb
+    return bytes(out)
+
+
+class ArrowStreamEncoder:
+    """
+    Encode row batches as an Arrow IPC stream, one record batch per call; the
+    schema message goes out with the first batch.
+    """
+
+    def __init__(self, columns: Sequence[Tuple[str, str]]):
+        self.schema = arrow_schema(columns)
+        self._buffer = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._buffer, self.schema)
+
+    def _take(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def batch(self, rows: Sequence[Sequence]) -> bytes:
+        """Encode rows of ``(pk, *attributes, wkb)`` as one record batch."""
+        values = list(zip(*rows)) if rows else [()] * (len(self.schema) + 1)
+        arrays = [
+            pa.array(column_values, type=field.type)
+            for column_values, field in zip(values[1:], self.schema)
+        ]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        return self._take()
+
+    def close(self) -> bytes:
+        """The end-of-stream marker."""
+        self._writer.close()
+        return self._take()
+
+
+def encode_rows(fmt: str, columns: Sequence[Tuple[str, str]], rows: List[Sequence]) -> bytes:
+    """Encode rows from ``binary_query`` at once as ``wkb`` frames or an ``arrow`` stream."""
+    if fmt == "wkb":
+        return wkb_frames([row[-1] for row in rows])
+    encoder = ArrowStreamEncoder(columns)
+    return encoder.batch(rows) + encoder.close()
+
+
+async def stream_binary(
+    engine: AsyncEngine, fmt: str, query, columns: Sequence[Tuple[str, str]]
+) -> AsyncIterator[bytes]:
+    """
+    Stream a ``binary_query`` as ``wkb`` frames or an ``arrow`` IPC stream
+    from a dedicated connection, FORMAT_BATCH_ROWS rows per server-side
+    cursor fetch. Values go from the driver straight into frames or Arrow
+    arrays.
+    """
+    async with engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=FORMAT_BATCH_ROWS))
+        if fmt == "wkb":
+            async for rows in result.partitions():
+                yield wkb_frames([row[-1] for row in rows])
+            return
+
+        encoder = ArrowStreamEncoder(columns)
+        async for rows in result.partitions():
+            yield encoder.batch(rows)
+        yield encoder.close()
+
+
+async def stream_properties(engine: AsyncEngine, query) -> AsyncIterator[bytes]:
+    """Stream a ``properties_query`` as NDJSON lines from a dedicated connection."""
+    async with engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=FORMAT_BATCH_ROWS))
+        async for rows in result.partitions():
+            yield ("\n".join(row[1] for row in rows) + "\n").encode()
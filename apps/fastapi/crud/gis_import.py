@@ -1,47 +1,298 @@
+import hashlib
+import logging
 import os
 import subprocess
 import threading
-from sqlalchemy.orm import Session
-from fastapi import UploadFile
+import time
+from typing import AsyncIterator, Dict, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
 from uuid import uuid4
-from config.database import get_ogr_pg_dsn  # <-- add this
+from sqlalchemy import select, text
+from core.job_queue import DONE, BoundedJobQueue, Job, QueueFullError
+from core.multipart import MultipartFileReader
+from crud.layer_catalog import collect_layer_metadata, upsert_catalog_entry
+from crud.layers import ensure_layer_attribute_indexes, ensure_layer_spatial_index, quote_ident
+from models.layer_catalog import LayerCatalog
 
+logger = logging.getLogger(__name__)
 
-def _run_ogr2ogr_thread(filepath: str, table_name: str, db_url: str):
+# At most GIS_IMPORT_WORKERS ogr2ogr processes run at once; further uploads
+# wait in a queue of GIS_IMPORT_QUEUE_SIZE and are rejected beyond that.
+import_queue = BoundedJobQueue(
+    "gis-import",
+    workers=int(os.getenv("GIS_IMPORT_WORKERS", 2)),
+    max_queue=int(os.getenv("GIS_IMPORT_QUEUE_SIZE", 16)),
+    history=int(os.getenv("GIS_IMPORT_JOB_HISTORY", 1000)),
+)
+IMPORT_TIMEOUT_SECONDS = float(os.getenv("GIS_IMPORT_TIMEOUT_SECONDS", 600))
+# Uploads are copied to disk CHUNK_BYTES at a time and refused past MAX_UPLOAD_BYTES
+MAX_UPLOAD_BYTES = int(os.getenv("GIS_UPLOAD_MAX_BYTES", 4 * 1024**3))
+CHUNK_BYTES = int(os.getenv("GIS_UPLOAD_CHUNK_BYTES", 1024 * 1024))
+# Allowance for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# Attribute indexes created per imported layer; 0 disables them
+ATTRIBUTE_INDEX_MAX = int(os.getenv("LAYER_ATTRIBUTE_INDEX_MAX", 8))
+# Tail of ogr2ogr's stderr kept on the job for diagnosis
+STDERR_LIMIT = 16 * 1024
+
+# Imports that are queued or running, by file checksum, so an identical
+# upload arriving meanwhile joins the existing job
+_inflight: Dict[str, Job] = {}
+_inflight_lock = threading.Lock()
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds GIS_UPLOAD_MAX_BYTES."""
+
+
+class UploadSpool:
+    """
+    Writes an upload to ``filepath`` as it arrives, hashing it on the way.
+
+    Past ``max_bytes`` the partial file is removed and ``UploadTooLargeError``
+    is raised, so neither memory nor disk use can exceed the limit.
+    """
+
+    def __init__(self, filepath: str, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.filepath = filepath
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._file = open(filepath, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.discard()
+            raise UploadTooLargeError(f"Upload exceeds the {self.max_bytes} byte limit")
+        self._digest.update(chunk)
+        self._file.write(chunk)
+
+    def finish(self) -> Tuple[int, str]:
+        """Close the file and return ``(size, sha256 hex digest)``."""
+        self._file.close()
+        return self.size, self._digest.hexdigest()
+
+    def discard(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.filepath)
+        except FileNotFoundError:
+            pass
+
+
+async def spool_multipart_upload(
+    body: AsyncIterator[bytes],
+    content_type: str,
+    field_name: str = "file",
+    max_bytes: int = MAX_UPLOAD_BYTES,
+) -> Tuple[str, str, int, str]:
+    """
+    Write the file field of a streamed multipart/form-data body straight to
+    /tmp, without spooling the request first.
+
+    The limit is enforced on the bytes received, so an oversized upload is cut
+    off as soon as it passes ``max_bytes`` (``UploadTooLargeError``). Returns
+    ``(filename, filepath, size, sha256 hex digest)``; the caller owns the
+    file. Raises ``MultipartError`` for a malformed body.
+    """
+    reader = MultipartFileReader(content_type, field_name)
+    spool: Optional[UploadSpool] = None
+    buffer = bytearray()
+    received = 0
+    try:
+        async for chunk in body:
+            received += len(chunk)
+            if received > max_bytes + MULTIPART_OVERHEAD_BYTES:
+                raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+            for data in reader.feed(chunk):
+                buffer += data
+            if reader.filename is not None and spool is None:
+                ext = reader.filename.split(".")[-1]
+                if not ext.isalnum():
+                    ext = "bin"
+                filepath = os.path.join("/tmp", f"{uuid4()}.{ext}")
+                spool = await run_in_threadpool(UploadSpool, filepath, max_bytes)
+            if spool is not None and len(buffer) >= CHUNK_BYTES:
+                await run_in_threadpool(spool.write, bytes(buffer))
+                buffer.clear()
+        reader.finish()
+        if buffer:
+            await run_in_threadpool(spool.write, bytes(buffer))
+        size, checksum = await run_in_threadpool(spool.finish)
+    except BaseException:
+        if spool is not None:
+            await run_in_threadpool(spool.discard)
+        raise
+    return reader.filename, spool.filepath, size, checksum
+
+
+def file_checksum(filepath: str) -> Tuple[int, str]:
+    """``(size, sha256 hex digest)`` of a file already on disk, read in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(filepath, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            digest.update(chunk)
+    return size, digest.hexdigest()
+
+
+def find_imported_layer(checksum: str) -> Optional[Tuple[str, int]]:
+    """
+    Return ``(table_name, feature_count)`` of a layer already imported from a
+    file with this checksum, skipping catalog rows whose table was dropped.
+    """
+    from config.database import get_engine
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(
+            select(LayerCatalog.table_name, LayerCatalog.feature_count)
+            .where(LayerCatalog.checksum == checksum)
+            .order_by(LayerCatalog.created_at.desc())
+        ).all()
+        for table_name, feature_count in rows:
+            exists = conn.execute(
+                text("SELECT to_regclass(:name) IS NOT NULL"),
+                {"name": f"public.{quote_ident(table_name)}"},
+            ).scalar_one()
+            if exists:
+                return table_name, feature_count
+    return None
+
+
+def _run_ogr2ogr(job: Job, filepath: str, table_name: str, dsn: str) -> None:
     try:
         cmd = [
             "ogr2ogr",
             "-f",
             "PostgreSQL",
-            f"PG:{db_url}",
+            f"PG:{dsn}",
             filepath,
             "-nln",
             table_name,
             "-overwrite",
+            "-lco",
+            "SPATIAL_INDEX=GIST",
         ]
-        subprocess.run(cmd, check=True)
-        print(f"[INFO] Successfully imported {filepath} to {table_name}")
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] ogr2ogr failed: {e}")
+        try:
+            completed = subprocess.run(
+                cmd, capture_output=True, text=True, timeout=IMPORT_TIMEOUT_SECONDS
+            )
+        except subprocess.TimeoutExpired as e:
+            # TimeoutExpired carries raw bytes even in text mode
+            stderr = e.stderr.decode(errors="replace") if isinstance(e.stderr, bytes) else e.stderr
+            job.result["stderr"] = (stderr or "")[-STDERR_LIMIT:] or None
+            job.error = f"ogr2ogr timed out after {IMPORT_TIMEOUT_SECONDS:.0f} s"
+            raise
+        job.result["stderr"] = completed.stderr[-STDERR_LIMIT:] or None
+        if completed.returncode != 0:
+            job.error = f"ogr2ogr exited with status {completed.returncode}"
+            raise RuntimeError(job.error)
+
+        from config.database import get_engine
+
+        with get_engine().begin() as conn:
+            ensure_layer_spatial_index(conn, table_name)
+            if ATTRIBUTE_INDEX_MAX > 0:
+                indexed = ensure_layer_attribute_indexes(conn, table_name, ATTRIBUTE_INDEX_MAX)
+                if indexed:
+                    logger.info(f"Indexed {table_name} on {', '.join(indexed)}")
+            metadata = collect_layer_metadata(conn, table_name)
+            job.result["feature_count"] = metadata["feature_count"]
+            upsert_catalog_entry(
+                conn,
+                table_name,
+                filename=job.result.get("filename"),
+                checksum=job.result.get("checksum"),
+                size_bytes=job.result.get("size_bytes"),
+                import_seconds=round(time.time() - job.started_at, 3),
+                **metadata,
+            )
+        logger.info(
+            f"Imported {job.result['feature_count']} features from {filepath} to {table_name}"
+        )
     finally:
         os.remove(filepath)
+        with _inflight_lock:
+            if _inflight.get(job.result.get("checksum")) is job:
+                del _inflight[job.result["checksum"]]
 
 
-def handle_gis_file(file: UploadFile, db_session: Session) -> str:
-    from config.database import get_ogr_pg_dsn
+def queue_gis_import(
+    filepath: str, filename: str, dsn: str, size: int, checksum: str
+) -> Job:
+    """
+    Queue the import of a file that is already on disk; the import owns and
+    finally removes ``filepath``.
 
-    dsn = get_ogr_pg_dsn()  # Get GDAL-style PG connection string
-    ext = file.filename.split(".")[-1]
-    filename = f"{uuid4()}.{ext}"
-    filepath = os.path.join("/tmp", filename)
+    If a layer was already imported from identical bytes, or an identical
+    import is in flight, that layer's job is returned instead and ogr2ogr is
+    not run again. Raises ``QueueFullError`` when the import queue is saturated.
+    """
+    with _inflight_lock:
+        pending = _inflight.get(checksum)
+    if pending is not None:
+        os.remove(filepath)
+        return pending
 
-    with open(filepath, "wb") as f:
-        f.write(file.file.read())
+    # The catalog lookup is a database round trip, so it runs without the
+    # lock; _inflight is checked again before queueing below
+    try:
+        existing = find_imported_layer(checksum)
+    except Exception as e:
+        # Deduplication is an optimization; import normally without it
+        logger.warning(f"Layer checksum lookup failed: {e}")
+        existing = None
+    if existing is not None:
+        os.remove(filepath)
+        table_name, feature_count = existing
+        logger.info(f"Upload {filename} matches layer {table_name}, skipping import")
+        now = time.time()
+        return import_queue.record(
+            Job(
+                job_id=uuid4().hex,
+                run=lambda job: None,
+                state=DONE,
+                created_at=now,
+                started_at=now,
+                finished_at=now,
+                result={
+                    "table_name": table_name,
+                    "filename": filename,
+                    "checksum": checksum,
+                    "size_bytes": size,
+                    "feature_count": feature_count,
+                    "deduplicated": True,
+                },
+            )
+        )
 
-    table_name = f"layer_{uuid4().hex[:8]}"  # unique table name for each uplaod
-    thread = threading.Thread(
-        target=_run_ogr2ogr_thread, args=(filepath, table_name, dsn)
-    )
-    thread.start()
+    with _inflight_lock:
+        pending = _inflight.get(checksum)
+        if pending is not None:
+            os.remove(filepath)
+            return pending
 
-    return table_name
+        table_name = f"layer_{uuid4().hex[:8]}"  # unique table name for each uplaod
+        job = Job(
+            job_id=uuid4().hex,
+            run=lambda job: _run_ogr2ogr(job, filepath, table_name, dsn),
+            result={
+                "table_name": table_name,
+                "filename": filename,
+                "checksum": checksum,
+                "size_bytes": size,
+            },
+        )
+        try:
+            import_queue.submit(job)
+        except QueueFullError:
+            os.remove(filepath)
+            raise
+        _inflight[checksum] = job
+        return job
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from core.cache import LRUCache
+from crud.layers import get_layer_columns, get_layer_geometry, list_layer_tables, quote_ident
+from models.layer_catalog import LayerCatalog
+
+logger = logging.getLogger(__name__)
+
+# Encoded /file_upload/layers response. Imports in this process drop it
+# right away; other worker processes pick changes up within the TTL.
+catalog_cache = LRUCache(
+    max_bytes=8 * 1024 * 1024,
+    max_entries=4,
+    ttl_seconds=float(os.getenv("LAYER_CATALOG_CACHE_TTL_SECONDS", 30)),
+)
+CATALOG_CACHE_KEY = "layer_catalog"
+
+
+def collect_layer_metadata(db: Session, table_name: str) -> Dict[str, Any]:
+    """
+    Measure a layer table once: geometry column, type and SRID, feature count,
+    EPSG:4326 bounding box, on-disk size and attribute column schema.
+    """
+    table = f"public.{quote_ident(table_name)}"
+    geometry = get_layer_geometry(db, table_name)
+    geometry_column, srid = geometry if geometry else (None, None)
+
+    metadata: Dict[str, Any] = {
+        "geometry_column": geometry_column,
+        "srid": srid,
+        "geometry_type": None,
+        "bbox": None,
+        "columns": [
+            {"name": name, "type": data_type}
+            for name, data_type in get_layer_columns(db, table_name)
+            if name != geometry_column
+        ],
+        "table_bytes": db.execute(
+            text("SELECT pg_total_relation_size(to_regclass(:name))"), {"name": table}
+        ).scalar(),
+    }
+
+    if geometry_column is None:
+        metadata["feature_count"] = db.execute(text(f"SELECT count(*) FROM {table}")).scalar_one()
+        return metadata
+
+    # One scan for the count, extent and geometry type; the extent is
+    # transformed once rather than every geometry
+    geom = quote_ident(geometry_column)
+    row = db.execute(
+        text(
+            f"""
+            WITH stats AS (
+                SELECT count(*) AS n,
+                       ST_Extent({geom})::geometry AS extent,
+                       min(GeometryType({geom})) AS min_type,
+                       max(GeometryType({geom})) AS max_type
+                FROM {table}
+            ), box AS (
+                SELECT *, CASE WHEN :srid IN (0, 4326) OR extent IS NULL THEN extent
+                               ELSE ST_Transform(ST_SetSRID(extent, :srid), 4326) END AS bounds
+                FROM stats
+            )
+            SELECT n, ST_XMin(bounds), ST_YMin(bounds), ST_XMax(bounds), ST_YMax(bounds),
+                   min_type, max_type
+            FROM box
+            """
+        ),
+        {"srid": srid or 0},
+    ).one()
+    metadata["feature_count"] = row[0]
+    if row[1] is not None:
+        metadata["bbox"] = [row[1], row[2], row[3], row[4]]
+    # geometry_columns says GEOMETRY for mixed layers; name the type when all rows agree
+    if row[5] is not None:
+        metadata["geometry_type"] = row[5] if row[5] == row[6] else "GEOMETRY"
+    return metadata
+
+
+def upsert_catalog_entry(db: Session, table_name: str, **fields: Any) -> None:
+    """Insert or update a layer's catalog row and drop the cached listing."""
+    values = {"table_name": table_name, **fields}
+    db.execute(
+        pg_insert(LayerCatalog)
+        .values(**values)
+        .on_conflict_do_update(index_elements=[LayerCatalog.table_name], set_=fields)
+    )
+    catalog_cache.clear()
+
+
+def sync_layer_catalog(db: Session) -> int:
+    """
+    Catalog layers imported before the catalog existed (or before it held
+    metadata) and drop rows whose table is gone. Returns the rows written.
+    """
+    tables = set(list_layer_tables(db))
+    catalogued = {
+        row.table_name: row.feature_count
+        for row in db.execute(select(LayerCatalog.table_name, LayerCatalog.feature_count))
+    }
+
+    stale = set(catalogued) - tables
+    if stale:
+        db.execute(delete(LayerCatalog).where(LayerCatalog.table_name.in_(stale)))
+
+    written = 0
+    for table_name in sorted(tables):
+        if catalogued.get(table_name) is None:
+            upsert_catalog_entry(db, table_name, **collect_layer_metadata(db, table_name))
+            written += 1
+    catalog_cache.clear()
+    return written
+
+
+def _entry(row: LayerCatalog) -> Dict[str, Any]:
+    return {
+        "table_name": row.table_name,
+        "filename": row.filename,
+        "geometry_type": row.geometry_type,
+        "geometry_column": row.geometry_column,
+        "srid": row.srid,
+        "feature_count": row.feature_count,
+        "bbox": row.bbox,
+        "table_bytes": row.table_bytes,
+        "size_bytes": row.size_bytes,
+        "columns": row.columns,
+        "import_seconds": row.import_seconds,
+        "checksum": row.checksum,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def list_catalog(db: Session) -> List[Dict[str, Any]]:
+    rows = db.execute(select(LayerCatalog).order_by(LayerCatalog.created_at)).scalars()
+    return [_entry(row) for row in rows]
+
+
+def catalog_listing(db: Session) -> bytes:
+    """The encoded catalog listing, from the in-process cache when fresh."""
+    body = catalog_cache.get(CATALOG_CACHE_KEY)
+    if body is None:
+        body = json.dumps(list_catalog(db), separators=(",", ":")).encode()
+        catalog_cache.set(CATALOG_CACHE_KEY, body)
+    return body
+
+
+def get_catalog_entry(db: Session, table_name: str) -> Optional[Dict[str, Any]]:
+    row = db.get(LayerCatalog, table_name)
+    return _entry(row) if row else None
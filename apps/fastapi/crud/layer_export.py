@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from crud.layers import get_layer_columns, get_layer_geometry, get_layer_primary_key
+from crud.spatial import SpatialFilter
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "fgb": "application/flatgeobuf",
+}
+# Output is flushed to the client in chunks of about this size
+EXPORT_CHUNK_BYTES = 256 * 1024
+# Rows fetched per round trip by the server-side cursor
+EXPORT_BATCH_ROWS = 5000
+
+
+@dataclass
+class LayerDescription:
+    table_name: str
+    columns: List[str]  # every non-geometry column, in table order
+    geometry_column: Optional[str]
+    srid: int
+    column_types: Dict[str, str]  # information_schema data_type by column
+    primary_key: Optional[str]
+
+
+def describe_layer(db: Session, table_name: str) -> Optional[LayerDescription]:
+    """Read a layer's columns and geometry from the catalog; None if the table is missing."""
+    column_types = dict(get_layer_columns(db, table_name))
+    if not column_types:
+        return None
+    geometry = get_layer_geometry(db, table_name)
+    geometry_column, srid = geometry if geometry else (None, 0)
+    column_types.pop(geometry_column, None)
+    return LayerDescription(
+        table_name=table_name,
+        columns=list(column_types),
+        geometry_column=geometry_column,
+        srid=srid or 0,
+        column_types=column_types,
+        primary_key=get_layer_primary_key(db, table_name),
+    )
+
+
+def _geometry_4326(layer: LayerDescription):
+    geometry = column(layer.geometry_column)
+    if layer.srid and layer.srid != 4326:
+        return func.ST_Transform(geometry, 4326)
+    return geometry
+
+
+def _base_query(layer: LayerDescription, spatial: Optional[SpatialFilter], *extra):
+    query = select(*(column(c) for c in layer.columns), *extra).select_from(
+        table(layer.table_name, schema="public")
+    )
+    if spatial is not None:
+        query = query.where(spatial.clause(column(layer.geometry_column), layer.srid))
+    return query
+
+
+def csv_query(layer: LayerDescription, spatial: Optional[SpatialFilter], geometry: str = "wkt"):
+    """
+    Attribute columns plus the geometry as ``wkt`` or as ``lon``/``lat``
+    (the point itself, or a point guaranteed to lie on other geometries).
+    Coordinates are EPSG:4326 whenever the layer's SRID is known.
+    """
+    extra = []
+    if layer.geometry_column is not None:
+        geom = _geometry_4326(layer)
+        if geometry == "lonlat":
+            point = func.ST_PointOnSurface(geom)
+            extra = [func.ST_X(point).label("lon"), func.ST_Y(point).label("lat")]
+        else:
+            extra = [func.ST_AsText(geom).label("wkt")]
+    return _base_query(layer, spatial, *extra)
+
+
+def ndjson_query(layer: LayerDescription, spatial: Optional[SpatialFilter]):
+    """One complete GeoJSON Feature per row, built by PostGIS from the whole record."""
+    rows = _base_query(
+        layer, spatial, _geometry_4326(layer).label(layer.geometry_column)
+    ).subquery("q")
+    return select(
+        func.ST_AsGeoJSON(literal_column("q.*"), layer.geometry_column, 15)
+    ).select_from(rows)
+
+
+def flatgeobuf_query(layer: LayerDescription, spatial: Optional[SpatialFilter]):
+    """The whole selection as one FlatGeobuf document (no spatial index), native SRID."""
+    rows = _base_query(layer, spatial, column(layer.geometry_column)).subquery("q")
+    return select(
+        func.ST_AsFlatGeobuf(literal_column("q"), False, layer.geometry_column)
+    ).select_from(rows)
+
+
+def _chunked(data: bytes, size: int = EXPORT_CHUNK_BYTES):
+    view = memoryview(data)
+    for start in range(0, len(view), size):
+        yield bytes(view[start:start + size])
+
+
+async def stream_copy_csv(engine: AsyncEngine, query) -> AsyncIterator[bytes]:
+    """
+    Stream ``COPY (query) TO STDOUT WITH CSV HEADER`` from a dedicated connection.
+
+    PostgreSQL does the CSV quoting; rows are regrouped into chunks of about
+    EXPORT_CHUNK_BYTES and a small queue applies backpressure, so memory stays
+    bounded by a few chunks whatever the layer size.
+    """
+    async with engine.connect() as conn:
+        sql = str(query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+        raw = await conn.get_raw_connection()
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=4)
+        end = object()
+        buffer = bytearray()
+
+        async def output(data) -> None:
+            buffer.extend(data)
+            if len(buffer) >= EXPORT_CHUNK_BYTES:
+                await chunks.put(bytes(buffer))
+                buffer.clear()
+
+        async def run_copy() -> None:
+            try:
+                await raw.driver_connection.copy_from_query(
+                    sql, output=output, format="csv", header=True
+                )
+                if buffer:
+                    await chunks.put(bytes(buffer))
+            finally:
+                await chunks.put(end)
+
+        copy_task = asyncio.create_task(run_copy())
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is end:
+                    break
+                yield chunk
+            await copy_task  # re-raise a failed COPY
+        finally:
+            if not copy_task.done():
+                # The client went away mid-COPY: abort it and drop the connection
+                copy_task.cancel()
+                try:
+                    await copy_task
+                except BaseException:
+                    pass
+                await conn.invalidate()
+
+
+async def stream_ndjson(engine: AsyncEngine, query) -> AsyncIterator[bytes]:
+    """Stream one Feature per line from a server-side cursor, EXPORT_BATCH_ROWS at a time."""
+    async with engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        async for features in result.scalars().partitions():
+            data = "\n".join(features) + "\n"
+            for chunk in _chunked(data.encode()):
+                yield chunk
+
+
+async def stream_flatgeobuf(engine: AsyncEngine, query) -> AsyncIterator[bytes]:
+    """
+    Send the FlatGeobuf document produced by ST_AsFlatGeobuf in chunks.
+
+    The aggregate returns a single value, so this format is buffered once
+    rather than streamed row by row.
+    """
+    async with engine.connect() as conn:
+        data = await conn.scalar(query)
+    for chunk in _chunked(data or b""):
+        yield chunk
@@ -0,0 +1,204 @@
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Text, column, func, literal_column, select, table
+from sqlalchemy.dialects.postgresql import JSONB
+
+from crud.layer_export import LayerDescription
+from crud.spatial import DEFAULT_PRECISION, GeometryOptions, SpatialFilter
+
+# Query parameters with a fixed meaning; every other parameter is an
+# attribute filter of the form <column>=<value> or <column>__<op>=<value>
+RESERVED_PARAMS = {
+    "bbox", "intersects", "limit", "after", "properties", "zoom", "tolerance", "precision",
+}
+
+OPERATORS = {
+    "eq": lambda c, v: c == v,
+    "ne": lambda c, v: c != v,
+    "gt": lambda c, v: c > v,
+    "gte": lambda c, v: c >= v,
+    "lt": lambda c, v: c < v,
+    "lte": lambda c, v: c <= v,
+    "in": lambda c, v: c.in_(v),
+}
+# Range operators only make sense on ordered types
+ORDERED_OPERATORS = {"gt", "gte", "lt", "lte"}
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in ("true", "t", "1", "yes"):
+        return True
+    if lowered in ("false", "f", "0", "no"):
+        return False
+    raise ValueError(f"'{value}' is not a boolean")
+
+
+def _parse_decimal(value: str) -> Decimal:
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"'{value}' is not a number")
+
+
+# Keep in sync with crud.layers.INDEXABLE_TYPES, which adds indexes for these
+PARSERS: Dict[str, Callable[[str], Any]] = {
+    "smallint": int,
+    "integer": int,
+    "bigint": int,
+    "numeric": _parse_decimal,
+    "real": float,
+    "double precision": float,
+    "date": date.fromisoformat,
+    "timestamp without time zone": datetime.fromisoformat,
+    "timestamp with time zone": datetime.fromisoformat,
+    "boolean": _parse_bool,
+    "character varying": str,
+    "character": str,
+    "text": str,
+}
+
+
+def parse_attribute_filters(
+    params: Iterable[Tuple[str, str]], layer: LayerDescription
+) -> list:
+    """
+    Turn ``<column>[__<op>]=<value>`` pairs into SQL conditions.
+
+    Columns must exist on the layer and values must parse as the column's
+    type; anything else raises ``ValueError`` so it never reaches the query.
+    """
+    conditions = []
+    for key, raw_value in params:
+        if key in RESERVED_PARAMS:
+            continue
+        name, _, op = key.partition("__")
+        op = op or "eq"
+        if op not in OPERATORS:
+            raise ValueError(
+                f"Unknown operator '{op}' in '{key}'; use one of {', '.join(OPERATORS)}"
+            )
+        data_type = layer.column_types.get(name)
+        if data_type is None:
+            raise ValueError(f"Layer '{layer.table_name}' has no column '{name}'")
+        parser = PARSERS.get(data_type)
+        if parser is None:
+            raise ValueError(f"Column '{name}' of type {data_type} cannot be filtered")
+        if op in ORDERED_OPERATORS and data_type == "boolean":
+            raise ValueError(f"Column '{name}' does not support '{op}'")
+
+        try:
+            if op == "in":
+                value = [parser(v) for v in raw_value.split(",")]
+            else:
+                value = parser(raw_value)
+        except ValueError as e:
+            raise ValueError(f"Invalid value for '{key}': {e}")
+        conditions.append(OPERATORS[op](column(name), value))
+    return conditions
+
+
+def parse_projection(properties: Optional[str], layer: LayerDescription) -> List[str]:
+    """Validate a comma-separated column list; all attribute columns by default."""
+    if not properties:
+        return layer.columns
+    selected = list(dict.fromkeys(name.strip() for name in properties.split(",") if name.strip()))
+    unknown = [name for name in selected if name not in layer.column_types]
+    if unknown:
+        raise ValueError(f"Layer '{layer.table_name}' has no column(s): {', '.join(unknown)}")
+    return selected
+
+
+def _sql_string(value: str):
+    # Keys of jsonb_build_object are inlined: asyncpg cannot infer parameter
+    # types for its variadic "any" arguments
+    return literal_column("'" + value.replace("'", "''") + "'")
+
+
+def features_page_rows(
+    layer: LayerDescription,
+    properties: List[str],
+    conditions: list,
+    spatial: Optional[SpatialFilter],
+    after: Optional[int],
+    limit: int,
+    geometry_options: Optional[GeometryOptions] = None,
+):
+    """
+    Rows of one keyset page ordered by the primary key: ``_pk``, the EPSG:4326
+    ``_geometry`` (simplified when ``geometry_options`` carries a tolerance)
+    and the ``properties`` columns. ``limit + 1`` rows are selected to detect
+    a next page.
+    """
+    pk = column(layer.primary_key)
+    geometry = column(layer.geometry_column)
+    if layer.srid and layer.srid != 4326:
+        geometry = func.ST_Transform(geometry, 4326)
+    if geometry_options is not None:
+        geometry = geometry_options.simplify(geometry)
+
+    rows = (
+        select(
+            pk.label("_pk"),
+            geometry.label("_geometry"),
+            *(column(name) for name in properties),
+        )
+        .select_from(table(layer.table_name, schema="public"))
+        .where(*conditions)
+        .order_by(pk)
+        .limit(limit + 1)
+    )
+    if spatial is not None:
+        rows = rows.where(spatial.clause(column(layer.geometry_column), layer.srid))
+    if after is not None:
+        rows = rows.where(pk > after)
+    return rows
+
+
+def properties_json(rows, properties: List[str]):
+    """A JSONB object of the ``properties`` columns of a rows subquery."""
+    # jsonb_build_object takes at most 100 arguments, so wide projections
+    # are built 50 columns at a time and merged
+    result = None
+    for offset in range(0, len(properties), 50):
+        part = func.jsonb_build_object(
+            *(
+                arg
+                for name in properties[offset:offset + 50]
+                for arg in (_sql_string(name), rows.c[name])
+            )
+        )
+        result = part if result is None else result.op("||")(part)
+    if result is None:
+        result = func.jsonb_build_object()
+    return result
+
+
+def features_page_query(
+    layer: LayerDescription,
+    properties: List[str],
+    conditions: list,
+    spatial: Optional[SpatialFilter],
+    after: Optional[int],
+    limit: int,
+    geometry_options: Optional[GeometryOptions] = None,
+):
+    """
+    One keyset page of GeoJSON Feature strings ordered by the primary key,
+    plus that key. ``limit + 1`` rows are selected to detect a next page.
+    Geometries are simplified in EPSG:4326 when ``geometry_options`` carries
+    a tolerance.
+    """
+    rows = features_page_rows(
+        layer, properties, conditions, spatial, after, limit, geometry_options
+    ).subquery("q")
+    precision = geometry_options.precision if geometry_options else DEFAULT_PRECISION
+    feature = func.jsonb_build_object(
+        _sql_string("type"), _sql_string("Feature"),
+        _sql_string("id"), rows.c._pk,
+        _sql_string("geometry"), func.ST_AsGeoJSON(rows.c._geometry, precision).cast(JSONB),
+        _sql_string("properties"), properties_json(rows, properties),
+    )
+    return select(rows.c._pk, feature.cast(Text)).order_by(rows.c._pk)
@@ -0,0 +1,195 @@
+import hashlib
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Column types the attribute filters of /layers/{table_name}/features accept
+# and that get a btree index after import
+INDEXABLE_TYPES = {
+    "smallint",
+    "integer",
+    "bigint",
+    "numeric",
+    "real",
+    "double precision",
+    "date",
+    "timestamp without time zone",
+    "timestamp with time zone",
+    "character varying",
+    "character",
+    "text",
+}
+# Longer text columns are free-form descriptions rather than filter keys
+MAX_INDEXED_AVG_WIDTH = 64
+
+# Tables created by the ogr2ogr import are named layer_<hex>; anything else is
+# rejected before it can reach an SQL statement.
+LAYER_TABLE_PATTERN = re.compile(r"^layer_[a-z0-9_]{1,56}$")
+
+
+def normalize_layer_name(table_name: str) -> str:
+    """Strip an optional ``public.`` prefix and validate an imported layer table name."""
+    if table_name.startswith("public."):
+        table_name = table_name[len("public."):]
+    if not LAYER_TABLE_PATTERN.match(table_name):
+        raise ValueError("Invalid table name")
+    return table_name
+
+
+def get_layer_geometry(db: Session, table_name: str) -> Optional[Tuple[str, int]]:
+    """Return the ``(column, srid)`` of a layer's geometry, or None if it has none."""
+    row = db.execute(
+        text(
+            """
+            SELECT f_geometry_column, srid
+            FROM geometry_columns
+            WHERE f_table_schema = 'public' AND f_table_name = :table_name
+            LIMIT 1
+            """
+        ),
+        {"table_name": table_name},
+    ).first()
+    if row is None:
+        return None
+    return row[0], row[1]
+
+
+def get_layer_columns(db: Session, table_name: str) -> List[Tuple[str, str]]:
+    """Return ``(name, data_type)`` for every column of a layer table, in order."""
+    rows = db.execute(
+        text(
+            """
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = :table_name
+            ORDER BY ordinal_position
+            """
+        ),
+        {"table_name": table_name},
+    ).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def get_layer_primary_key(db: Session, table_name: str) -> Optional[str]:
+    """Return the single-column primary key of a layer (``ogc_fid`` for ogr2ogr imports)."""
+    rows = db.execute(
+        text(
+            """
+            SELECT a.attname
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = to_regclass(:name) AND i.indisprimary
+            """
+        ),
+        {"name": f"public.{quote_ident(table_name)}"},
+    ).all()
+    return rows[0][0] if len(rows) == 1 else None
+
+
+def quote_ident(name: str) -> str:
+    """Quote an identifier that was read from the catalog for use in raw SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def list_layer_tables(db: Session) -> List[str]:
+    """Return the names of every imported layer table."""
+    rows = db.execute(
+        text(
+            """
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = 'public'
+            AND table_name LIKE 'layer\\_%'
+            """
+        )
+    ).all()
+    return [row[0] for row in rows]
+
+
+def ensure_layer_spatial_index(db: Session, table_name: str) -> bool:
+    """
+    Create a GiST index on a layer's geometry column unless one already exists,
+    then refresh planner statistics. Returns True when an index was created.
+    """
+    geometry = get_layer_geometry(db, table_name)
+    if geometry is None:
+        return False
+    geometry_column, _ = geometry
+
+    exists = db.execute(
+        text(
+            """
+            SELECT 1 FROM pg_indexes
+            WHERE schemaname = 'public' AND tablename = :table_name
+            AND indexdef ILIKE '%USING gist%'
+            """
+        ),
+        {"table_name": table_name},
+    ).first()
+    if exists:
+        return False
+
+    db.execute(
+        text(
+            f"CREATE INDEX IF NOT EXISTS {quote_ident(table_name + '_geom_gist')} "
+            f"ON public.{quote_ident(table_name)} USING GIST ({quote_ident(geometry_column)})"
+        )
+    )
+    db.execute(text(f"ANALYZE public.{quote_ident(table_name)}"))
+    return True
+
+
+def _index_name(table_name: str, column_name: str) -> str:
+    name = f"{table_name}_{column_name}_idx"
+    if len(name) > 63 or not re.match(r"^[a-z0-9_]+$", name):
+        name = f"{table_name}_{hashlib.sha1(column_name.encode()).hexdigest()[:10]}_idx"
+    return name
+
+
+def ensure_layer_attribute_indexes(db: Session, table_name: str, max_indexes: int = 8) -> List[str]:
+    """
+    Create btree indexes on the attribute columns most likely to be filtered.
+
+    Statistics are refreshed first; numeric, date and short text columns are
+    indexed in table order unless they hold a single value, up to
+    ``max_indexes``. Returns the indexed column names.
+    """
+    table = f"public.{quote_ident(table_name)}"
+    db.execute(text(f"ANALYZE {table}"))
+    primary_key = get_layer_primary_key(db, table_name)
+    rows = db.execute(
+        text(
+            """
+            SELECT c.column_name, c.data_type, s.n_distinct, s.avg_width
+            FROM information_schema.columns c
+            LEFT JOIN pg_stats s
+              ON s.schemaname = c.table_schema
+             AND s.tablename = c.table_name
+             AND s.attname = c.column_name
+            WHERE c.table_schema = 'public' AND c.table_name = :table_name
+            ORDER BY c.ordinal_position
+            """
+        ),
+        {"table_name": table_name},
+    ).all()
+
+    indexed = []
+    for column_name, data_type, n_distinct, avg_width in rows:
+        if len(indexed) >= max_indexes:
+            break
+        if column_name == primary_key or data_type not in INDEXABLE_TYPES:
+            continue
+        if avg_width is not None and avg_width > MAX_INDEXED_AVG_WIDTH:
+            continue
+        if n_distinct is not None and n_distinct == 1:
+            continue
+        db.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS {quote_ident(_index_name(table_name, column_name))} "
+                f"ON {table} ({quote_ident(column_name)})"
+            )
+        )
+        indexed.append(column_name)
+    return indexed
@@ -0,0 +1,157 @@
+import io
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Row, func, select, text
+from sqlalchemy.orm import Session
+
+from crud.spatial import SpatialFilter
+from models import models
+
+# (longitude, latitude, description)
+PointRow = Tuple[float, float, Optional[str]]
+
+
+class InvalidPointError(ValueError):
+    """Raised when an incoming point cannot be parsed."""
+
+
+def parse_point(item: Dict[str, Any]) -> PointRow:
+    """
+    Parse a single point from either a GeoJSON Point Feature or the
+    ``PointCreate`` shape accepted by ``POST /point``.
+    """
+    if not isinstance(item, dict):
+        raise InvalidPointError("expected a JSON object")
+
+    if item.get("type") == "Feature":
+        geometry = item.get("geometry") or {}
+        properties = item.get("properties") or {}
+        description = properties.get("description")
+    else:
+        geometry = item.get("location") or {}
+        description = item.get("description")
+
+    if geometry.get("type") != "Point":
+        raise InvalidPointError("geometry must be a Point")
+
+    coordinates = geometry.get("coordinates")
+    if not isinstance(coordinates, (list, tuple)) or len(coordinates) != 2:
+        raise InvalidPointError(
+            "Coordinates must contain exactly two values (longitude and latitude)."
+        )
+
+    try:
+        lon, lat = float(coordinates[0]), float(coordinates[1])
+    except (TypeError, ValueError):
+        raise InvalidPointError("coordinates must be numbers")
+    if not (math.isfinite(lon) and math.isfinite(lat)):
+        raise InvalidPointError("coordinates must be finite numbers")
+
+    if description is not None:
+        description = str(description)
+    return lon, lat, description
+
+
+def _copy_escape(value: Optional[str]) -> str:
+    """Escape a value for the PostgreSQL COPY text format."""
+    if value is None:
+        return "\\N"
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_points_batch(db: Session, rows: List[PointRow]) -> List[int]:
+    """
+    Insert a batch of points into the ``shape`` table with a single COPY.
+
+    COPY cannot return generated keys, so ids are reserved up front from the
+    table's sequence in one round trip and written explicitly. The work runs
+    inside the session's current transaction; committing is left to the caller.
+    """
+    if not rows:
+        return []
+
+    table = models.Point.__tablename__
+    ids = list(
+        db.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                "FROM generate_series(1, :n)"
+            ),
+            {"table": table, "n": len(rows)},
+        ).scalars()
+    )
+
+    buffer = io.StringIO()
+    for point_id, (lon, lat, description) in zip(ids, rows):
+        buffer.write(
+            f"{point_id}\tSRID=4326;POINT({lon!r} {lat!r})\t{_copy_escape(description)}\n"
+        )
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} (id, location_point, description) FROM STDIN", buffer
+        )
+    finally:
+        cursor.close()
+    return ids
+
+
+
+def _points_query(
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    spatial: Optional[SpatialFilter] = None,
+):
+    """Select points with their coordinates computed in PostGIS, ordered by id."""
+    stmt = select(
+        models.Point.id,
+        func.ST_X(models.Point.location_point).label("lon"),
+        func.ST_Y(models.Point.location_point).label("lat"),
+        models.Point.description,
+    ).order_by(models.Point.id)
+    if after_id is not None:
+        stmt = stmt.where(models.Point.id > after_id)
+    if spatial is not None:
+        stmt = stmt.where(spatial.clause(models.Point.location_point))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def fetch_points_page(
+    db: Session,
+    after_id: Optional[int],
+    limit: int,
+    spatial: Optional[SpatialFilter] = None,
+) -> List[Row]:
+    """Fetch one keyset page of points in a single query."""
+    return db.execute(_points_query(after_id, limit, spatial)).all()
+
+
+def iter_point_batches(
+    db: Session,
+    after_id: Optional[int] = None,
+    spatial: Optional[SpatialFilter] = None,
+    batch_size: int = 5000,
+) -> Iterator[List[Row]]:
+    """
+    Stream every point after ``after_id`` through a server-side cursor.
+
+    A dedicated connection is checked out from the session's engine so the
+    stream can outlive the request-scoped session, and only ``batch_size``
+    rows are held in memory at a time.
+    """
+    with db.get_bind().connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(_points_query(after_id, spatial=spatial))
+        for partition in result.partitions():
+            yield partition
@@ -0,0 +1,651 @@
+import hashlib
+import json
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import shapely
+from geoalchemy2.shape import from_shape, to_shape
+from shapely.geometry import shape as shapely_shape
+from shapely.geometry.base import BaseGeometry
+from sqlalchemy import delete, func, insert, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.spatial import GeometryOptions, SpatialFilter
+from models.project_feature import ProjectFeature, ProjectFeatureChange, ProjectVersion
+from schemas.geojson import FeatureOperation, GeoJSONFeature
+
+logger = logging.getLogger(__name__)
+
+FEATURE_ADDED = "added"
+FEATURE_MODIFIED = "modified"
+FEATURE_DELETED = "deleted"
+# Versions of change history kept per project; clients that fall further
+# behind are told to resync in full
+CHANGE_LOG_VERSIONS = int(os.getenv("FEATURE_CHANGE_LOG_VERSIONS", 1000))
+
+# One GeoJSON Feature per row, assembled by PostgreSQL. It decodes to the same
+# value as db_feature_to_geojson (members, the "type" property, coordinates to
+# ``precision`` decimals), but the bytes differ: jsonb::text puts a space after
+# ":" and "," and orders keys shortest first, and whole-number coordinates are
+# written as 77 rather than 77.0. PostgreSQL has no compact jsonb output, so
+# clients must compare parsed JSON, never bodies from the two paths.
+FEATURE_JSON_SQL = """
+'{{"type":"Feature","geometry":' || ST_AsGeoJSON({geometry}, {precision})
+|| ',"properties":'
+|| (properties || jsonb_build_object('type', COALESCE(NULLIF(type, ''), 'unknown')))::text
+|| ',"id":' || id || '}}'
+"""
+
+
+def feature_json_sql(geometry: Optional[GeometryOptions] = None) -> str:
+    """FEATURE_JSON_SQL with the simplification and precision of ``geometry`` applied."""
+    geometry = geometry or GeometryOptions()
+    return FEATURE_JSON_SQL.format(
+        geometry=geometry.simplify_sql("geometry"), precision=int(geometry.precision)
+    )
+
+
+# Attribute columns of project features in the binary formats of crud.feature_formats
+PROJECT_FEATURE_COLUMNS = [
+    ("id", "integer"),
+    ("type", "character varying"),
+    ("properties", "jsonb"),
+]
+
+
+def project_feature_rows(
+    project_id: int,
+    spatial: Optional[SpatialFilter] = None,
+    geometry: Optional[GeometryOptions] = None,
+):
+    """
+    A project's features as a rows query for crud.feature_formats: ``_pk``,
+    the (optionally simplified) ``_geometry`` and PROJECT_FEATURE_COLUMNS.
+    """
+    geometry = geometry or GeometryOptions()
+    stmt = select(
+        ProjectFeature.id.label("_pk"),
+        geometry.simplify(ProjectFeature.geometry).label("_geometry"),
+        ProjectFeature.id,
+        ProjectFeature.type,
+        ProjectFeature.properties,
+    ).where(ProjectFeature.project_id == project_id)
+    if spatial is not None:
+        stmt = stmt.where(spatial.clause(ProjectFeature.geometry))
+    return stmt
+
+
+def project_properties_json(rows):
+    """Feature properties of a ``project_feature_rows`` subquery, with "type" as in GeoJSON."""
+    return rows.c.properties.op("||")(
+        func.jsonb_build_object(
+            literal_column("'type'"),
+            func.coalesce(func.nullif(rows.c.type, ""), literal_column("'unknown'")),
+        )
+    )
+
+
+@dataclass
+class PreparedFeature:
+    """An incoming GeoJSON feature reduced to what is stored in ``project_features``."""
+
+    geometry: BaseGeometry
+    type: str
+    properties: Dict[str, Any]
+    content_hash: str
+
+    def values(self, project_id: int) -> Dict[str, Any]:
+        """Column values of the stored row, for bulk INSERT / UPDATE statements."""
+        return {
+            "project_id": project_id,
+            "geometry": from_shape(self.geometry, srid=4326),
+            "type": self.type,
+            "properties": self.properties,
+            "content_hash": self.content_hash,
+        }
+
+    def to_model(self, project_id: int) -> ProjectFeature:
+        return ProjectFeature(**self.values(project_id))
+
+
+def _canonical_numbers(value: Any) -> Any:
+    # 1.0 and 1 are the same JSON number (jsonb may store either), so
+    # integral floats are hashed as integers
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {k: _canonical_numbers(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_canonical_numbers(v) for v in value]
+    return value
+
+
+def feature_content_hash(
+    geometry: BaseGeometry, feature_type: str, properties: Dict[str, Any]
+) -> str:
+    """
+    Compute the canonical content hash of a feature.
+
+    The geometry is normalized (ring orientation, vertex and part order) and
+    encoded as little-endian WKB; properties are serialized with sorted keys
+    and integral floats as integers. Two features that only differ in those
+    representations hash the same.
+    """
+    digest = hashlib.sha256()
+    digest.update(shapely.to_wkb(shapely.normalize(geometry), byte_order=1))
+    digest.update(b"\0")
+    digest.update(
+        json.dumps(
+            {"type": feature_type, "properties": _canonical_numbers(properties)},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
+def prepare_feature(feature: GeoJSONFeature) -> PreparedFeature:
+    """
+    Convert an incoming GeoJSON feature into its stored form.
+
+    The feature type comes from ``properties.type`` and falls back to the
+    lowercased geometry type. Raises ``ValueError`` for invalid geometries.
+    """
+    feature_type = getattr(feature.properties, "type", None) if feature.properties else None
+    if not feature_type and hasattr(feature.geometry, "type"):
+        feature_type = feature.geometry.type.lower()
+    feature_type = feature_type or "unknown"
+
+    try:
+        geometry = shapely_shape(feature.geometry)
+    except Exception as e:
+        raise ValueError(f"invalid geometry: {e}") from e
+
+    properties = (
+        feature.properties.dict(exclude={"type"}, exclude_none=True)
+        if feature.properties
+        else {}
+    )
+    return PreparedFeature(
+        geometry=geometry,
+        type=feature_type,
+        properties=properties,
+        content_hash=feature_content_hash(geometry, feature_type, properties),
+    )
+
+
+def prepare_features(features: List[GeoJSONFeature]) -> List[PreparedFeature]:
+    """Prepare a batch of features; the ``ValueError`` names the failing position."""
+    prepared = []
+    for idx, feature in enumerate(features, 1):
+        try:
+            prepared.append(prepare_feature(feature))
+        except ValueError as e:
+            raise ValueError(f"Error processing geometry for feature {idx}: {e}") from e
+    return prepared
+
+
+def match_features(
+    existing: Sequence[Tuple[int, str]], prepared: List[PreparedFeature]
+) -> Tuple[List[PreparedFeature], List[int]]:
+    """
+    Diff an incoming collection against the stored ``(id, content_hash)`` rows.
+
+    Returns the incoming features that have no stored twin (to insert) and the
+    ids of stored rows nothing matched (to delete). Each stored row is matched
+    by at most one incoming feature, so duplicates are kept as duplicates.
+    """
+    existing_by_hash: Dict[str, List[int]] = defaultdict(list)
+    for feature_id, content_hash in existing:
+        existing_by_hash[content_hash].append(feature_id)
+
+    new_features = []
+    matched_ids = set()
+    for feature in prepared:
+        matching_ids = existing_by_hash.get(feature.content_hash)
+        if matching_ids:
+            matched_ids.add(matching_ids.pop())
+        else:
+            new_features.append(feature)
+
+    unmatched_ids = [feature_id for feature_id, _ in existing if feature_id not in matched_ids]
+    return new_features, unmatched_ids
+
+
+async def backfill_content_hashes(db: AsyncSession, feature_ids: List[int]) -> Dict[int, str]:
+    """
+    Compute and store hashes for rows written before ``content_hash`` existed.
+
+    This is the only place stored geometries are decoded, and it runs once per
+    legacy row.
+    """
+    hashes: Dict[int, str] = {}
+    if not feature_ids:
+        return hashes
+
+    result = await db.execute(
+        select(ProjectFeature).where(ProjectFeature.id.in_(feature_ids))
+    )
+    for feature in result.scalars():
+        properties = {
+            k: v
+            for k, v in (feature.properties or {}).items()
+            if k not in ("created_at", "updated_at")
+        }
+        hashes[feature.id] = feature_content_hash(
+            to_shape(feature.geometry), feature.type, properties
+        )
+
+    await db.execute(
+        update(ProjectFeature),
+        [{"id": feature_id, "content_hash": h} for feature_id, h in hashes.items()],
+    )
+    logger.info(f"Backfilled content hashes for {len(hashes)} features")
+    return hashes
+
+
+async def iter_feature_json_batches(
+    db: AsyncSession,
+    project_id: int,
+    spatial: Optional[SpatialFilter] = None,
+    batch_size: int = 2000,
+    geometry: Optional[GeometryOptions] = None,
+) -> AsyncIterator[List[str]]:
+    """
+    Stream a project's features as ready-encoded GeoJSON Feature strings.
+
+    Rows come from a server-side cursor on a dedicated connection, in id
+    order, ``batch_size`` at a time; no geometry objects are built in Python.
+    ``geometry`` simplifies and quantizes coordinates in PostGIS.
+    """
+    stmt = (
+        select(literal_column(feature_json_sql(geometry)))
+        .select_from(ProjectFeature)
+        .where(ProjectFeature.project_id == project_id)
+        .order_by(ProjectFeature.id)
+    )
+    if spatial is not None:
+        stmt = stmt.where(spatial.clause(ProjectFeature.geometry))
+
+    async with db.bind.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.scalars().partitions():
+            yield partition
+
+
+async def get_project_version(db: AsyncSession, project_id: int) -> int:
+    """Current version of a project's features; 0 if it was never written."""
+    version = await db.scalar(
+        select(ProjectVersion.version).where(ProjectVersion.project_id == project_id)
+    )
+    return version or 0
+
+
+async def bump_project_version(db: AsyncSession, project_id: int) -> int:
+    """
+    Increment a project's version inside the caller's transaction and return
+    the new value. The row is locked until commit, which also serializes
+    concurrent writers of the same project.
+    """
+    stmt = (
+        pg_insert(ProjectVersion)
+        .values(project_id=project_id, version=1)
+        .on_conflict_do_update(
+            index_elements=[ProjectVersion.project_id],
+            set_={"version": ProjectVersion.version + 1, "updated_at": func.now()},
+        )
+        .returning(ProjectVersion.version)
+    )
+    return (await db.execute(stmt)).scalar_one()
+
+
+class VersionConflictError(Exception):
+    """A patch was based on an older project version; ``version`` is the current one."""
+
+    def __init__(self, message: str, version: int):
+        super().__init__(message)
+        self.version = version
+
+
+class FeatureNotFoundError(LookupError):
+    """Operations referenced feature ids that the project does not have."""
+
+    def __init__(self, message: str, ids: List[int]):
+        super().__init__(message)
+        self.ids = ids
+
+
+@dataclass
+class PatchResult:
+    version: int
+    added_ids: List[int] = field(default_factory=list)
+    replaced: int = 0
+    deleted: int = 0
+    updated: int = 0
+
+
+def prepare_operations(operations: List[FeatureOperation]) -> List[Optional[PreparedFeature]]:
+    """
+    Prepare the features carried by add / replace operations (None for the
+    others); the ``ValueError`` names the failing operation.
+    """
+    prepared = []
+    for idx, operation in enumerate(operations, 1):
+        if operation.feature is None:
+            prepared.append(None)
+            continue
+        try:
+            prepared.append(prepare_feature(operation.feature))
+        except ValueError as e:
+            raise ValueError(f"Error processing geometry for operation {idx}: {e}") from e
+    return prepared
+
+
+def merge_properties(
+    feature_type: str, properties: Dict[str, Any], changes: Dict[str, Any]
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Apply a properties-only update: keys are set, null values remove keys and
+    ``type`` changes the feature type, as ``prepare_feature`` stores it.
+    """
+    merged = dict(properties)
+    for key, value in changes.items():
+        if key == "type":
+            if value is not None and (not isinstance(value, str) or not value):
+                raise ValueError("properties.type must be a non-empty string")
+            feature_type = value or feature_type
+        elif value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+    return feature_type, merged
+
+
+async def lock_project_version(db: AsyncSession, project_id: int) -> int:
+    """
+    Lock a project's version row until the caller's transaction ends (creating
+    it at 0 for a project never written) and return the current version.
+    """
+    await db.execute(
+        pg_insert(ProjectVersion)
+        .values(project_id=project_id, version=0)
+        .on_conflict_do_nothing(index_elements=[ProjectVersion.project_id])
+    )
+    return (
+        await db.execute(
+            select(ProjectVersion.version)
+            .where(ProjectVersion.project_id == project_id)
+            .with_for_update()
+        )
+    ).scalar_one()
+
+
+async def apply_feature_operations(
+    db: AsyncSession,
+    project_id: int,
+    expected_version: int,
+    operations: List[FeatureOperation],
+    prepared: List[Optional[PreparedFeature]],
+) -> PatchResult:
+    """
+    Apply a patch inside the caller's transaction and bump the project version.
+
+    The version row is locked first and must still equal ``expected_version``
+    (``VersionConflictError`` otherwise); every referenced id must belong to
+    the project (``FeatureNotFoundError``). Each kind of operation is one bulk
+    statement, and only the rows named by the patch are read, so the cost
+    follows the size of the patch rather than of the project.
+    """
+    version = await lock_project_version(db, project_id)
+    if version != expected_version:
+        raise VersionConflictError(
+            f"Project {project_id} is at version {version}, not {expected_version}", version
+        )
+
+    by_op: Dict[str, List[Tuple[FeatureOperation, Optional[PreparedFeature]]]] = {
+        "add": [], "replace": [], "delete": [], "update_properties": []
+    }
+    for operation, feature in zip(operations, prepared):
+        by_op[operation.op].append((operation, feature))
+
+    target_ids = [operation.id for operation in operations if operation.id is not None]
+    if target_ids:
+        found = set(
+            (
+                await db.scalars(
+                    select(ProjectFeature.id)
+                    .where(ProjectFeature.project_id == project_id)
+                    .where(ProjectFeature.id.in_(target_ids))
+                    .with_for_update()
+                )
+            ).all()
+        )
+        missing = sorted(set(target_ids) - found)
+        if missing:
+            raise FeatureNotFoundError(
+                f"Features not found in project {project_id}: {', '.join(map(str, missing))}",
+                missing,
+            )
+
+    result = PatchResult(version=version)
+
+    if by_op["add"]:
+        result.added_ids = list(
+            (
+                await db.scalars(
+                    insert(ProjectFeature).returning(ProjectFeature.id, sort_by_parameter_order=True),
+                    [feature.values(project_id) for _, feature in by_op["add"]],
+                )
+            ).all()
+        )
+
+    if by_op["replace"]:
+        await db.execute(
+            update(ProjectFeature),
+            [{"id": operation.id, **feature.values(project_id)} for operation, feature in by_op["replace"]],
+        )
+        result.replaced = len(by_op["replace"])
+
+    if by_op["delete"]:
+        await db.execute(
+            delete(ProjectFeature).where(
+                ProjectFeature.id.in_([operation.id for operation, _ in by_op["delete"]])
+            )
+        )
+        result.deleted = len(by_op["delete"])
+
+    if by_op["update_properties"]:
+        rows = {
+            row.id: row
+            for row in await db.execute(
+                select(
+                    ProjectFeature.id,
+                    ProjectFeature.geometry,
+                    ProjectFeature.type,
+                    ProjectFeature.properties,
+                ).where(
+                    ProjectFeature.id.in_([operation.id for operation, _ in by_op["update_properties"]])
+                )
+            )
+        }
+        updates = []
+        for operation, _ in by_op["update_properties"]:
+            row = rows[operation.id]
+            feature_type, properties = merge_properties(
+                row.type, row.properties or {}, operation.properties
+            )
+            updates.append(
+                {
+                    "id": operation.id,
+                    "type": feature_type,
+                    "properties": properties,
+                    "content_hash": feature_content_hash(
+                        to_shape(row.geometry), feature_type, properties
+                    ),
+                }
+            )
+        await db.execute(update(ProjectFeature), updates)
+        result.updated = len(updates)
+
+    result.version = await bump_project_version(db, project_id)
+    await record_feature_changes(
+        db,
+        project_id,
+        result.version,
+        added=result.added_ids,
+        modified=[
+            operation.id
+            for operation in operations
+            if operation.op in ("replace", "update_properties")
+        ],
+        deleted=[operation.id for operation, _ in by_op["delete"]],
+    )
+    return result
+
+
+async def record_feature_changes(
+    db: AsyncSession,
+    project_id: int,
+    version: int,
+    added: Sequence[int] = (),
+    modified: Sequence[int] = (),
+    deleted: Sequence[int] = (),
+) -> None:
+    """
+    Append a write's changes to the change log, inside the caller's transaction
+    and after ``bump_project_version``. Entries more than CHANGE_LOG_VERSIONS
+    versions old are compacted away and the project's ``changes_floor`` raised.
+    """
+    rows = [
+        {"project_id": project_id, "version": version, "feature_id": feature_id, "op": op}
+        for op, feature_ids in (
+            (FEATURE_ADDED, added),
+            (FEATURE_MODIFIED, modified),
+            (FEATURE_DELETED, deleted),
+        )
+        for feature_id in feature_ids
+    ]
+    if rows:
+        await db.execute(insert(ProjectFeatureChange), rows)
+
+    floor = version - CHANGE_LOG_VERSIONS
+    if floor > 0:
+        raised = await db.execute(
+            update(ProjectVersion)
+            .where(ProjectVersion.project_id == project_id)
+            .where(func.coalesce(ProjectVersion.changes_floor, 0) < floor)
+            .values(changes_floor=floor)
+        )
+        if raised.rowcount:
+            await db.execute(
+                delete(ProjectFeatureChange)
+                .where(ProjectFeatureChange.project_id == project_id)
+                .where(ProjectFeatureChange.version <= floor)
+            )
+
+
+@dataclass
+class FeatureChanges:
+    """Net effect of the writes to a project after some version."""
+
+    version: int
+    resync: bool = False
+    added: List[int] = field(default_factory=list)
+    modified: List[int] = field(default_factory=list)
+    deleted: List[int] = field(default_factory=list)
+
+
+async def get_feature_changes(db: AsyncSession, project_id: int, since: int) -> FeatureChanges:
+    """
+    Collapse the change log after ``since`` to one entry per feature: added
+    (possibly modified later), modified, or deleted. Features added and
+    deleted again within the range do not appear at all. ``resync`` is set
+    when the log no longer reaches back to ``since``. Raises ``ValueError``
+    when ``since`` is ahead of the project.
+    """
+    row = (
+        await db.execute(
+            select(ProjectVersion.version, ProjectVersion.changes_floor)
+            .where(ProjectVersion.project_id == project_id)
+        )
+    ).first()
+    version = row.version if row else 0
+    floor = (row.changes_floor if row.changes_floor is not None else row.version) if row else 0
+    if since > version:
+        raise ValueError(f"since={since} is ahead of project {project_id} (version {version})")
+    if since < floor:
+        return FeatureChanges(version=version, resync=True)
+
+    result = await db.execute(
+        select(ProjectFeatureChange.feature_id, ProjectFeatureChange.op)
+        .where(ProjectFeatureChange.project_id == project_id)
+        .where(ProjectFeatureChange.version > since)
+        .order_by(ProjectFeatureChange.version, ProjectFeatureChange.id)
+    )
+    return collapse_changes(version, result)
+
+
+def collapse_changes(version: int, entries: Iterable[Tuple[int, str]]) -> FeatureChanges:
+    """
+    Net effect of ``(feature_id, op)`` log entries in write order: the first
+    and last entry of each feature decide, so added-then-modified is added,
+    anything ending in a delete is deleted unless it started with an add (then
+    it is dropped), and the rest is modified.
+    """
+    first: Dict[int, str] = {}
+    last: Dict[int, str] = {}
+    for feature_id, op in entries:
+        first.setdefault(feature_id, op)
+        last[feature_id] = op
+
+    changes = FeatureChanges(version=version)
+    for feature_id, op in first.items():
+        if last[feature_id] == FEATURE_DELETED:
+            if op != FEATURE_ADDED:
+                changes.deleted.append(feature_id)
+        elif op == FEATURE_ADDED:
+            changes.added.append(feature_id)
+        else:
+            changes.modified.append(feature_id)
+    return changes
+
+
+async def changed_feature_json(db: AsyncSession, project_id: int, since: int) -> Dict[int, str]:
+    """
+    Encoded GeoJSON Features (as in FEATURE_JSON_SQL) of the project's
+    features that have change log entries after ``since``, by id.
+    """
+    changed_ids = (
+        select(ProjectFeatureChange.feature_id)
+        .where(ProjectFeatureChange.project_id == project_id)
+        .where(ProjectFeatureChange.version > since)
+    )
+    result = await db.execute(
+        select(ProjectFeature.id, literal_column(feature_json_sql()))
+        .where(ProjectFeature.project_id == project_id)
+        .where(ProjectFeature.id.in_(changed_ids))
+    )
+    return dict(result.all())
+
+
+async def read_feature_changes(
+    db: AsyncSession, project_id: int, since: int
+) -> Tuple[FeatureChanges, Dict[int, str]]:
+    """
+    ``get_feature_changes`` plus ``changed_feature_json`` for its added and
+    modified features, read in one REPEATABLE READ snapshot so a write or a
+    compaction committed between the statements cannot make them disagree.
+    Must be the first use of ``db`` in its transaction.
+    """
+    await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    changes = await get_feature_changes(db, project_id, since)
+    features: Dict[int, str] = {}
+    if changes.added or changes.modified:
+        features = await changed_feature_json(db, project_id, since)
+    return changes, features
@@ -0,0 +1,128 @@
+import json
+import math
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from shapely.geometry import shape as shapely_shape
+from sqlalchemy import and_, func
+
+
+# Coordinate decimals PostGIS writes when no precision is requested
+DEFAULT_PRECISION = 15
+MAX_ZOOM = 24
+
+
+@dataclass(frozen=True)
+class GeometryOptions:
+    """
+    How geometries are written out: an optional simplification tolerance in
+    degrees (ST_SimplifyPreserveTopology) and the number of coordinate decimals.
+    """
+
+    tolerance: Optional[float] = None
+    precision: int = DEFAULT_PRECISION
+
+    def simplify(self, geometry):
+        """Wrap a geometry expression in ST_SimplifyPreserveTopology when a tolerance is set."""
+        if not self.tolerance:
+            return geometry
+        return func.ST_SimplifyPreserveTopology(geometry, self.tolerance)
+
+    def simplify_sql(self, geometry_sql: str) -> str:
+        """Same as ``simplify`` for raw SQL; the tolerance is a validated float."""
+        if not self.tolerance:
+            return geometry_sql
+        return f"ST_SimplifyPreserveTopology({geometry_sql}, {float(self.tolerance)!r})"
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """Size in degrees of one 256 px web-map pixel at ``zoom`` (at the equator)."""
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def tolerance_precision(tolerance: float) -> int:
+    """Decimals that resolve a tenth of ``tolerance``; finer digits are invisible."""
+    return max(0, min(DEFAULT_PRECISION, math.ceil(-math.log10(tolerance)) + 1))
+
+
+def build_geometry_options(
+    zoom: Optional[int] = None,
+    tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+) -> GeometryOptions:
+    """
+    Combine the ``zoom`` / ``tolerance`` / ``precision`` query parameters.
+
+    ``zoom`` derives the tolerance from the map resolution; without an
+    explicit ``precision`` the decimals then follow the tolerance too.
+    """
+    if zoom is not None and tolerance is not None:
+        raise ValueError("Pass either zoom or tolerance, not both")
+    if zoom is not None:
+        tolerance = zoom_tolerance(zoom)
+    if tolerance is not None and not (math.isfinite(tolerance) and tolerance > 0):
+        raise ValueError("tolerance must be a positive number of degrees")
+    if precision is None:
+        precision = tolerance_precision(tolerance) if tolerance else DEFAULT_PRECISION
+    return GeometryOptions(tolerance=tolerance, precision=precision)
+
+
+@dataclass(frozen=True)
+class SpatialFilter:
+    """A viewport and/or geometry filter; coordinates are always EPSG:4326."""
+
+    bbox: Optional[Tuple[float, float, float, float]] = None
+    geojson: Optional[str] = None
+
+    def clause(self, column, srid: int = 4326):
+        """Build an index-assisted ST_Intersects condition on ``column``."""
+        conditions = []
+        if self.bbox is not None:
+            conditions.append(func.ST_MakeEnvelope(*self.bbox, 4326))
+        if self.geojson is not None:
+            conditions.append(func.ST_SetSRID(func.ST_GeomFromGeoJSON(self.geojson), 4326))
+        if srid == 0:
+            # No declared SRID: the coordinates are read as EPSG:4326 (as when
+            # they are served), and PostGIS refuses to compare mixed SRIDs
+            conditions = [func.ST_SetSRID(geom, 0) for geom in conditions]
+        elif srid and srid != 4326:
+            conditions = [func.ST_Transform(geom, srid) for geom in conditions]
+        return and_(*(func.ST_Intersects(column, geom) for geom in conditions))
+
+
+def parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    """Parse ``minx,miny,maxx,maxy``; raises ``ValueError`` when malformed."""
+    try:
+        minx, miny, maxx, maxy = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("bbox must be four comma-separated numbers: minx,miny,maxx,maxy")
+    if not all(math.isfinite(v) for v in (minx, miny, maxx, maxy)):
+        raise ValueError("bbox values must be finite numbers")
+    if minx > maxx or miny > maxy:
+        raise ValueError("bbox minimums must not exceed its maximums")
+    return minx, miny, maxx, maxy
+
+
+def parse_intersects(value: str) -> str:
+    """Validate a GeoJSON geometry and return it re-serialized for PostGIS."""
+    try:
+        geometry = json.loads(value)
+        if not isinstance(geometry, dict) or "type" not in geometry:
+            raise ValueError("not a GeoJSON geometry")
+        if shapely_shape(geometry).is_empty:
+            raise ValueError("geometry is empty")
+    except Exception as e:
+        raise ValueError(f"intersects must be a GeoJSON geometry: {e}")
+    return json.dumps(geometry)
+
+
+def build_spatial_filter(
+    bbox: Optional[str] = None, intersects: Optional[str] = None
+) -> Optional[SpatialFilter]:
+    """Combine the ``bbox`` and ``intersects`` query parameters into one filter."""
+    if not bbox and not intersects:
+        return None
+    return SpatialFilter(
+        bbox=parse_bbox(bbox) if bbox else None,
+        geojson=parse_intersects(intersects) if intersects else None,
+    )
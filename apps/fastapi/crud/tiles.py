@@ -0,0 +1,115 @@
+import os
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from core.cache import LRUCache
+from crud.layers import quote_ident
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+MAX_ZOOM = 24
+
+# Encoded tiles keyed by (scope, id, z, x, y) and grouped by (scope, id);
+# project tiles also carry the project version, see project_tile_key
+tile_cache = LRUCache(
+    max_bytes=int(os.getenv("TILE_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    max_entries=int(os.getenv("TILE_CACHE_MAX_ENTRIES", 20000)),
+)
+
+
+def tile_in_range(z: int, x: int, y: int) -> bool:
+    """Check that x/y address an existing tile at zoom level z."""
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def project_tile_group(project_id: int) -> Tuple[str, int]:
+    return ("project", project_id)
+
+
+def project_tile_key(db: Session, project_id: int, z: int, x: int, y: int) -> Tuple:
+    """
+    Cache key of a project tile, including the project's current version.
+
+    The version is read before the tile is rendered, so a tile rendered while
+    a write commits can only be stored under the older version, which no
+    request asks for once the write is visible; invalidation alone would
+    race with such a render and leave a stale tile cached.
+    """
+    version = db.execute(
+        text("SELECT version FROM project_versions WHERE project_id = :project_id"),
+        {"project_id": project_id},
+    ).scalar()
+    return (*project_tile_group(project_id), version or 0, z, x, y)
+
+
+def invalidate_project_tiles(project_id: int) -> int:
+    """Drop every cached tile of a project; call after its features change."""
+    return tile_cache.invalidate_group(project_tile_group(project_id))
+
+
+def render_project_tile(db: Session, project_id: int, z: int, x: int, y: int) -> bytes:
+    """Build one MVT tile of a project's features in PostGIS."""
+    query = text(
+        f"""
+        WITH bounds AS (SELECT ST_TileEnvelope(:z, :x, :y) AS geom)
+        SELECT ST_AsMVT(tile, 'features', {TILE_EXTENT}, 'geom', 'id')
+        FROM (
+            SELECT f.id, f.type, f.properties,
+                   ST_AsMVTGeom(
+                       ST_Transform(f.geometry, 3857), bounds.geom,
+                       {TILE_EXTENT}, {TILE_BUFFER}, true
+                   ) AS geom
+            FROM project_features f, bounds
+            WHERE f.project_id = :project_id
+              AND f.geometry && ST_Transform(bounds.geom, 4326)
+        ) AS tile
+        WHERE tile.geom IS NOT NULL
+        """
+    )
+    tile = db.execute(query, {"project_id": project_id, "z": z, "x": x, "y": y}).scalar()
+    return bytes(tile or b"")
+
+
+def render_layer_tile(
+    db: Session,
+    table_name: str,
+    geometry_column: str,
+    srid: int,
+    columns: List[str],
+    z: int,
+    x: int,
+    y: int,
+) -> bytes:
+    """
+    Build one MVT tile of an imported layer in PostGIS.
+
+    ``table_name``, ``geometry_column`` and ``columns`` must come from the
+    database catalog, never from the request.
+    """
+    geom = f"t.{quote_ident(geometry_column)}"
+    if not srid:
+        # Layers imported without a CRS are assumed to be WGS84
+        geom, srid = f"ST_SetSRID({geom}, 4326)", 4326
+    attributes = "".join(f"t.{quote_ident(c)}, " for c in columns)
+    feature_id = "'ogc_fid'" if "ogc_fid" in columns else "NULL"
+
+    query = text(
+        f"""
+        WITH bounds AS (SELECT ST_TileEnvelope(:z, :x, :y) AS geom)
+        SELECT ST_AsMVT(tile, :layer, {TILE_EXTENT}, 'mvt_geom', {feature_id})
+        FROM (
+            SELECT {attributes}
+                   ST_AsMVTGeom(
+                       ST_Transform({geom}, 3857), bounds.geom,
+                       {TILE_EXTENT}, {TILE_BUFFER}, true
+                   ) AS mvt_geom
+            FROM public.{quote_ident(table_name)} t, bounds
+            WHERE {geom} && ST_Transform(bounds.geom, {int(srid)})
+        ) AS tile
+        WHERE tile.mvt_geom IS NOT NULL
+        """
+    )
+    tile = db.execute(query, {"layer": table_name, "z": z, "x": x, "y": y}).scalar()
+    return bytes(tile or b"")
@@ -0,0 +1,226 @@
+import fcntl
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+from uuid import uuid4
+
+from core.job_queue import Job, QueueFullError
+from crud.gis_import import MAX_UPLOAD_BYTES, file_checksum, import_queue, queue_gis_import
+
+logger = logging.getLogger(__name__)
+
+# Each session is a <id>.part staging file plus a <id>.json descriptor. The
+# committed offset is the size of the staging file, so the state survives
+# restarts and is shared by every worker process on the host.
+STAGING_DIR = os.getenv("GIS_UPLOAD_STAGING_DIR", "/tmp/outbreakx-uploads")
+SESSION_TTL_SECONDS = float(os.getenv("GIS_UPLOAD_SESSION_TTL_SECONDS", 24 * 3600))
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadSessionError(Exception):
+    """Base class for resumable upload failures."""
+
+
+class UploadSessionNotFound(UploadSessionError):
+    pass
+
+
+class OffsetMismatchError(UploadSessionError):
+    """A chunk did not start at the committed offset; ``offset`` says where to resume."""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+class SessionBusyError(UploadSessionError):
+    """Another request is currently appending to the same session."""
+
+
+class IncompleteUploadError(UploadSessionError):
+    pass
+
+
+class ChecksumMismatchError(UploadSessionError):
+    pass
+
+
+@dataclass
+class UploadSession:
+    upload_id: str
+    filename: str
+    size: int
+    checksum: Optional[str]
+    created_at: float
+
+    @property
+    def expires_at(self) -> float:
+        return self.created_at + SESSION_TTL_SECONDS
+
+
+def _paths(upload_id: str):
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        raise UploadSessionNotFound(f"Upload session '{upload_id}' not found")
+    base = os.path.join(STAGING_DIR, upload_id)
+    return base + ".part", base + ".json"
+
+
+def create_session(filename: str, size: int, checksum: Optional[str] = None) -> UploadSession:
+    """Register a new upload of ``size`` bytes and create its empty staging file."""
+    if size > MAX_UPLOAD_BYTES:
+        raise ValueError(f"Upload exceeds the {MAX_UPLOAD_BYTES} byte limit")
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    sweep_expired()
+
+    session = UploadSession(
+        upload_id=uuid4().hex,
+        filename=filename,
+        size=size,
+        checksum=checksum.lower() if checksum else None,
+        created_at=time.time(),
+    )
+    part_path, meta_path = _paths(session.upload_id)
+    open(part_path, "wb").close()
+    with open(meta_path, "w") as f:
+        json.dump(asdict(session), f)
+    return session
+
+
+def load_session(upload_id: str) -> UploadSession:
+    part_path, meta_path = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            session = UploadSession(**json.load(f))
+    except FileNotFoundError:
+        raise UploadSessionNotFound(f"Upload session '{upload_id}' not found") from None
+    if session.expires_at < time.time() or not os.path.exists(part_path):
+        delete_session(upload_id)
+        raise UploadSessionNotFound(f"Upload session '{upload_id}' has expired")
+    return session
+
+
+def current_offset(session: UploadSession) -> int:
+    """Number of bytes received so far; the next chunk must start here."""
+    part_path, _ = _paths(session.upload_id)
+    return os.path.getsize(part_path)
+
+
+class ChunkWriter:
+    """
+    Appends one byte range to a session's staging file.
+
+    The staging file is locked for the lifetime of the writer so concurrent
+    requests for the same session cannot interleave their bytes.
+    """
+
+    def __init__(self, session: UploadSession, start: int):
+        part_path, _ = _paths(session.upload_id)
+        self.session = session
+        self._file = open(part_path, "ab")
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            raise SessionBusyError("Another chunk is being written to this upload") from None
+
+        self.offset = os.fstat(self._file.fileno()).st_size
+        if start != self.offset:
+            self.close()
+            raise OffsetMismatchError(
+                f"Chunk starts at {start} but the upload is at offset {self.offset}",
+                self.offset,
+            )
+
+    def write(self, chunk: bytes) -> None:
+        if self.offset + len(chunk) > self.session.size:
+            raise ValueError(
+                f"Chunk runs past the declared upload size of {self.session.size} bytes"
+            )
+        self._file.write(chunk)
+        self.offset += len(chunk)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+
+
+def finalize_session(upload_id: str, dsn: str) -> Job:
+    """
+    Verify a complete upload and hand the staging file to the GIS import queue.
+
+    The staging file stays locked throughout, so chunk writes and a second
+    finalize of the same session get ``SessionBusyError``. The import gets a
+    hard link to the staging file and the session is consumed only once the
+    queue accepts the job: when the queue is saturated, ``QueueFullError`` is
+    raised and the session is kept so finalizing can be retried later.
+    """
+    session = load_session(upload_id)
+    part_path, meta_path = _paths(upload_id)
+    try:
+        part = open(part_path, "rb")
+    except FileNotFoundError:
+        raise UploadSessionNotFound(f"Upload session '{upload_id}' not found") from None
+
+    with part:
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise SessionBusyError("This upload is being written or finalized") from None
+        # A concurrent finalize may have consumed the session before the lock was taken
+        if not os.path.exists(meta_path):
+            raise UploadSessionNotFound(f"Upload session '{upload_id}' not found")
+
+        offset = os.fstat(part.fileno()).st_size
+        if offset != session.size:
+            raise IncompleteUploadError(
+                f"Upload has {offset} of {session.size} bytes; send the rest before finalizing"
+            )
+        if not import_queue.has_capacity():
+            raise QueueFullError(f"{import_queue.name} queue is full")
+
+        size, checksum = file_checksum(part_path)
+        if session.checksum and checksum != session.checksum:
+            delete_session(upload_id)
+            raise ChecksumMismatchError(
+                f"Upload checksum {checksum} does not match the declared {session.checksum}"
+            )
+
+        ext = session.filename.split(".")[-1]
+        if not ext.isalnum():
+            ext = "bin"
+        # The import owns and removes its link, also when the queue refuses it;
+        # the staging directory keeps it on the same file system
+        filepath = os.path.join(STAGING_DIR, f"{uuid4()}.{ext}")
+        os.link(part_path, filepath)
+        logger.info(f"Upload session {upload_id} complete ({size} bytes), queueing import")
+        job = queue_gis_import(filepath, session.filename, dsn, size, checksum)
+        delete_session(upload_id)
+        return job
+
+
+def delete_session(upload_id: str) -> None:
+    for path in _paths(upload_id):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def sweep_expired() -> None:
+    """Remove sessions older than GIS_UPLOAD_SESSION_TTL_SECONDS."""
+    cutoff = time.time() - SESSION_TTL_SECONDS
+    for name in os.listdir(STAGING_DIR):
+        upload_id, _, _ = name.partition(".")
+        path = os.path.join(STAGING_DIR, name)
+        try:
+            if UPLOAD_ID_PATTERN.match(upload_id) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                logger.info(f"Removed expired upload staging file {name}")
+        except FileNotFoundError:
+            pass
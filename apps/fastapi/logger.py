@@ -1,34 +1,21 @@
 import logging
 import os
-
-# Create a directory for logs if it doesn't exist
-log_directory = "logs"
-if not os.path.exists(log_directory):
-    os.makedirs(log_directory)
-
-# Define the log file path
-log_file = os.path.join(log_directory, "app.log")
-
-# Create a logger
-logger = logging.getLogger("fastapi")
-logger.setLevel(logging.DEBUG)  # Set the log level to DEBUG to capture all logs
-
-# Create a formatter
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-
-# Create a file handler for writing logs to a file
-file_handler = logging.FileHandler(log_file)
-file_handler.setLevel(logging.DEBUG)  # Log level for the file handler
-file_handler.setFormatter(formatter)
-
-# Create a console handler for logging to the console
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)  # Log level for the console handler
-console_handler.setFormatter(formatter)
-
-# Add the handlers to the logger
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
-
-# Test the logger
-logger.info("Logger is set up and ready to log messages.")
+from typing import List
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Also write logs to this file (e.g. logs/app.log) when set
+LOG_FILE = os.getenv("LOG_FILE")
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def configure_logging() -> None:
+    """
+    Set up root logging for the API. Called from the application lifespan,
+    not on import; a no-op when the server (or a test runner) has already
+    configured the root logger.
+    """
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if LOG_FILE:
+        os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+        handlers.append(logging.FileHandler(LOG_FILE))
+    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT, handlers=handlers)
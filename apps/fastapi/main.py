@@ -1,20 +1,61 @@
 import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from api.router import router
-from config.database import check_db_connection, init_db
+from config.database import created_engines, dispose_engines
+from core.compression import CompressionMiddleware
+from core.db_monitor import db_monitor, pool_stats
+from core.metrics import CONTENT_TYPE, MetricsMiddleware, registry, watch_job_queue, watch_pools
+from core.query_stats import QueryStatsMiddleware
+from core.responses import GeoJSONResponse
+from crud.feature_cache import feature_collection_cache, feature_render_flight
+from crud.gis_import import import_queue
+from crud.layer_catalog import catalog_cache
+from crud.tiles import tile_cache
+from logger import configure_logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Schema management is a separate step (python -m config.schema); set this
+# to also run it on startup, e.g. for single-instance development setups
+SCHEMA_ON_STARTUP = os.getenv("DB_SCHEMA_ON_STARTUP", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    logger.info("🚀 Starting application startup...")
+    # Health endpoints answer from the monitor's cached state; the first probe
+    # runs in the background, so serving never waits for the database
+    db_monitor.start()
+    if SCHEMA_ON_STARTUP:
+        # Imported here so the API itself never loads the schema tooling
+        from config.schema import init_db
+
+        try:
+            # Blocking DDL, kept off the event loop
+            await run_in_threadpool(init_db)
+        except Exception as e:
+            # Don't raise, so container platforms (e.g. Choreo) don't restart-loop
+            logger.error(f"❌ Database initialization failed: {str(e)}")
+    yield
+    await db_monitor.stop()
+    await dispose_engines()
+
+
 app = FastAPI(
     title="OutbreakX API",
     description="API for OutbreakX application",
     version="1.0.0",
     openapi_url="/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=GeoJSONResponse,
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -26,46 +67,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database initialization on startup
-@app.on_event("startup")
-async def startup_event():
-    logger.info("🚀 Starting application startup...")
-    try:
-        # Verify database connection first
-        if not check_db_connection():
-            logger.error("❌ Database connection check failed during startup")
-            return
-            
-        logger.info("🔌 Database connection established successfully")
-        
-        # Initialize database tables
-        if init_db():
-            logger.info("✅ Database initialization completed successfully")
-        else:
-            logger.error("❌ Database initialization failed")
-            
-    except Exception as e:
-        logger.error(f"❌ Error during startup: {str(e)}")
-        # Don't raise the exception to allow the application to start
-        # This is important for container environments like Choreo
-        # that might restart the container on startup failure
-
-# Health check endpoint with database status
+# gzip / brotli for bodies of COMPRESSION_MIN_BYTES and more, streamed chunk by chunk
+app.add_middleware(CompressionMiddleware)
+
+# Query count and DB time per request (Server-Timing), slow-query and N+1 logs
+app.add_middleware(QueryStatsMiddleware)
+
+# Per-route request counts, latency and response size histograms for /metrics;
+# outermost so its timings cover every other middleware
+app.add_middleware(MetricsMiddleware)
+
+# Only engines that already exist are reported; a scrape never creates one
+watch_pools(lambda: {name: pool_stats(engine) for name, engine in created_engines().items()})
+watch_job_queue(import_queue)
+
+# Health check endpoint with database status (cached by the monitor)
 @app.get("/api/v1/ping")
 async def ping():
-    db_status = "connected" if check_db_connection() else "disconnected"
+    db_status = "connected" if db_monitor.healthy else "disconnected"
     return {
         "status": "ok",
         "database": db_status
     }
 
+# Cache counters for sizing the in-process caches
+@app.get("/api/v1/cache/stats")
+async def cache_stats():
+    return {
+        "feature_collections": {
+            **feature_collection_cache.stats(),
+            "coalesced_misses": feature_render_flight.coalesced,
+        },
+        "tiles": tile_cache.stats(),
+        "layer_catalog": catalog_cache.stats(),
+    }
+
+# Prometheus scrape target
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
 # Include API router with version prefix
 app.include_router(router, prefix="/api/v1")
 
-# Root endpoint with health status
+# Root endpoint with health status (cached by the monitor)
 @app.get("/")
 async def root():
-    db_status = "connected" if check_db_connection() else "disconnected"
+    db_status = "connected" if db_monitor.healthy else "disconnected"
     return {
         "message": "OutbreakX API is running",
         "status": "healthy" if db_status == "connected" else "degraded",
@@ -1,6 +1,45 @@
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic import BaseModel, Field
 
 
 class FileUploadResponse(BaseModel):
     message: str
     table_name: str
+    job_id: Optional[str] = None
+    # True when an identical file was imported before and its layer is reused
+    deduplicated: bool = False
+
+
+class ImportJobStatus(BaseModel):
+    job_id: str
+    state: str  # queued, running, done or failed
+    table_name: str
+    filename: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    queue_wait_seconds: Optional[float] = None
+    run_seconds: Optional[float] = None
+    feature_count: Optional[int] = None
+    checksum: Optional[str] = None
+    size_bytes: Optional[int] = None
+    deduplicated: bool = False
+    error: Optional[str] = None
+    stderr: Optional[str] = None
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0, description="Total size of the file in bytes")
+    checksum: Optional[str] = Field(
+        None, pattern=r"^[0-9a-fA-F]{64}$", description="Optional sha256 of the whole file"
+    )
+
+
+class UploadSessionStatus(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    offset: int  # bytes received so far; the next chunk starts here
+    expires_at: float
@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, Column, DateTime, Float, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from config.database import Base
+
+
+class LayerCatalog(Base):
+    """One row per imported layer table, written once its import succeeded."""
+    __tablename__ = "layer_catalog"
+
+    table_name = Column(String(63), primary_key=True)
+    filename = Column(String)
+    # sha256 of the uploaded file, used to skip re-importing identical uploads
+    checksum = Column(String(64), index=True)
+    size_bytes = Column(BigInteger)  # size of the uploaded file
+    geometry_column = Column(String(63))
+    geometry_type = Column(String(32))
+    srid = Column(Integer)
+    feature_count = Column(BigInteger)
+    # [minx, miny, maxx, maxy] in EPSG:4326
+    bbox = Column(JSONB)
+    table_bytes = Column(BigInteger)  # on-disk size including indexes and TOAST
+    # [{"name": ..., "type": ...}] for every non-geometry column
+    columns = Column(JSONB)
+    import_seconds = Column(Float)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<LayerCatalog(table_name='{self.table_name}', filename='{self.filename}')>"
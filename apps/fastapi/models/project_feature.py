@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, ForeignKey, func
 from sqlalchemy.dialects.postgresql import JSONB
 from geoalchemy2 import Geometry
 from config.database import Base
@@ -11,6 +11,43 @@ class ProjectFeature(Base):
     geometry = Column(Geometry(geometry_type='GEOMETRY', srid=4326), nullable=False)
     type = Column(String(50), nullable=False)
     properties = Column(JSONB, nullable=False, default={})
+    # sha256 of the normalized geometry, type and sorted properties
+    content_hash = Column(String(64), index=True)
     
     def __repr__(self):
         return f"<ProjectFeature(id={self.id}, project_id={self.project_id}, type='{self.type}')>"
+
+
+class ProjectVersion(Base):
+    """Monotonic per-project counter, bumped by every write to its features."""
+    __tablename__ = "project_versions"
+
+    project_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # project_feature_changes holds every change after this version; older
+    # ones were compacted away (or predate the change log)
+    changes_floor = Column(BigInteger, server_default="0")
+
+    def __repr__(self):
+        return f"<ProjectVersion(project_id={self.project_id}, version={self.version})>"
+
+
+class ProjectFeatureChange(Base):
+    """Append-only log of feature additions, modifications and deletions per project version."""
+    __tablename__ = "project_feature_changes"
+
+    id = Column(BigInteger, primary_key=True)
+    project_id = Column(Integer, nullable=False)
+    version = Column(BigInteger, nullable=False)
+    feature_id = Column(Integer, nullable=False)
+    # "added", "modified" or "deleted"
+    op = Column(String(10), nullable=False)
+
+    __table_args__ = (Index("ix_project_feature_changes_project_version", "project_id", "version"),)
+
+    def __repr__(self):
+        return (
+            f"<ProjectFeatureChange(project_id={self.project_id}, version={self.version}, "
+            f"feature_id={self.feature_id}, op='{self.op}')>"
+        )
@@ -1,5 +1,5 @@
-from typing import List, Dict, Any, Optional, Union
-from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Literal, Optional, Union
+from pydantic import BaseModel, Field, field_validator, model_validator
 from geojson_pydantic import (
     Feature,
     FeatureCollection,
@@ -53,3 +53,62 @@ class GeoJSONFeatureCollection(FeatureCollection):
 class FeatureResponse(BaseModel):
     status: str = "success"
     saved: int
+    version: Optional[int] = None
+
+
+class FeatureOperation(BaseModel):
+    """
+    One edit in a PATCH of a project's features:
+
+    - ``add``: insert ``feature``
+    - ``replace``: overwrite feature ``id`` with ``feature``
+    - ``delete``: remove feature ``id``
+    - ``update_properties``: merge ``properties`` into feature ``id``; a null
+      value removes the key and ``type`` changes the feature type
+    """
+    op: Literal["add", "replace", "delete", "update_properties"]
+    id: Optional[int] = None
+    feature: Optional[GeoJSONFeature] = None
+    properties: Optional[Dict[str, Any]] = None
+
+    @model_validator(mode="after")
+    def check_members(self):
+        required = {
+            "add": ("feature",),
+            "replace": ("id", "feature"),
+            "delete": ("id",),
+            "update_properties": ("id", "properties"),
+        }[self.op]
+        for name in ("id", "feature", "properties"):
+            present = getattr(self, name) is not None
+            if name in required and not present:
+                raise ValueError(f"'{self.op}' requires {name}")
+            if name not in required and present:
+                raise ValueError(f"'{self.op}' takes no {name}")
+        return self
+
+class FeaturePatch(BaseModel):
+    """Edits applied together, based on the project ``version`` the client last saw."""
+    version: int = Field(..., ge=0)
+    operations: List[FeatureOperation] = Field(..., min_length=1)
+
+    @field_validator('operations')
+    @classmethod
+    def validate_operations(cls, v):
+        seen = set()
+        for op in v:
+            if op.id is not None:
+                if op.id in seen:
+                    raise ValueError(f"feature {op.id} is targeted by more than one operation")
+                seen.add(op.id)
+        return v
+
+class FeaturePatchResponse(BaseModel):
+    status: str = "success"
+    version: int
+    added: int = 0
+    replaced: int = 0
+    deleted: int = 0
+    updated: int = 0
+    # Ids of the added features, in the order of the add operations
+    added_ids: List[int] = []
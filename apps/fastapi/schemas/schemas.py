@@ -22,3 +22,17 @@ class PolygonCoordinates(BaseModel):
 class PolygonCreate(BaseModel):
     description: str
     geometry: PolygonCoordinates
+
+
+class PointBulkBatch(BaseModel):
+    batch: int
+    count: int
+    elapsed_ms: float
+
+
+class PointBulkResponse(BaseModel):
+    status: str = "success"
+    inserted: int
+    ids: List[int]
+    batches: List[PointBulkBatch]
+    elapsed_ms: float
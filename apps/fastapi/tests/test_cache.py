@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+
+from core import cache
+from core.cache import LRUCache, SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache, "time", fake)
+    return fake
+
+
+def test_evicts_least_recently_used_by_count():
+    lru = LRUCache(max_bytes=1000, max_entries=2)
+    lru.set("a", b"1")
+    lru.set("b", b"2")
+    assert lru.get("a") == b"1"  # "b" is now the least recently used
+    lru.set("c", b"3")
+    assert lru.get("b") is None
+    assert lru.get("a") == b"1" and lru.get("c") == b"3"
+    assert lru.evictions == 1
+
+
+def test_evicts_until_under_the_byte_limit():
+    lru = LRUCache(max_bytes=10)
+    lru.set("a", b"x" * 4)
+    lru.set("b", b"x" * 4)
+    lru.set("c", b"x" * 6)
+    assert lru.get("a") is None
+    assert lru.get("b") is not None and lru.get("c") is not None
+    assert lru.stats()["bytes"] == 10
+
+
+def test_refuses_values_larger_than_the_cache():
+    lru = LRUCache(max_bytes=4)
+    lru.set("a", b"12345")
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_replacing_a_key_updates_the_size():
+    lru = LRUCache(max_bytes=100)
+    lru.set("a", b"x" * 10)
+    lru.set("a", b"x" * 3)
+    assert lru.stats()["bytes"] == 3 and len(lru) == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    lru = LRUCache(max_bytes=100, ttl_seconds=30)
+    lru.set("a", b"1")
+    clock.now += 29
+    assert lru.get("a") == b"1"
+    clock.now += 1
+    assert lru.get("a") is None
+    assert lru.expirations == 1 and len(lru) == 0
+
+
+def test_without_ttl_entries_do_not_expire(clock):
+    lru = LRUCache(max_bytes=100)
+    lru.set("a", b"1")
+    clock.now += 10**9
+    assert lru.get("a") == b"1"
+
+
+def test_invalidate_group_drops_only_that_group():
+    lru = LRUCache(max_bytes=100)
+    lru.set("a", b"1", group=1)
+    lru.set("b", b"2", group=1)
+    lru.set("c", b"3", group=2)
+    lru.set("d", b"4")
+    assert lru.invalidate_group(1) == 2
+    assert lru.get("a") is None and lru.get("b") is None
+    assert lru.get("c") == b"3" and lru.get("d") == b"4"
+    assert lru.invalidate_group(1) == 0
+
+
+def test_evicted_entries_leave_their_group():
+    lru = LRUCache(max_bytes=100, max_entries=1)
+    lru.set("a", b"1", group=1)
+    lru.set("b", b"2", group=2)
+    assert lru.invalidate_group(1) == 0
+    assert lru.invalidate_group(2) == 1
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def render():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"body"
+
+        results = await asyncio.gather(*(flight.run("k", render) for _ in range(5)))
+        return results, calls, flight.coalesced
+
+    results, calls, coalesced = asyncio.run(scenario())
+    assert results == [b"body"] * 5
+    assert len(calls) == 1 and coalesced == 4
+
+
+def test_single_flight_shares_the_leader_exception():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("query failed")
+
+        return await asyncio.gather(
+            flight.run("k", fail), flight.run("k", fail), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert [str(r) for r in results] == ["query failed", "query failed"]
+
+
+def test_follower_takes_over_when_the_leader_is_cancelled():
+    async def scenario():
+        flight = SingleFlight()
+        started = []
+
+        def render(name):
+            async def run():
+                started.append(name)
+                await asyncio.sleep(0.05)
+                return name
+
+            return run
+
+        leader = asyncio.create_task(flight.run("k", render("leader")))
+        await asyncio.sleep(0)
+        followers = [
+            asyncio.create_task(flight.run("k", render(f"follower-{i}"))) for i in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return results, started
+
+    results, started = asyncio.run(scenario())
+    # One follower renders in the leader's place and the others share its result
+    assert started == ["leader", "follower-0"]
+    assert results == ["follower-0"] * 3
+
+
+def test_cancelled_follower_does_not_affect_the_leader():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def render():
+            await asyncio.sleep(0.02)
+            return "body"
+
+        leader = asyncio.create_task(flight.run("k", render))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.run("k", render))
+        await asyncio.sleep(0.005)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(scenario()) == "body"
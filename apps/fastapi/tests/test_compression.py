@@ -0,0 +1,43 @@
+import pytest
+
+from core import compression
+from core.compression import choose_encoding
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("br", "br"),
+        ("gzip, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "br"),
+        ("gzip;q=0.2, *;q=0.5", "br"),
+        ("GZIP", "gzip"),
+        ("gzip;q=0, br;q=0", None),
+        ("gzip;q=oops", None),
+    ],
+)
+def test_choose_encoding(with_brotli, accept_encoding, encoding):
+    assert choose_encoding(accept_encoding) == encoding
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [("br", None), ("gzip, br", "gzip"), ("*", "gzip"), ("br, *;q=0.1", "gzip")],
+)
+def test_choose_encoding_without_brotli(without_brotli, accept_encoding, encoding):
+    assert choose_encoding(accept_encoding) == encoding
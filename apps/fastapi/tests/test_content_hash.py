@@ -0,0 +1,102 @@
+from shapely.geometry import Point, Polygon
+
+from crud.project_features import feature_content_hash, match_features, prepare_feature
+from schemas.geojson import GeoJSONFeature
+
+SQUARE = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+
+
+def geojson(properties, geometry=None):
+    return GeoJSONFeature(
+        **{
+            "type": "Feature",
+            "geometry": geometry or {"type": "Point", "coordinates": [77.59, 12.97]},
+            "properties": properties,
+        }
+    )
+
+
+def test_property_key_order_does_not_change_the_hash():
+    point = Point(77.59, 12.97)
+    assert feature_content_hash(point, "clinic", {"a": 1, "b": {"x": 1, "y": 2}}) == (
+        feature_content_hash(point, "clinic", {"b": {"y": 2, "x": 1}, "a": 1})
+    )
+
+
+def test_integral_floats_hash_as_integers():
+    point = Point(77.59, 12.97)
+    assert feature_content_hash(point, "clinic", {"beds": 12, "tags": [1]}) == (
+        feature_content_hash(point, "clinic", {"beds": 12.0, "tags": [1.0]})
+    )
+    assert feature_content_hash(point, "clinic", {"beds": 12}) != (
+        feature_content_hash(point, "clinic", {"beds": 12.5})
+    )
+
+
+def test_booleans_are_not_numbers():
+    point = Point(77.59, 12.97)
+    assert feature_content_hash(point, "clinic", {"open": True}) != (
+        feature_content_hash(point, "clinic", {"open": 1})
+    )
+
+
+def test_ring_orientation_and_start_vertex_do_not_change_the_hash():
+    reversed_ring = Polygon(SQUARE[::-1])
+    rotated_ring = Polygon(SQUARE[2:-1] + SQUARE[:3])
+    expected = feature_content_hash(Polygon(SQUARE), "zone", {})
+    assert feature_content_hash(reversed_ring, "zone", {}) == expected
+    assert feature_content_hash(rotated_ring, "zone", {}) == expected
+
+
+def test_type_properties_and_geometry_all_count():
+    point = Point(77.59, 12.97)
+    base = feature_content_hash(point, "clinic", {"a": 1})
+    assert feature_content_hash(point, "hospital", {"a": 1}) != base
+    assert feature_content_hash(point, "clinic", {"a": 2}) != base
+    assert feature_content_hash(Point(77.59, 12.98), "clinic", {"a": 1}) != base
+
+
+def test_type_defaults_to_the_geometry_type():
+    prepared = prepare_feature(geojson({"name": "x"}))
+    assert prepared.type == "point"
+    assert prepared.properties == {"name": "x"}
+    # Stating the default explicitly is the same feature
+    assert prepare_feature(geojson({"name": "x", "type": "point"})).content_hash == (
+        prepared.content_hash
+    )
+
+
+def test_empty_type_falls_back_like_a_missing_one():
+    first = prepare_feature(geojson({}))
+    second = prepare_feature(geojson({"type": ""}))
+    assert first.type == second.type == "point"
+    assert first.content_hash == second.content_hash
+
+
+def test_resent_feature_is_unchanged():
+    feature = {"name": "PHC", "beds": 12}
+    stored = prepare_feature(geojson(feature))
+    resent = prepare_feature(geojson(dict(reversed(list(feature.items())))))
+
+    new, deleted = match_features([(7, stored.content_hash)], [resent])
+    assert new == [] and deleted == []
+
+
+def test_changed_features_are_inserted_and_the_old_rows_deleted():
+    stored = prepare_feature(geojson({"name": "PHC"}))
+    changed = prepare_feature(geojson({"name": "CHC"}))
+
+    new, deleted = match_features([(7, stored.content_hash)], [changed])
+    assert new == [changed] and deleted == [7]
+
+
+def test_each_stored_row_matches_one_incoming_duplicate():
+    feature = prepare_feature(geojson({"name": "PHC"}))
+    other = prepare_feature(geojson({"name": "CHC"}))
+
+    # Two stored copies, three sent: one copy is added
+    new, deleted = match_features(
+        [(1, feature.content_hash), (2, feature.content_hash), (3, other.content_hash)],
+        [feature, feature, feature],
+    )
+    assert new == [feature] and deleted == [3]
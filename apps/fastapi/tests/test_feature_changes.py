@@ -0,0 +1,52 @@
+from crud.project_features import (
+    FEATURE_ADDED,
+    FEATURE_DELETED,
+    FEATURE_MODIFIED,
+    collapse_changes,
+)
+
+
+def collapse(*entries):
+    changes = collapse_changes(7, entries)
+    assert changes.version == 7 and not changes.resync
+    return changes.added, changes.modified, changes.deleted
+
+
+def test_no_entries():
+    assert collapse() == ([], [], [])
+
+
+def test_single_entries_pass_through():
+    assert collapse((1, FEATURE_ADDED), (2, FEATURE_MODIFIED), (3, FEATURE_DELETED)) == (
+        [1], [2], [3]
+    )
+
+
+def test_added_then_modified_is_added():
+    assert collapse((1, FEATURE_ADDED), (1, FEATURE_MODIFIED), (1, FEATURE_MODIFIED)) == (
+        [1], [], []
+    )
+
+
+def test_added_then_deleted_cancels_out():
+    assert collapse((1, FEATURE_ADDED), (1, FEATURE_MODIFIED), (1, FEATURE_DELETED)) == (
+        [], [], []
+    )
+
+
+def test_modified_then_deleted_is_deleted():
+    assert collapse((1, FEATURE_MODIFIED), (1, FEATURE_DELETED)) == ([], [], [1])
+
+
+def test_repeated_modifications_are_reported_once():
+    assert collapse((1, FEATURE_MODIFIED), (2, FEATURE_ADDED), (1, FEATURE_MODIFIED)) == (
+        [2], [1], []
+    )
+
+
+def test_features_keep_the_order_of_their_first_entry():
+    added, modified, deleted = collapse(
+        (5, FEATURE_ADDED), (3, FEATURE_MODIFIED), (4, FEATURE_ADDED), (2, FEATURE_DELETED),
+        (6, FEATURE_MODIFIED),
+    )
+    assert (added, modified, deleted) == ([5, 4], [3, 6], [2])
@@ -0,0 +1,47 @@
+import pytest
+
+from crud.feature_formats import negotiate_format
+
+
+@pytest.mark.parametrize("accept", [None, ""])
+def test_no_accept_header_means_geojson(accept):
+    assert negotiate_format(accept) == "geojson"
+
+
+@pytest.mark.parametrize(
+    "accept, fmt",
+    [
+        ("application/geo+json", "geojson"),
+        ("application/json", "geojson"),
+        ("*/*", "geojson"),
+        ("application/*", "geojson"),
+        ("application/flatgeobuf", "fgb"),
+        ("application/vnd.apache.arrow.stream", "arrow"),
+        ("application/vnd.outbreakx.wkb-stream", "wkb"),
+        ("Application/FlatGeobuf", "fgb"),
+    ],
+)
+def test_media_types(accept, fmt):
+    assert negotiate_format(accept) == fmt
+
+
+def test_highest_quality_wins():
+    accept = "application/geo+json;q=0.5, application/flatgeobuf;q=0.9, */*;q=0.1"
+    assert negotiate_format(accept) == "fgb"
+
+
+def test_header_order_breaks_ties():
+    assert negotiate_format("application/vnd.apache.arrow.stream, application/flatgeobuf") == "arrow"
+    assert negotiate_format("application/flatgeobuf, application/vnd.apache.arrow.stream") == "fgb"
+
+
+def test_unknown_types_are_skipped():
+    assert negotiate_format("text/html, application/flatgeobuf;q=0.2") == "fgb"
+
+
+@pytest.mark.parametrize(
+    "accept",
+    ["text/html", "application/flatgeobuf;q=0", "application/flatgeobuf;q=oops"],
+)
+def test_nothing_acceptable(accept):
+    assert negotiate_format(accept) is None
@@ -0,0 +1,115 @@
+import pytest
+from pydantic import ValidationError
+
+from crud.project_features import merge_properties
+from schemas.geojson import FeatureOperation, FeaturePatch
+
+POINT = {
+    "type": "Feature",
+    "geometry": {"type": "Point", "coordinates": [77.59, 12.97]},
+    "properties": {"type": "clinic"},
+}
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        {"op": "add", "feature": POINT},
+        {"op": "replace", "id": 1, "feature": POINT},
+        {"op": "delete", "id": 1},
+        {"op": "update_properties", "id": 1, "properties": {"name": "x"}},
+    ],
+)
+def test_operation_accepts_its_members(operation):
+    assert FeatureOperation(**operation).op == operation["op"]
+
+
+@pytest.mark.parametrize(
+    "operation, message",
+    [
+        ({"op": "add"}, "'add' requires feature"),
+        ({"op": "add", "id": 1, "feature": POINT}, "'add' takes no id"),
+        ({"op": "replace", "feature": POINT}, "'replace' requires id"),
+        ({"op": "replace", "id": 1}, "'replace' requires feature"),
+        ({"op": "delete"}, "'delete' requires id"),
+        ({"op": "delete", "id": 1, "properties": {}}, "'delete' takes no properties"),
+        ({"op": "update_properties", "id": 1}, "'update_properties' requires properties"),
+        (
+            {"op": "update_properties", "id": 1, "properties": {}, "feature": POINT},
+            "'update_properties' takes no feature",
+        ),
+    ],
+)
+def test_operation_rejects_missing_or_extra_members(operation, message):
+    with pytest.raises(ValidationError, match=message):
+        FeatureOperation(**operation)
+
+
+def test_operation_rejects_unknown_op():
+    with pytest.raises(ValidationError):
+        FeatureOperation(op="move", id=1)
+
+
+def test_patch_rejects_two_operations_on_one_feature():
+    with pytest.raises(ValidationError, match="feature 3 is targeted by more than one operation"):
+        FeaturePatch(
+            version=1,
+            operations=[
+                {"op": "delete", "id": 3},
+                {"op": "update_properties", "id": 3, "properties": {"a": 1}},
+            ],
+        )
+
+
+def test_patch_allows_several_adds():
+    patch = FeaturePatch(
+        version=0, operations=[{"op": "add", "feature": POINT}, {"op": "add", "feature": POINT}]
+    )
+    assert len(patch.operations) == 2
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"version": 1, "operations": []},
+        {"version": -1, "operations": [{"op": "delete", "id": 1}]},
+    ],
+)
+def test_patch_rejects_empty_operations_and_negative_version(body):
+    with pytest.raises(ValidationError):
+        FeaturePatch(**body)
+
+
+def test_merge_sets_keys_and_keeps_the_rest():
+    feature_type, merged = merge_properties("clinic", {"a": 1, "b": 2}, {"b": 3, "c": 4})
+    assert feature_type == "clinic"
+    assert merged == {"a": 1, "b": 3, "c": 4}
+
+
+def test_merge_null_deletes_a_key():
+    _, merged = merge_properties("clinic", {"a": 1, "b": 2}, {"a": None, "missing": None})
+    assert merged == {"b": 2}
+
+
+def test_merge_does_not_modify_the_stored_properties():
+    stored = {"a": 1}
+    merge_properties("clinic", stored, {"a": None})
+    assert stored == {"a": 1}
+
+
+def test_merge_type_changes_the_feature_type():
+    feature_type, merged = merge_properties("clinic", {"a": 1}, {"type": "hospital"})
+    assert feature_type == "hospital"
+    # The type is stored in its own column, not among the properties
+    assert merged == {"a": 1}
+
+
+def test_merge_null_type_keeps_the_feature_type():
+    feature_type, _ = merge_properties("clinic", {}, {"type": None})
+    assert feature_type == "clinic"
+
+
+@pytest.mark.parametrize("value", ["", 5, ["hospital"]])
+def test_merge_rejects_invalid_type(value):
+    with pytest.raises(ValueError, match="properties.type must be a non-empty string"):
+        merge_properties("clinic", {}, {"type": value})
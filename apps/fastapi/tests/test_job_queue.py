@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from core.job_queue import DONE, FAILED, QUEUED, RUNNING, BoundedJobQueue, Job, QueueFullError
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def blocking_job(job_id, release):
+    return Job(job_id=job_id, run=lambda job: release.wait(5))
+
+
+def finished_job(job_id):
+    return Job(job_id=job_id, run=lambda job: None, state=DONE)
+
+
+def test_workers_start_on_first_submit():
+    jobs = BoundedJobQueue("test-lazy", workers=2, max_queue=4)
+    assert jobs._threads == []
+    jobs.submit(Job(job_id="a", run=lambda job: None))
+    assert len(jobs._threads) == 2
+    jobs.submit(Job(job_id="b", run=lambda job: None))
+    assert len(jobs._threads) == 2
+    jobs._queue.join()
+
+
+def test_submit_rejects_when_the_queue_is_full():
+    jobs = BoundedJobQueue("test-full", workers=1, max_queue=1)
+    release = threading.Event()
+    try:
+        running = jobs.submit(blocking_job("running", release))
+        wait_for(lambda: running.state == RUNNING)
+        queued = jobs.submit(blocking_job("queued", release))
+        assert not jobs.has_capacity()
+
+        with pytest.raises(QueueFullError, match="test-full queue is full"):
+            jobs.submit(blocking_job("rejected", release))
+        assert jobs.get("rejected") is None
+        assert jobs.stats() == {
+            "workers": 1, "max_queue": 1, "queued": 1, "running": 1, "rejected": 1
+        }
+        assert queued.state == QUEUED
+    finally:
+        release.set()
+    jobs._queue.join()
+    assert running.state == queued.state == DONE
+    assert jobs.has_capacity()
+
+
+def test_jobs_record_timing_and_failures():
+    jobs = BoundedJobQueue("test-run", workers=1, max_queue=2)
+
+    def fail(job):
+        raise RuntimeError("ogr2ogr exited with 1")
+
+    done = jobs.submit(Job(job_id="done", run=lambda job: job.result.update(rows=3)))
+    failed = jobs.submit(Job(job_id="failed", run=fail))
+    jobs._queue.join()
+
+    assert done.state == DONE and done.result == {"rows": 3}
+    assert done.queue_wait_seconds >= 0 and done.run_seconds >= 0
+    assert failed.state == FAILED and failed.error == "ogr2ogr exited with 1"
+
+
+def test_history_keeps_the_newest_finished_jobs():
+    jobs = BoundedJobQueue("test-history", workers=1, max_queue=1, history=2)
+    for job_id in ("a", "b", "c"):
+        jobs.record(finished_job(job_id))
+    assert jobs.get("a") is None
+    assert jobs.get("b") is not None and jobs.get("c") is not None
+
+
+def test_history_never_drops_unfinished_jobs():
+    jobs = BoundedJobQueue("test-pending", workers=1, max_queue=1, history=1)
+    release = threading.Event()
+    try:
+        pending = jobs.submit(blocking_job("pending", release))
+        jobs.record(finished_job("b"))
+        jobs.record(finished_job("c"))
+        # The oldest job is still running, so nothing is trimmed yet
+        assert jobs.get("pending") is pending
+        assert jobs.get("b") is not None and jobs.get("c") is not None
+    finally:
+        release.set()
+    jobs._queue.join()
+    jobs.record(finished_job("d"))
+    assert [job_id for job_id in ("pending", "b", "c", "d") if jobs.get(job_id)] == ["d"]
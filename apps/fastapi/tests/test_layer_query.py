@@ -0,0 +1,83 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from crud.layer_export import LayerDescription
+from crud.layer_query import parse_attribute_filters
+
+LAYER = LayerDescription(
+    table_name="layer_test",
+    columns=["count", "rate", "day", "seen_at", "open", "name", "tags"],
+    geometry_column="wkb_geometry",
+    srid=4326,
+    column_types={
+        "count": "integer",
+        "rate": "numeric",
+        "day": "date",
+        "seen_at": "timestamp with time zone",
+        "open": "boolean",
+        "name": "character varying",
+        "tags": "ARRAY",
+    },
+    primary_key="ogc_fid",
+)
+
+
+def parse(*params):
+    """Each condition as (SQL, bound values) rendered for PostgreSQL."""
+    conditions = parse_attribute_filters(params, LAYER)
+    compiled = [condition.compile(dialect=postgresql.dialect()) for condition in conditions]
+    return [(str(c).split("::")[0], list(c.params.values())) for c in compiled]
+
+
+@pytest.mark.parametrize(
+    "param, sql, values",
+    [
+        (("count", "3"), "count = %(count_1)s", [3]),
+        (("count__ne", "3"), "count != %(count_1)s", [3]),
+        (("count__gt", "3"), "count > %(count_1)s", [3]),
+        (("count__gte", "3"), "count >= %(count_1)s", [3]),
+        (("count__lt", "3"), "count < %(count_1)s", [3]),
+        (("count__lte", "3"), "count <= %(count_1)s", [3]),
+        (("count__in", "1,2,5"), "count IN (__[POSTCOMPILE_count_1])", [[1, 2, 5]]),
+        (("rate__lt", "0.25"), "rate < %(rate_1)s", [Decimal("0.25")]),
+        (("day__gte", "2024-01-31"), "day >= %(day_1)s", [date(2024, 1, 31)]),
+        (
+            ("seen_at__lt", "2024-01-31T12:00:00+05:30"),
+            "seen_at < %(seen_at_1)s",
+            [datetime.fromisoformat("2024-01-31T12:00:00+05:30")],
+        ),
+        (("name", "Ward 4"), "name = %(name_1)s", ["Ward 4"]),
+        (("open", "yes"), "open = true", []),
+        (("open", "F"), "open = false", []),
+    ],
+)
+def test_filters(param, sql, values):
+    assert parse(param) == [(sql, values)]
+
+
+def test_reserved_parameters_are_not_filters():
+    assert parse(("limit", "10"), ("bbox", "0,0,1,1"), ("properties", "name"), ("count", "1")) == [
+        ("count = %(count_1)s", [1])
+    ]
+
+
+@pytest.mark.parametrize(
+    "param, message",
+    [
+        (("count__like", "3"), "Unknown operator 'like' in 'count__like'"),
+        (("missing", "3"), "Layer 'layer_test' has no column 'missing'"),
+        (("tags", "a"), "Column 'tags' of type ARRAY cannot be filtered"),
+        (("open__gt", "true"), "Column 'open' does not support 'gt'"),
+        (("count", "three"), "Invalid value for 'count'"),
+        (("count__in", "1,x"), "Invalid value for 'count__in'"),
+        (("rate", "1.2.3"), "Invalid value for 'rate': '1.2.3' is not a number"),
+        (("day", "31/01/2024"), "Invalid value for 'day'"),
+        (("open", "maybe"), "Invalid value for 'open': 'maybe' is not a boolean"),
+    ],
+)
+def test_invalid_filters_raise_value_error(param, message):
+    with pytest.raises(ValueError, match=message):
+        parse(param)
@@ -0,0 +1,86 @@
+import pytest
+
+from core.multipart import MultipartError, MultipartFileReader
+
+BOUNDARY = "----boundary42"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+# Contains a near-boundary line, so only the full delimiter may end the part
+FILE_BYTES = b"name,geom\r\n------boundary4\r\nx,POINT(1 2)\r\n" + bytes(range(256))
+
+
+def body(*parts):
+    out = b""
+    for headers, data in parts:
+        out += f"--{BOUNDARY}\r\n{headers}\r\n\r\n".encode() + data + b"\r\n"
+    return out + f"--{BOUNDARY}--\r\n".encode()
+
+
+def file_part(data=FILE_BYTES, name="file", filename="wards.csv"):
+    return f'Content-Disposition: form-data; name="{name}"; filename="{filename}"', data
+
+
+def text_part(name, value):
+    return f'Content-Disposition: form-data; name="{name}"', value
+
+
+def read(payload, chunk_sizes):
+    reader = MultipartFileReader(CONTENT_TYPE, "file")
+    received, position = b"", 0
+    for size in chunk_sizes:
+        received += b"".join(reader.feed(payload[position : position + size]))
+        position += size
+    received += b"".join(reader.feed(payload[position:]))
+    reader.finish()
+    return reader.filename, received
+
+
+def test_reads_the_file_field_and_skips_other_fields():
+    payload = body(text_part("layer", b"wards"), file_part(), text_part("srid", b"4326"))
+    assert read(payload, []) == ("wards.csv", FILE_BYTES)
+
+
+def test_boundaries_split_across_chunks_at_every_offset():
+    payload = body(text_part("layer", b"wards"), file_part())
+    for split in range(1, len(payload)):
+        assert read(payload, [split]) == ("wards.csv", FILE_BYTES), split
+
+
+def test_one_byte_chunks():
+    payload = body(file_part())
+    assert read(payload, [1] * len(payload)) == ("wards.csv", FILE_BYTES)
+
+
+def test_only_the_first_file_under_the_field_name_is_read():
+    payload = body(file_part(b"first"), file_part(b"second", filename="other.csv"))
+    assert read(payload, []) == ("wards.csv", b"first")
+
+
+def test_an_empty_file_is_still_a_file():
+    assert read(body(file_part(b"")), []) == ("wards.csv", b"")
+
+
+@pytest.mark.parametrize(
+    "content_type",
+    ["application/json", "multipart/form-data", "multipart/mixed; boundary=x"],
+)
+def test_rejects_other_content_types(content_type):
+    with pytest.raises(MultipartError, match="Expected a multipart/form-data body"):
+        MultipartFileReader(content_type, "file")
+
+
+def test_missing_file_field():
+    payload = body(text_part("file", b"not a file"), file_part(name="upload"))
+    with pytest.raises(MultipartError, match="Missing file field 'file'"):
+        read(payload, [])
+
+
+def test_truncated_body():
+    payload = body(file_part())
+    with pytest.raises(MultipartError, match="ended unexpectedly"):
+        read(payload[:-20], [])
+
+
+def test_malformed_body():
+    reader = MultipartFileReader(CONTENT_TYPE, "file")
+    with pytest.raises(MultipartError, match="Malformed multipart body"):
+        reader.feed(b"--not-the-boundary\r\n")
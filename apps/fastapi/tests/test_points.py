@@ -0,0 +1,65 @@
+import pytest
+
+from crud.points import InvalidPointError, _copy_escape, parse_point
+
+
+@pytest.mark.parametrize(
+    "item, expected",
+    [
+        (
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [77.59, 12.97]},
+                "properties": {"description": "PHC"},
+            },
+            (77.59, 12.97, "PHC"),
+        ),
+        (
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [1, 2]}},
+            (1.0, 2.0, None),
+        ),
+        (
+            {"location": {"type": "Point", "coordinates": ["77.5", "12.5"]}, "description": 7},
+            (77.5, 12.5, "7"),
+        ),
+    ],
+)
+def test_parse_point_accepts_features_and_point_create(item, expected):
+    assert parse_point(item) == expected
+
+
+@pytest.mark.parametrize(
+    "item, message",
+    [
+        ([77.59, 12.97], "expected a JSON object"),
+        ({"location": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}}, "must be a Point"),
+        ({"type": "Feature", "geometry": None}, "must be a Point"),
+        ({"location": {"type": "Point", "coordinates": [1, 2, 3]}}, "exactly two values"),
+        ({"location": {"type": "Point", "coordinates": "1,2"}}, "exactly two values"),
+        ({"location": {"type": "Point", "coordinates": ["east", 2]}}, "must be numbers"),
+        ({"location": {"type": "Point", "coordinates": [None, 2]}}, "must be numbers"),
+        ({"location": {"type": "Point", "coordinates": ["nan", 2]}}, "must be finite"),
+        ({"location": {"type": "Point", "coordinates": [1, float("inf")]}}, "must be finite"),
+    ],
+)
+def test_parse_point_rejects_invalid_points(item, message):
+    with pytest.raises(InvalidPointError, match=message):
+        parse_point(item)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, "\\N"),
+        ("", ""),
+        ("plain text", "plain text"),
+        ("tab\there", "tab\\there"),
+        ("two\nlines\r\n", "two\\nlines\\r\\n"),
+        ("back\\slash", "back\\\\slash"),
+        # The backslash is escaped first, so escapes are not doubled
+        ("\\N", "\\\\N"),
+        ("a\\\tb", "a\\\\\\tb"),
+    ],
+)
+def test_copy_escape(value, expected):
+    assert _copy_escape(value) == expected
@@ -0,0 +1,59 @@
+import pytest
+
+from core.query_stats import QueryStats, redact_parameters, statement_shape
+
+
+@pytest.mark.parametrize(
+    "statement, shape",
+    [
+        ("SELECT * FROM shape WHERE id = %(id_1)s", "SELECT * FROM shape WHERE id = ?"),
+        ("SELECT * FROM shape WHERE id = $1 AND x = %s", "SELECT * FROM shape WHERE id = ? AND x = ?"),
+        ("SELECT * FROM shape WHERE id = 42", "SELECT * FROM shape WHERE id = ?"),
+        ("SELECT 1.5, -2", "SELECT ?, -?"),
+        ("SELECT * FROM t WHERE name = 'it''s'", "SELECT * FROM t WHERE name = ?"),
+        ("SELECT *\n  FROM t\n WHERE a = %s  ", "SELECT * FROM t WHERE a = ?"),
+        # Digits inside identifiers are part of the name
+        ("SELECT t1.id FROM layer_2024 t1", "SELECT t1.id FROM layer_2024 t1"),
+    ],
+)
+def test_statement_shape_replaces_values(statement, shape):
+    assert statement_shape(statement) == shape
+
+
+@pytest.mark.parametrize("values", ["$1, $2", "%s,%s,%s", "1, 2, 3", "'a', 'b'"])
+def test_in_lists_of_any_length_share_a_shape(values):
+    assert statement_shape(f"SELECT * FROM t WHERE id IN ({values})") == (
+        "SELECT * FROM t WHERE id IN (?...)"
+    )
+
+
+def test_repeated_flags_select_shapes_over_the_threshold():
+    stats = QueryStats()
+    for feature_id in range(4):
+        stats.record(f"SELECT * FROM project_features WHERE id = {feature_id}", 0.001)
+        stats.record(f"UPDATE project_features SET type = 'x' WHERE id = {feature_id}", 0.001)
+    stats.record("WITH a AS (SELECT 1) SELECT * FROM a", 0.001)
+
+    assert stats.count == 9
+    assert stats.seconds == pytest.approx(0.009)
+    assert stats.repeated(threshold=3) == [("SELECT * FROM project_features WHERE id = ?", 4)]
+    assert stats.repeated(threshold=4) == []
+
+
+def test_server_timing_header():
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.0125)
+    assert stats.server_timing(0.05) == 'db;dur=12.5;desc="1 queries", app;dur=50.0'
+
+
+@pytest.mark.parametrize(
+    "parameters, redacted",
+    [
+        ({"id": 1, "name": "Ward 4"}, {"id": "int", "name": "str"}),
+        ((1, "Ward 4", None), ["int", "str", "NoneType"]),
+        ([{"id": 1}, {"id": 2}], "<2 parameter sets>"),
+        (None, "NoneType"),
+    ],
+)
+def test_parameters_are_redacted_to_their_types(parameters, redacted):
+    assert redact_parameters(parameters) == redacted
@@ -0,0 +1,105 @@
+import math
+
+import pytest
+from sqlalchemy import column
+from sqlalchemy.dialects import postgresql
+
+from crud.spatial import (
+    DEFAULT_PRECISION,
+    GeometryOptions,
+    SpatialFilter,
+    build_geometry_options,
+    tolerance_precision,
+    zoom_tolerance,
+)
+
+POINT = '{"type":"Point","coordinates":[77.59,12.97]}'
+FILTER = SpatialFilter(bbox=(77, 12, 78, 13), geojson=POINT)
+
+
+def clause_sql(spatial, srid):
+    return str(
+        spatial.clause(column("geom"), srid).compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+def test_filter_on_a_4326_column_is_used_as_is():
+    assert clause_sql(FILTER, 4326) == (
+        "ST_Intersects(geom, ST_MakeEnvelope(77, 12, 78, 13, 4326)) AND "
+        f"ST_Intersects(geom, ST_SetSRID(ST_GeomFromGeoJSON('{POINT}'), 4326))"
+    )
+
+
+def test_filter_is_transformed_to_the_column_srid():
+    assert clause_sql(FILTER, 32643) == (
+        "ST_Intersects(geom, ST_Transform(ST_MakeEnvelope(77, 12, 78, 13, 4326), 32643)) AND "
+        "ST_Intersects(geom, ST_Transform("
+        f"ST_SetSRID(ST_GeomFromGeoJSON('{POINT}'), 4326), 32643))"
+    )
+
+
+def test_filter_drops_its_srid_for_undeclared_columns():
+    assert clause_sql(FILTER, 0) == (
+        "ST_Intersects(geom, ST_SetSRID(ST_MakeEnvelope(77, 12, 78, 13, 4326), 0)) AND "
+        "ST_Intersects(geom, ST_SetSRID("
+        f"ST_SetSRID(ST_GeomFromGeoJSON('{POINT}'), 4326), 0))"
+    )
+
+
+@pytest.mark.parametrize(
+    "zoom, tolerance",
+    [(0, 360 / 256), (1, 360 / 512), (10, 360 / 256 / 1024), (24, 360 / 2**32)],
+)
+def test_zoom_tolerance_is_one_pixel(zoom, tolerance):
+    assert zoom_tolerance(zoom) == tolerance
+
+
+@pytest.mark.parametrize(
+    "tolerance, precision",
+    [(100.0, 0), (1.0, 1), (0.1, 2), (0.05, 3), (zoom_tolerance(10), 4), (1e-20, 15)],
+)
+def test_tolerance_precision(tolerance, precision):
+    assert tolerance_precision(tolerance) == precision
+
+
+def test_no_parameters_keep_full_geometries():
+    assert build_geometry_options() == GeometryOptions(None, DEFAULT_PRECISION)
+
+
+def test_zoom_sets_tolerance_and_precision():
+    assert build_geometry_options(zoom=10) == GeometryOptions(zoom_tolerance(10), 4)
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({"zoom": 10, "precision": 6}, GeometryOptions(zoom_tolerance(10), 6)),
+        ({"tolerance": 0.01}, GeometryOptions(0.01, 3)),
+        ({"tolerance": 0.01, "precision": 0}, GeometryOptions(0.01, 0)),
+        ({"precision": 5}, GeometryOptions(None, 5)),
+    ],
+)
+def test_explicit_precision_and_tolerance(params, expected):
+    assert build_geometry_options(**params) == expected
+
+
+def test_zoom_and_tolerance_are_exclusive():
+    with pytest.raises(ValueError, match="either zoom or tolerance"):
+        build_geometry_options(zoom=3, tolerance=0.1)
+
+
+@pytest.mark.parametrize("tolerance", [0.0, -0.1, math.inf, math.nan])
+def test_tolerance_must_be_positive_and_finite(tolerance):
+    with pytest.raises(ValueError, match="positive number of degrees"):
+        build_geometry_options(tolerance=tolerance)
+
+
+def test_simplify_only_with_a_tolerance():
+    geom = column("geom")
+    assert GeometryOptions().simplify(geom) is geom
+    assert GeometryOptions().simplify_sql("geom") == "geom"
+    assert GeometryOptions(tolerance=0.5).simplify_sql("geom") == (
+        "ST_SimplifyPreserveTopology(geom, 0.5)"
+    )
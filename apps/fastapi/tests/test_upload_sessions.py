@@ -0,0 +1,162 @@
+import hashlib
+import os
+
+import pytest
+
+from core.job_queue import Job, QueueFullError
+from crud import upload_sessions
+from crud.upload_sessions import (
+    ChecksumMismatchError,
+    ChunkWriter,
+    IncompleteUploadError,
+    OffsetMismatchError,
+    SessionBusyError,
+    UploadSessionNotFound,
+    create_session,
+    current_offset,
+    finalize_session,
+    load_session,
+)
+
+DATA = b"ogc_fid,name\n1,Ward 4\n2,Ward 5\n"
+
+
+@pytest.fixture(autouse=True)
+def staging_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_sessions, "STAGING_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Imports handed to the queue, as (filepath, filename, size, checksum)."""
+    imports = []
+
+    def queue_gis_import(filepath, filename, dsn, size, checksum):
+        imports.append((filepath, filename, size, checksum))
+        return Job(job_id="job-1", run=lambda job: None)
+
+    monkeypatch.setattr(upload_sessions, "queue_gis_import", queue_gis_import)
+    return imports
+
+
+def append(session, start, chunk):
+    writer = ChunkWriter(session, start)
+    try:
+        writer.write(chunk)
+    finally:
+        writer.close()
+    return current_offset(session)
+
+
+def test_session_round_trips_through_its_descriptor():
+    session = create_session("wards.csv", len(DATA), checksum="ABC123")
+    assert session.checksum == "abc123"
+    assert load_session(session.upload_id) == session
+    assert current_offset(session) == 0
+
+
+def test_sessions_larger_than_the_upload_cap_are_refused(monkeypatch):
+    monkeypatch.setattr(upload_sessions, "MAX_UPLOAD_BYTES", 10)
+    with pytest.raises(ValueError, match="10 byte limit"):
+        create_session("wards.csv", 11)
+
+
+def test_chunks_append_at_the_committed_offset():
+    session = create_session("wards.csv", len(DATA))
+    assert append(session, 0, DATA[:10]) == 10
+    assert append(session, 10, DATA[10:]) == len(DATA)
+
+
+@pytest.mark.parametrize("start", [0, 5, 11])
+def test_chunks_not_at_the_offset_report_where_to_resume(start):
+    session = create_session("wards.csv", len(DATA))
+    append(session, 0, DATA[:10])
+    with pytest.raises(OffsetMismatchError) as error:
+        ChunkWriter(session, start)
+    assert error.value.offset == 10
+    # The rejected chunk wrote nothing and the upload resumes where it was
+    assert append(session, error.value.offset, DATA[10:]) == len(DATA)
+
+
+def test_chunks_may_not_run_past_the_declared_size():
+    session = create_session("wards.csv", 4)
+    writer = ChunkWriter(session, 0)
+    with pytest.raises(ValueError, match="declared upload size of 4 bytes"):
+        writer.write(b"12345")
+    writer.close()
+    assert current_offset(session) == 0
+
+
+def test_one_writer_per_session():
+    session = create_session("wards.csv", len(DATA))
+    writer = ChunkWriter(session, 0)
+    try:
+        with pytest.raises(SessionBusyError):
+            ChunkWriter(session, 0)
+        with pytest.raises(SessionBusyError):
+            finalize_session(session.upload_id, "dsn")
+    finally:
+        writer.close()
+
+
+@pytest.mark.parametrize("upload_id", ["../../etc/passwd", "abc", "0" * 32])
+def test_unknown_or_malformed_ids_are_not_found(upload_id):
+    with pytest.raises(UploadSessionNotFound):
+        load_session(upload_id)
+
+
+def test_expired_sessions_are_removed(monkeypatch, staging_dir):
+    session = create_session("wards.csv", len(DATA))
+    monkeypatch.setattr(upload_sessions, "SESSION_TTL_SECONDS", -1)
+    with pytest.raises(UploadSessionNotFound, match="has expired"):
+        load_session(session.upload_id)
+    assert os.listdir(staging_dir) == []
+
+
+def test_finalize_queues_the_complete_upload(queued, staging_dir):
+    checksum = hashlib.sha256(DATA).hexdigest()
+    session = create_session("wards.csv", len(DATA), checksum=checksum)
+    append(session, 0, DATA)
+
+    assert finalize_session(session.upload_id, "dsn").job_id == "job-1"
+    [(filepath, filename, size, queued_checksum)] = queued
+    assert (filename, size, queued_checksum) == ("wards.csv", len(DATA), checksum)
+    assert filepath.startswith(str(staging_dir)) and filepath.endswith(".csv")
+    # Only the import's link is left; the session is consumed
+    assert os.listdir(staging_dir) == [os.path.basename(filepath)]
+    with pytest.raises(UploadSessionNotFound):
+        load_session(session.upload_id)
+
+
+def test_finalize_refuses_incomplete_uploads(queued):
+    session = create_session("wards.csv", len(DATA))
+    append(session, 0, DATA[:10])
+    with pytest.raises(IncompleteUploadError, match="10 of"):
+        finalize_session(session.upload_id, "dsn")
+    assert queued == []
+    assert current_offset(load_session(session.upload_id)) == 10
+
+
+def test_finalize_drops_uploads_with_the_wrong_checksum(queued):
+    session = create_session("wards.csv", len(DATA), checksum="0" * 64)
+    append(session, 0, DATA)
+    with pytest.raises(ChecksumMismatchError):
+        finalize_session(session.upload_id, "dsn")
+    assert queued == []
+    with pytest.raises(UploadSessionNotFound):
+        load_session(session.upload_id)
+
+
+def test_finalize_keeps_the_session_when_the_queue_is_full(queued, monkeypatch):
+    session = create_session("wards.csv", len(DATA))
+    append(session, 0, DATA)
+    with monkeypatch.context() as patch:
+        patch.setattr(upload_sessions.import_queue, "has_capacity", lambda: False)
+        with pytest.raises(QueueFullError):
+            finalize_session(session.upload_id, "dsn")
+    assert queued == []
+
+    # Retrying once the queue has room succeeds
+    assert finalize_session(session.upload_id, "dsn").job_id == "job-1"
+    assert len(queued) == 1
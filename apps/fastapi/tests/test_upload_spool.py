@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from crud import gis_import
+from crud.gis_import import UploadSpool, UploadTooLargeError, spool_multipart_upload
+
+BOUNDARY = "xyz"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def multipart(data, filename="wards.geojson"):
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n\r\n'
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def spool(payload, chunk_size=7, **kwargs):
+    async def body():
+        for i in range(0, len(payload), chunk_size):
+            yield payload[i : i + chunk_size]
+
+    return asyncio.run(spool_multipart_upload(body(), CONTENT_TYPE, **kwargs))
+
+
+def test_spool_writes_and_hashes(tmp_path):
+    path = tmp_path / "upload.bin"
+    upload = UploadSpool(str(path), max_bytes=10)
+    upload.write(b"12345")
+    upload.write(b"67890")
+    assert upload.finish() == (10, hashlib.sha256(b"1234567890").hexdigest())
+    assert path.read_bytes() == b"1234567890"
+
+
+def test_spool_removes_the_file_past_the_cap(tmp_path):
+    path = tmp_path / "upload.bin"
+    upload = UploadSpool(str(path), max_bytes=10)
+    upload.write(b"12345")
+    with pytest.raises(UploadTooLargeError, match="10 byte limit"):
+        upload.write(b"678901")
+    assert not path.exists()
+    # Discarding twice is harmless
+    upload.discard()
+
+
+def test_multipart_upload_is_spooled_to_disk():
+    data = b'{"type":"FeatureCollection","features":[]}' * 50
+    filename, filepath, size, checksum = spool(multipart(data))
+    try:
+        assert filename == "wards.geojson"
+        assert filepath.endswith(".geojson")
+        assert (size, checksum) == (len(data), hashlib.sha256(data).hexdigest())
+        with open(filepath, "rb") as f:
+            assert f.read() == data
+    finally:
+        os.remove(filepath)
+
+
+def test_multipart_upload_flushes_in_chunks(monkeypatch):
+    monkeypatch.setattr(gis_import, "CHUNK_BYTES", 16)
+    data = bytes(range(256)) * 4
+    _, filepath, size, _ = spool(multipart(data), chunk_size=5)
+    try:
+        assert size == len(data)
+        with open(filepath, "rb") as f:
+            assert f.read() == data
+    finally:
+        os.remove(filepath)
+
+
+def test_odd_extensions_are_replaced():
+    _, filepath, _, _ = spool(multipart(b"x", filename="layer.tar/../x y"))
+    os.remove(filepath)
+    assert filepath.endswith(".bin")
+
+
+def test_multipart_upload_over_the_cap_leaves_no_file(monkeypatch):
+    monkeypatch.setattr(gis_import, "CHUNK_BYTES", 4)
+    monkeypatch.setattr(gis_import, "uuid4", lambda: "test-over-the-cap")
+    with pytest.raises(UploadTooLargeError):
+        spool(multipart(b"x" * 100), max_bytes=50)
+    assert not os.path.exists("/tmp/test-over-the-cap.geojson")
+
+
+def test_request_stream_is_cut_off_before_parsing(monkeypatch):
+    monkeypatch.setattr(gis_import, "MULTIPART_OVERHEAD_BYTES", 0)
+    received = []
+
+    async def endless():
+        yield multipart(b"")[:20]
+        while True:
+            received.append(1)
+            yield b"x" * 10
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(spool_multipart_upload(endless(), CONTENT_TYPE, max_bytes=100))
+    assert len(received) <= 9